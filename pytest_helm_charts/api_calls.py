@@ -0,0 +1,117 @@
+"""This module counts requests sent to the Kubernetes API server through the `kube_client` of a
+[Cluster](pytest_helm_charts.clusters.Cluster), broken down by verb, resource, namespace and status code,
+and measures their latency."""
+
+import bisect
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from pytest_helm_charts.tracing import record_http_request
+
+API_BUDGET_MARKER = "k8s_api_budget"
+LATENCY_BUCKETS_SEC = [0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+
+@dataclass
+class ApiCall:
+    """Class that represents a single request sent to the Kubernetes API server."""
+
+    verb: str
+    resource: str
+    namespace: Optional[str]
+    status_code: int
+    latency_sec: float
+
+
+def parse_api_path(url: str) -> Tuple[str, Optional[str]]:
+    """
+    Extract the resource type and namespace from the URL of a Kubernetes API request.
+
+    Args:
+        url: URL of the request, like 'https://host/apis/apps/v1/namespaces/default/deployments/test'
+
+    Returns:
+        A tuple of resource type (including subresource if present, like 'pods/log') and namespace
+        (`None` for cluster scope requests).
+    """
+    parts = [p for p in urlparse(url).path.split("/") if p]
+    if parts[:1] == ["api"]:
+        parts = parts[2:]
+    elif parts[:1] == ["apis"]:
+        parts = parts[3:]
+    else:
+        return "/".join(parts) or "/", None
+
+    namespace: Optional[str] = None
+    if len(parts) >= 2 and parts[0] == "namespaces":
+        namespace = parts[1]
+        parts = parts[2:]
+    if not parts:
+        return "namespaces", namespace
+    resource = parts[0]
+    if len(parts) >= 3:
+        resource = f"{resource}/{parts[2]}"
+    return resource, namespace
+
+
+class ApiCallCounter:
+    """Thread safe counter of all the requests sent to the Kubernetes API server in the current process."""
+
+    def __init__(self) -> None:
+        self.calls: List[ApiCall] = []
+        self._lock = threading.Lock()
+
+    def record(self, verb: str, url: str, status_code: int, latency_sec: float) -> None:
+        resource, namespace = parse_api_path(url)
+        record_http_request(
+            verb.upper(), url, status_code, latency_sec, {"k8s.resource": resource, "k8s.namespace.name": namespace}
+        )
+        with self._lock:
+            self.calls.append(ApiCall(verb.upper(), resource, namespace, status_code, latency_sec))
+
+    def count_since(self, start: int) -> int:
+        """Return how many calls were recorded since the number of calls was equal to `start`."""
+        return len(self.calls) - start
+
+    def summary(self, start: int = 0) -> Dict[str, Any]:
+        """
+        Return statistics of the calls recorded since the number of calls was equal to `start`.
+
+        Returns:
+            A dictionary with the total number of calls, numbers of calls by verb, resource, namespace and status
+            code and a latency histogram (keys are upper bounds of the buckets in seconds).
+        """
+        with self._lock:
+            calls = self.calls[start:]
+        histogram = [0] * (len(LATENCY_BUCKETS_SEC) + 1)
+        for c in calls:
+            histogram[bisect.bisect_left(LATENCY_BUCKETS_SEC, c.latency_sec)] += 1
+        bucket_names = [str(b) for b in LATENCY_BUCKETS_SEC] + ["+Inf"]
+        return {
+            "total": len(calls),
+            "by_verb": dict(Counter(c.verb for c in calls)),
+            "by_resource": dict(Counter(c.resource for c in calls)),
+            "by_namespace": dict(Counter(c.namespace or "" for c in calls)),
+            "by_status_code": dict(Counter(str(c.status_code) for c in calls)),
+            "latency_histogram": dict(zip(bucket_names, histogram)),
+        }
+
+
+counter = ApiCallCounter()
+
+
+def _record_response(response: Any, *args: Any, **kwargs: Any) -> Any:
+    counter.record(
+        response.request.method, response.request.url, response.status_code, response.elapsed.total_seconds()
+    )
+    return response
+
+
+def install_api_call_counter(kube_client: Any) -> None:
+    """Count all the requests sent using `kube_client` (a `pykube.HTTPClient`) in the global counter."""
+    hooks = kube_client.session.hooks.setdefault("response", [])
+    if _record_response not in hooks:
+        hooks.append(_record_response)
@@ -0,0 +1,171 @@
+"""This module records how App CRs move through their release statuses (like `pending-install` and `deployed`),
+so that a test session can be used to benchmark how fast app-operator and chart-operator reconcile apps.
+
+Apps are tracked from the moment they are created. Once watching is started (the plugin does it when
+`--helm-charts-app-timeline` is given), the namespace of each created App is watched on a background thread
+for the whole session, so transitions are timestamped when the API server reports them, whether or not
+a test waits for the App.
+"""
+
+import json
+import logging
+import math
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CREATED_PHASE = "created"
+TIMELINE_PERCENTILES = (50, 90, 99)
+APP_WATCH_RETRY_SEC = 1
+# namespace, name and release status of an App reported by a watch
+AppStatusEvent = Tuple[str, str, Optional[str]]
+
+
+@dataclass
+class AppPhase:
+    """Class that represents a status of an App and when it was first observed, relative to the App's creation."""
+
+    phase: str
+    sec: float
+
+
+@dataclass
+class AppTimeline:
+    """Class that represents the statuses an App went through since it was created."""
+
+    namespace: str
+    name: str
+    node_id: Optional[str]
+    created_at: float
+    phases: List[AppPhase] = field(default_factory=list)
+    _start: float = field(default_factory=lambda: time.monotonic(), repr=False)
+
+    def observe(self, phase: str) -> None:
+        """Record the `phase` if it's different from the last recorded one."""
+        if not self.phases or self.phases[-1].phase != phase:
+            self.phases.append(AppPhase(phase, time.monotonic() - self._start))
+
+    def latencies(self) -> Dict[str, List[float]]:
+        """
+        Return latencies of the App's transitions in seconds, keyed by 'previous -> next' phase names. A transition
+        repeated by upgrades of the App has a latency for each of its occurrences. Time from creation to the first
+        occurrence of each of the later phases is included as well, keyed by 'created -> phase'.
+        """
+        result: Dict[str, List[float]] = {}
+        previous = AppPhase(CREATED_PHASE, 0.0)
+        for phase in self.phases:
+            result.setdefault(f"{previous.phase} -> {phase.phase}", []).append(phase.sec - previous.sec)
+            result.setdefault(f"{CREATED_PHASE} -> {phase.phase}", [phase.sec])
+            previous = phase
+        return result
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the `pct` percentile of the `values` using the nearest-rank method."""
+    if not values:
+        raise ValueError("'values' can't be empty.")
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class AppTimelineRecorder:
+    """Collects [AppTimeline](AppTimeline) objects for all the Apps created in the current process."""
+
+    def __init__(self) -> None:
+        self.timelines: List[AppTimeline] = []
+        self._current: Dict[Tuple[str, str], AppTimeline] = {}
+        self._lock = threading.Lock()
+        self._watches: Dict[str, threading.Thread] = {}
+        # set when watching is stopped; `None` if it isn't started
+        self._stopped: Optional[threading.Event] = None
+
+    def start_watching(self) -> None:
+        """Make [watch](AppTimelineRecorder.watch) start watches; until then, it does nothing."""
+        with self._lock:
+            self._stopped = threading.Event()
+
+    def stop_watching(self) -> None:
+        """Stop all the watches; each of them ends when the API server sends it the next event."""
+        with self._lock:
+            if self._stopped is not None:
+                self._stopped.set()
+            self._stopped = None
+            self._watches = {}
+
+    def watch(self, key: str, events: Callable[[], Iterable[AppStatusEvent]]) -> None:
+        """
+        Record statuses of the Apps reported by `events` on a background thread, unless watching isn't started
+        or `key` is watched already. `events` is called again when the stream it returns ends or fails, until
+        [stop_watching](AppTimelineRecorder.stop_watching) is called.
+        """
+        with self._lock:
+            if self._stopped is None or key in self._watches:
+                return
+            thread = threading.Thread(
+                target=self._run_watch, args=(key, events, self._stopped), name=f"app-timeline-{key}", daemon=True
+            )
+            self._watches[key] = thread
+        thread.start()
+
+    def _run_watch(self, key: str, events: Callable[[], Iterable[AppStatusEvent]], stopped: threading.Event) -> None:
+        while not stopped.is_set():
+            try:
+                for namespace, name, phase in events():
+                    if stopped.is_set():
+                        return
+                    self.observe(namespace, name, phase)
+            except Exception as e:
+                logger.debug(f"Watching Apps for the timeline '{key}' failed, retrying: {e}")
+                stopped.wait(APP_WATCH_RETRY_SEC)
+
+    def app_created(self, namespace: str, name: str, node_id: Optional[str] = None) -> AppTimeline:
+        """Start tracking the App created just now. An App created again with the same name gets a new timeline."""
+        timeline = AppTimeline(namespace, name, node_id, time.time())
+        with self._lock:
+            self.timelines.append(timeline)
+            self._current[(namespace, name)] = timeline
+        return timeline
+
+    def observe(self, namespace: str, name: str, phase: Optional[str]) -> None:
+        """Record the observed `phase` of the App; Apps that are not tracked and empty phases are ignored."""
+        if not phase:
+            return
+        with self._lock:
+            timeline = self._current.get((namespace, name))
+            if timeline is not None:
+                timeline.observe(phase)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Return statistics of each of the transitions observed for all the Apps.
+
+        Returns:
+            Dict keyed by 'previous -> next' phase names, with the number of observed transitions (`count`),
+            percentiles of their latencies in seconds (`p50`, `p90`, `p99`) and the maximum latency (`max`).
+        """
+        latencies: Dict[str, List[float]] = {}
+        for timeline in self.timelines:
+            for transition, values in timeline.latencies().items():
+                latencies.setdefault(transition, []).extend(values)
+        result: Dict[str, Dict[str, float]] = {}
+        for transition, values in sorted(latencies.items()):
+            stats: Dict[str, float] = {"count": len(values)}
+            stats.update({f"p{p}": percentile(values, p) for p in TIMELINE_PERCENTILES})
+            stats["max"] = max(values)
+            result[transition] = stats
+        return result
+
+    def write_json(self, path: str) -> None:
+        """Write all the recorded timelines and their summary to the file in `path`."""
+        report: Dict[str, Any] = {
+            "apps": [{k: v for k, v in asdict(t).items() if not k.startswith("_")} for t in self.timelines],
+            "summary": self.summary(),
+        }
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+recorder = AppTimelineRecorder()
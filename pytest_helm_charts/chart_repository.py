@@ -0,0 +1,212 @@
+"""This module packages the chart under test and serves it from a Helm repository running in the test process,
+so the chart can be installed by Flux and app-operator without publishing it to a remote catalog first.
+
+Packages are cached in a directory keyed by a hash of the chart's content, so a chart that didn't change since
+the previous session isn't packaged again.
+"""
+
+import gzip
+import hashlib
+import io
+import logging
+import os
+import shutil
+import tarfile
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from fnmatch import fnmatchcase
+from functools import partial
+from http.server import SimpleHTTPRequestHandler
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import yaml
+
+from pytest_helm_charts.local_server import (
+    IgnoreFunc,
+    LocalHTTPServer,
+    directory_content_hash,
+    directory_files,
+)
+from pytest_helm_charts.utils import YamlDict
+
+logger = logging.getLogger(__name__)
+
+CHART_FILE_NAME = "Chart.yaml"
+INDEX_FILE_NAME = "index.yaml"
+CHART_PACKAGES_CACHE_DIR_NAME = "pytest-helm-charts-chart-packages"
+HELMIGNORE_FILE_NAME = ".helmignore"
+# rules Helm adds to the ones from `.helmignore`
+HELMIGNORE_DEFAULT_RULES = ("templates/.?*",)
+
+
+@dataclass
+class ChartPackage:
+    """Class that represents a packaged chart: its `Chart.yaml` metadata and the path to the `.tgz` file."""
+
+    metadata: YamlDict
+    path: Path
+    digest: str
+
+    @property
+    def name(self) -> str:
+        return self.metadata["name"]
+
+    @property
+    def version(self) -> str:
+        return str(self.metadata["version"])
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class _HelmIgnoreRule:
+    # segments of the pattern, in the syntax of `fnmatch` instead of Go's `filepath.Match`
+    segments: List[str]
+    negate: bool
+    must_dir: bool
+    base_name_only: bool
+
+    def matches(self, path: str) -> bool:
+        # wildcards don't match `/`, so the path has to have as many segments as the pattern
+        names = path.split("/")[-1:] if self.base_name_only else path.split("/")
+        return len(names) == len(self.segments) and all(fnmatchcase(n, p) for n, p in zip(names, self.segments))
+
+
+def _parse_helmignore_rule(rule: str) -> _HelmIgnoreRule:
+    negate = rule.startswith("!")
+    rule = rule[1:] if negate else rule
+    if "**" in rule:
+        raise ValueError(f"Double-star (**) syntax is not supported by .helmignore: '{rule}'.")
+    must_dir = rule.endswith("/")
+    rule = rule.rstrip("/")
+    segments = rule.lstrip("/").replace("[^", "[!").split("/")
+    return _HelmIgnoreRule(segments, negate, must_dir, "/" not in rule)
+
+
+def load_helmignore(chart_dir: Path) -> IgnoreFunc:
+    """
+    Return a function telling if a path in `chart_dir` is ignored by the chart's `.helmignore` file, with
+    the same rules `helm package` uses: a pattern without `/` matches base names, a pattern ending with `/`
+    matches directories only and `!` negates a pattern.
+    """
+    lines = list(HELMIGNORE_DEFAULT_RULES)
+    helmignore = chart_dir / HELMIGNORE_FILE_NAME
+    if helmignore.exists():
+        lines.extend(helmignore.read_text().splitlines())
+    rules = [_parse_helmignore_rule(rule) for rule in (line.strip() for line in lines) if rule and rule[0] != "#"]
+
+    def _ignored(path: str, is_dir: bool) -> bool:
+        # the same (peculiar) evaluation of negated rules as in Helm's `ignore.Rules.Ignore`
+        for rule in rules:
+            if rule.negate:
+                if (rule.must_dir and not is_dir) or not rule.matches(path):
+                    return True
+                continue
+            if rule.must_dir and not is_dir:
+                continue
+            if rule.matches(path):
+                return True
+        return False
+
+    return _ignored
+
+
+def _write_package(chart_dir: Path, metadata: YamlDict, chart_yaml: bytes, path: Path) -> None:
+    # timestamps, owners and the gzip file name are fixed, so packages of the same content are identical
+    with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as tmp:
+        with (
+            gzip.GzipFile(filename="", fileobj=tmp, mode="wb", mtime=0) as gz,
+            tarfile.open(fileobj=gz, mode="w") as tar,
+        ):
+            for file in directory_files(chart_dir, load_helmignore(chart_dir)):
+                rel_path = file.relative_to(chart_dir).as_posix()
+                data = chart_yaml if rel_path == CHART_FILE_NAME else file.read_bytes()
+                info = tarfile.TarInfo(f"{metadata['name']}/{rel_path}")
+                info.size = len(data)
+                info.mode = 0o644
+                tar.addfile(info, io.BytesIO(data))
+    # renaming is atomic, so concurrent sessions (or pytest-xdist workers) never see a partial package
+    os.replace(tmp.name, path)
+
+
+def package_chart(chart_dir: Path, cache_dir: Path, version: Optional[str] = None) -> ChartPackage:
+    """
+    Package the chart in `chart_dir` the same way `helm package` does, unless a package of the same content
+    already exists in `cache_dir`. Files ignored by the chart's `.helmignore` (see
+    [load_helmignore](load_helmignore)) are neither packaged nor hashed.
+
+    Args:
+        chart_dir: directory of the chart, with the `Chart.yaml` file
+        cache_dir: directory to keep packages in; subdirectories are named after hashes of charts' content
+        version: overrides the version from `Chart.yaml`, like `helm package --version`
+
+    Returns:
+        The packaged chart.
+    """
+    chart_yaml = (chart_dir / CHART_FILE_NAME).read_bytes()
+    metadata: YamlDict = yaml.safe_load(chart_yaml)
+    if version:
+        metadata["version"] = version
+        chart_yaml = yaml.safe_dump(metadata, sort_keys=False).encode()
+    content_hash = directory_content_hash(chart_dir, load_helmignore(chart_dir))
+    package_hash = hashlib.sha256(f"{content_hash}:{metadata['version']}".encode()).hexdigest()
+    path = cache_dir / package_hash[:16] / f"{metadata['name']}-{metadata['version']}.tgz"
+    if path.exists():
+        logger.info(f"Using cached package '{path}' of chart '{chart_dir}'.")
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_package(chart_dir, metadata, chart_yaml, path)
+        logger.info(f"Packaged chart '{chart_dir}' to '{path}'.")
+    return ChartPackage(metadata, path, _file_digest(path))
+
+
+def make_index(packages: Sequence[ChartPackage], base_url: str) -> YamlDict:
+    """Return the content of the `index.yaml` file of a Helm repository at `base_url` serving `packages`."""
+    now = datetime.now(timezone.utc).isoformat()
+    entries: Dict[str, List[YamlDict]] = {}
+    for package in packages:
+        entry = dict(package.metadata, urls=[f"{base_url}/{package.path.name}"], created=now, digest=package.digest)
+        entries.setdefault(package.name, []).append(entry)
+    return {"apiVersion": "v1", "entries": entries, "generated": now}
+
+
+class _RequestHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"Chart repository: {format % args}")
+
+
+class ChartRepositoryServer(LocalHTTPServer):
+    """
+    Helm repository served over HTTP from a thread of the test process.
+
+    Args:
+        directory: directory to serve packages and the `index.yaml` file from
+        host: address the repository is advertised with, which needs to be reachable from the cluster;
+            detected with [detect_host_address](pytest_helm_charts.local_server.detect_host_address) if `None`
+        bind_address: address to listen on
+        port: port to listen on; a free one is picked if 0
+    """
+
+    def __init__(
+        self, directory: Path, host: Optional[str] = None, bind_address: str = "0.0.0.0", port: int = 0
+    ) -> None:
+        super().__init__(
+            "chart repository", partial(_RequestHandler, directory=str(directory)), host, bind_address, port
+        )
+        self.directory = directory
+        self.charts: List[ChartPackage] = []
+
+    def add_chart(self, package: ChartPackage) -> None:
+        """Serve the `package` from the repository and add it to its `index.yaml`."""
+        shutil.copyfile(package.path, self.directory / package.path.name)
+        self.charts.append(package)
+        with open(self.directory / INDEX_FILE_NAME, "w") as f:
+            yaml.safe_dump(make_index(self.charts, self.url), f)
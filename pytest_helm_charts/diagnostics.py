@@ -0,0 +1,248 @@
+"""This module collects diagnostics of failed tests and waits: Events, statuses and logs of Pods and statuses
+of App and Flux CRs in the namespaces the test used.
+
+Artifacts are fetched concurrently and written to a directory per test before the test's teardown deletes
+the namespaces. Collection is enabled with `--helm-charts-diagnostics-dir`.
+"""
+
+import importlib
+import json
+import logging
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterable, List, Optional, Set, Tuple
+
+from pytest_helm_charts.timing import recorder as timing_recorder
+
+if TYPE_CHECKING:
+    from pykube import HTTPClient
+
+logger = logging.getLogger(__name__)
+
+DIAGNOSTICS_MAX_WORKERS = 8
+DIAGNOSTICS_MAX_FILE_BYTES = 1024 * 1024
+DIAGNOSTICS_LOG_TAIL_LINES = 1000
+DIAGNOSTICS_LOG_MAX_BYTES = 256 * 1024
+DIAGNOSTICS_MAX_CONTAINER_LOGS = 30
+DIAGNOSTICS_MAX_EVENTS = 500
+# (module, class) of custom resources whose status is collected, if they exist in the cluster; the modules
+# are imported only when diagnostics are collected
+DIAGNOSTICS_CUSTOM_RESOURCES = [
+    ("pytest_helm_charts.giantswarm_app_platform.app", "AppCR"),
+    ("pytest_helm_charts.flux.helm_release", "HelmReleaseCR"),
+    ("pytest_helm_charts.flux.kustomization", "KustomizationCR"),
+    ("pytest_helm_charts.flux.git_repository", "GitRepositoryCR"),
+    ("pytest_helm_charts.flux.helm_repository", "HelmRepositoryCR"),
+]
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_")[:200] or "unknown"
+
+
+class DiagnosticsCollector:
+    """Collects diagnostics of namespaces into a directory per test.
+
+    Each namespace is collected at most once per test, so a wait failing inside a test and the test failure
+    itself don't fetch the same artifacts twice. Requests are sent by a pool of at most `max_workers` threads
+    and each written file is limited to `max_file_bytes`.
+    """
+
+    def __init__(
+        self,
+        base_dir: Path,
+        max_workers: int = DIAGNOSTICS_MAX_WORKERS,
+        max_file_bytes: int = DIAGNOSTICS_MAX_FILE_BYTES,
+    ) -> None:
+        self.base_dir = base_dir
+        self.max_workers = max_workers
+        self.max_file_bytes = max_file_bytes
+        self._collected: Set[Tuple[str, str]] = set()
+
+    def test_dir(self, node_id: Optional[str]) -> Path:
+        """Return the directory of the artifacts of the test `node_id`."""
+        return self.base_dir / _safe_name(node_id or "session")
+
+    def collect(
+        self, kube_client: "HTTPClient", namespaces: Iterable[str], reason: str, node_id: Optional[str] = None
+    ) -> Optional[Path]:
+        """
+        Collect diagnostics of the `namespaces` that were not collected for the test `node_id` yet.
+        Errors are logged and written to the artifacts, they are never raised.
+
+        Args:
+            kube_client: client to use to connect to the k8s cluster
+            namespaces: namespaces to collect diagnostics of
+            reason: why diagnostics are collected; appended to `reason.txt` in the test's directory
+            node_id: ID of the test; the test running now if `None`
+
+        Returns:
+            The test's directory or `None` if there was nothing new to collect.
+        """
+        node_id = node_id or timing_recorder.current_node_id
+        new_namespaces = sorted({ns for ns in namespaces if ns and (node_id or "", ns) not in self._collected})
+        if not new_namespaces:
+            return None
+        self._collected.update((node_id or "", ns) for ns in new_namespaces)
+        test_dir = self.test_dir(node_id)
+        test_dir.mkdir(parents=True, exist_ok=True)
+        with open(test_dir / "reason.txt", "a") as f:
+            f.write(f"{reason} (namespaces: {', '.join(new_namespaces)})\n")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures: List[Future] = []
+            for namespace in new_namespaces:
+                futures.extend(self._submit_namespace(pool, kube_client, namespace, test_dir / _safe_name(namespace)))
+            # log tasks are submitted by the pod tasks, so the list grows while it's iterated
+            for future in futures:
+                futures.extend(future.result() or [])
+        logger.info(f"Diagnostics of namespaces {new_namespaces} written to '{test_dir}'.")
+        return test_dir
+
+    def _submit_namespace(
+        self, pool: ThreadPoolExecutor, kube_client: "HTTPClient", namespace: str, ns_dir: Path
+    ) -> List[Future]:
+        (ns_dir / "logs").mkdir(parents=True, exist_ok=True)
+        tasks: List[Tuple[str, Callable[[], Any]]] = [
+            ("events.txt", lambda: self._collect_events(kube_client, namespace, ns_dir)),
+            ("pods.json", lambda: self._collect_pods(pool, kube_client, namespace, ns_dir)),
+        ]
+        for module_name, class_name in DIAGNOSTICS_CUSTOM_RESOURCES:
+            tasks.append(
+                (class_name, self._bind_custom_resources(kube_client, namespace, ns_dir, module_name, class_name))
+            )
+        return [pool.submit(self._guarded, ns_dir, name, func) for name, func in tasks]
+
+    def _bind_custom_resources(
+        self, kube_client: "HTTPClient", namespace: str, ns_dir: Path, module_name: str, class_name: str
+    ) -> Callable[[], None]:
+        return lambda: self._collect_custom_resources(kube_client, namespace, ns_dir, module_name, class_name)
+
+    def _guarded(self, ns_dir: Path, artifact: str, func: Callable[[], Any]) -> Any:
+        try:
+            return func()
+        except Exception as e:
+            # missing CRDs end up here as well, so it's not worth more than a line in the artifacts
+            with open(ns_dir / "errors.txt", "a") as f:
+                f.write(f"{artifact}: {type(e).__name__}: {e}\n")
+            return None
+
+    def _write(self, path: Path, content: str) -> None:
+        data = content.encode(errors="replace")
+        if len(data) > self.max_file_bytes:
+            data = data[: self.max_file_bytes] + b"\n... truncated ...\n"
+        path.write_bytes(data)
+
+    def _collect_events(self, kube_client: "HTTPClient", namespace: str, ns_dir: Path) -> None:
+        import pykube
+
+        events = [e.obj for e in pykube.Event.objects(kube_client).filter(namespace=namespace)]
+        events.sort(key=lambda e: e.get("lastTimestamp") or e.get("eventTime") or "")
+        lines = [
+            f"{e.get('lastTimestamp') or e.get('eventTime')} {e.get('type')} {e.get('reason')} "
+            f"{e.get('involvedObject', {}).get('kind')}/{e.get('involvedObject', {}).get('name')}"
+            f" (x{e.get('count', 1)}): {e.get('message', '').strip()}"
+            for e in events[-DIAGNOSTICS_MAX_EVENTS:]
+        ]
+        self._write(ns_dir / "events.txt", "\n".join(lines) + "\n")
+
+    def _collect_pods(
+        self, pool: ThreadPoolExecutor, kube_client: "HTTPClient", namespace: str, ns_dir: Path
+    ) -> List[Future]:
+        import pykube
+
+        pods = list(pykube.Pod.objects(kube_client).filter(namespace=namespace))
+        statuses = [{"name": p.name, "labels": p.labels, "status": p.obj.get("status", {})} for p in pods]
+        self._write(ns_dir / "pods.json", json.dumps(statuses, indent=2, default=str))
+        log_futures: List[Future] = []
+        for pod in pods:
+            status = pod.obj.get("status", {})
+            for container in status.get("initContainerStatuses", []) + status.get("containerStatuses", []):
+                if len(log_futures) >= DIAGNOSTICS_MAX_CONTAINER_LOGS:
+                    return log_futures
+                name = f"{pod.name}.{container['name']}"
+                log_futures.append(
+                    pool.submit(self._guarded, ns_dir, name, self._bind_logs(pod, container, ns_dir / "logs", name))
+                )
+        return log_futures
+
+    def _bind_logs(self, pod: Any, container: dict, logs_dir: Path, name: str) -> Callable[[], None]:
+        def _collect_logs() -> None:
+            log = pod.logs(
+                container=container["name"],
+                tail_lines=DIAGNOSTICS_LOG_TAIL_LINES,
+                limit_bytes=DIAGNOSTICS_LOG_MAX_BYTES,
+            )
+            self._write(logs_dir / f"{_safe_name(name)}.log", log)
+            # logs of the crashed container are the interesting ones when it's restarting
+            if container.get("restartCount", 0) > 0:
+                previous = pod.logs(
+                    container=container["name"],
+                    previous=True,
+                    tail_lines=DIAGNOSTICS_LOG_TAIL_LINES,
+                    limit_bytes=DIAGNOSTICS_LOG_MAX_BYTES,
+                )
+                self._write(logs_dir / f"{_safe_name(name)}.previous.log", previous)
+
+        return _collect_logs
+
+    def _collect_custom_resources(
+        self, kube_client: "HTTPClient", namespace: str, ns_dir: Path, module_name: str, class_name: str
+    ) -> None:
+        cr_type = getattr(importlib.import_module(module_name), class_name)
+        objects = [
+            {"name": o.name, "spec": o.obj.get("spec", {}), "status": o.obj.get("status", {})}
+            for o in cr_type.objects(kube_client).filter(namespace=namespace)
+        ]
+        if objects:
+            self._write(ns_dir / f"{cr_type.kind}.json", json.dumps(objects, indent=2, default=str))
+
+
+collector: Optional[DiagnosticsCollector] = None
+
+
+def enable_diagnostics(base_dir: Path) -> DiagnosticsCollector:
+    """Start collecting diagnostics of failed waits and tests into `base_dir`."""
+    global collector
+    collector = DiagnosticsCollector(base_dir)
+    return collector
+
+
+def disable_diagnostics() -> None:
+    """Stop collecting diagnostics."""
+    global collector
+    collector = None
+
+
+def collect_diagnostics(kube_client: "HTTPClient", namespaces: Iterable[str], reason: str) -> Optional[Path]:
+    """
+    Collect diagnostics of the `namespaces` for the test running now, if diagnostics are enabled. Called
+    automatically when a wait or a test using `kube_cluster` fails.
+
+    Returns:
+        The directory with the test's artifacts or `None` if nothing was collected.
+    """
+    if collector is None:
+        return None
+    try:
+        return collector.collect(kube_client, namespaces, reason)
+    except Exception as e:
+        logger.warning(f"Collecting diagnostics failed: {e}")
+        return None
+
+
+def used_namespaces(node_id: str) -> Set[str]:
+    """Return namespaces of the objects created, waited for or deleted by the tests in the same module
+    as the test `node_id` (including its module scoped fixtures), and the namespaces they created."""
+    module_prefix = node_id.split("::")[0] + "::"
+    namespaces: Set[str] = set()
+    for span in timing_recorder.spans:
+        if span.node_id is None or not span.node_id.startswith(module_prefix):
+            continue
+        # spans of operations on many objects have their namespaces and names joined with commas
+        if span.namespace:
+            namespaces.update(span.namespace.split(","))
+        if span.kind == "Namespace":
+            namespaces.update(span.name.split(","))
+    namespaces.discard("")
+    return namespaces
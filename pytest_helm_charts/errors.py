@@ -1,3 +1,6 @@
+from typing import Any
+
+
 class WaitTimeoutError(Exception):
     def __init__(self, msg: str):
         self.msg = msg
@@ -6,3 +9,14 @@ class WaitTimeoutError(Exception):
 class ObjectStatusError(Exception):
     def __init__(self, msg: str):
         self.msg = msg
+
+
+class AppVersionNotFoundError(Exception):
+    def __init__(self, msg: str):
+        self.msg = msg
+
+
+class PodFailureError(ObjectStatusError):
+    def __init__(self, msg: str, failure: Any):
+        super().__init__(msg)
+        self.failure = failure
@@ -0,0 +1,58 @@
+"""This module keeps a registry of functions detecting objects that failed in a way they can't recover from
+on their own, so functions waiting for the objects can fail fast instead of waiting until their timeout.
+
+Modules defining waiters register failure conditions for the kinds they wait on when they are imported.
+Waiters use the registered condition if their `fail_fast` argument is `True` or, when it's `None`,
+if fail fast is enabled for the whole session (it is, unless pytest is run with `--helm-charts-no-fail-fast`).
+"""
+
+from typing import Any, Callable, Dict, Optional
+
+FailureConditionFunc = Callable[[Any], bool]
+
+_failure_conditions: Dict[str, FailureConditionFunc] = {}
+_fail_fast_enabled = True
+
+
+def register_failure_condition(kind: str, func: FailureConditionFunc) -> None:
+    """
+    Register the function detecting terminal failures of objects of the `kind`, replacing the one
+    already registered.
+
+    Args:
+        kind: kind of the objects, like 'Deployment'
+        func: function called with the object, returning `True` if the object failed
+    """
+    _failure_conditions[kind] = func
+
+
+def get_failure_condition(kind: str) -> Optional[FailureConditionFunc]:
+    """Return the failure condition registered for the `kind` or `None` if there's none."""
+    return _failure_conditions.get(kind)
+
+
+def set_fail_fast_enabled(enabled: bool) -> None:
+    """Enable or disable fail fast for all the waiters called without an explicit `fail_fast` argument."""
+    global _fail_fast_enabled
+    _fail_fast_enabled = enabled
+
+
+def is_fail_fast_enabled() -> bool:
+    """Return `True` if waiters called without an explicit `fail_fast` argument fail fast."""
+    return _fail_fast_enabled
+
+
+def failure_condition_for(kind: str, fail_fast: Optional[bool] = None) -> Optional[FailureConditionFunc]:
+    """
+    Return the failure condition a waiter of objects of the `kind` should use.
+
+    Args:
+        kind: kind of the objects
+        fail_fast: `fail_fast` argument of the waiter; `None` means the session's default
+
+    Returns:
+        The registered failure condition or `None` if fail fast is disabled or there's no condition for the `kind`.
+    """
+    if fail_fast is None:
+        fail_fast = _fail_fast_enabled
+    return get_failure_condition(kind) if fail_fast else None
@@ -3,31 +3,33 @@
 import logging
 import os
 import sys
+from pathlib import Path
 from typing import Iterable, Dict, Mapping
 
 import pytest
 from _pytest.config import Config
+from _pytest.tmpdir import TempPathFactory
 
+from pytest_helm_charts.api_calls import install_api_call_counter
+from pytest_helm_charts.chart_repository import CHART_PACKAGES_CACHE_DIR_NAME, ChartRepositoryServer, package_chart
 from pytest_helm_charts.clusters import ExistingCluster, Cluster
+from pytest_helm_charts.git_server import GIT_REPOSITORIES_CACHE_DIR_NAME, GitServer
+from pytest_helm_charts.options import (  # noqa: F401
+    ENV_VAR_CHART_PATH,
+    ENV_VAR_CHART_VERSION,
+    ENV_VAR_CLUSTER_TYPE,
+    ENV_VAR_CLUSTER_VERSION,
+    ENV_VAR_APP_CONFIG_PATH,
+    ENV_VAR_KUBE_CONFIG,
+    ENV_VAR_ATS_EXTRA_PREFIX,
+    CMD_VAR_TEST_EXTRA_INFO,
+    CMD_OPT_CHART_REPOSITORY_HOST,
+    CMD_OPT_GIT_REPOSITORY_DIR,
+    get_cmd_line_option_name_from_env_var,
+)
 
 logger = logging.getLogger(__name__)
 
-ENV_VAR_CHART_PATH = "ATS_CHART_PATH"
-ENV_VAR_CHART_VERSION = "ATS_CHART_VERSION"
-ENV_VAR_CLUSTER_TYPE = "ATS_CLUSTER_TYPE"
-ENV_VAR_CLUSTER_VERSION = "ATS_CLUSTER_VERSION"
-ENV_VAR_APP_CONFIG_PATH = "ATS_APP_CONFIG_FILE_PATH"
-ENV_VAR_KUBE_CONFIG = "KUBECONFIG"
-ENV_VAR_ATS_EXTRA_PREFIX = "ATS_EXTRA_"
-CMD_VAR_TEST_EXTRA_INFO = "test_extra_info"
-
-
-def get_cmd_line_option_name_from_env_var(env_var_name: str) -> str:
-    cmd_name = env_var_name.lower()
-    if cmd_name.startswith("ats_"):
-        cmd_name = cmd_name[4:]
-    return cmd_name
-
 
 def _load_mandatory_config_option(pytestconfig: Config, env_var_name: str) -> str:
     cmd_name = get_cmd_line_option_name_from_env_var(env_var_name)
@@ -77,6 +79,46 @@ def chart_version(pytestconfig: Config) -> str:
     return _load_optional_config_option(pytestconfig, ENV_VAR_CHART_VERSION)
 
 
+def _cache_dir(pytestconfig: Config, tmp_path_factory: TempPathFactory, name: str) -> Path:
+    cache = getattr(pytestconfig, "cache", None)
+    if cache is not None:
+        return cache.mkdir(name)
+    return tmp_path_factory.mktemp(name, numbered=False)
+
+
+@pytest.fixture(scope="session")
+def chart_repository(pytestconfig: Config, tmp_path_factory: TempPathFactory) -> Iterable[ChartRepositoryServer]:
+    """Return a [ChartRepositoryServer](pytest_helm_charts.chart_repository.ChartRepositoryServer) serving
+    the chart under test (with its version overridden by the chart version option, if set) from the test process.
+    Packages are cached in the pytest cache directory, so an unchanged chart is packaged only once.
+    Fixture's scope is 'session'."""
+    chart_dir = Path(_load_mandatory_config_option(pytestconfig, ENV_VAR_CHART_PATH))
+    version = _load_optional_config_option(pytestconfig, ENV_VAR_CHART_VERSION)
+    package = package_chart(
+        chart_dir, _cache_dir(pytestconfig, tmp_path_factory, CHART_PACKAGES_CACHE_DIR_NAME), version or None
+    )
+    host = pytestconfig.getoption(CMD_OPT_CHART_REPOSITORY_HOST.replace("-", "_"), None)
+    with ChartRepositoryServer(tmp_path_factory.mktemp("chart-repository"), host) as server:
+        server.add_chart(package)
+        yield server
+
+
+@pytest.fixture(scope="session")
+def git_server(pytestconfig: Config, tmp_path_factory: TempPathFactory) -> Iterable[GitServer]:
+    """Return a [GitServer](pytest_helm_charts.git_server.GitServer) serving the directory set with
+    `--helm-charts-git-repository-dir` (or the chart under test) as a Git repository from the test process.
+    Repositories are cached in the pytest cache directory, so an unchanged directory is committed only once.
+    Fixture's scope is 'session'."""
+    source_dir = pytestconfig.getoption(CMD_OPT_GIT_REPOSITORY_DIR.replace("-", "_"), None) or (
+        _load_optional_config_option(pytestconfig, ENV_VAR_CHART_PATH)
+    )
+    host = pytestconfig.getoption(CMD_OPT_CHART_REPOSITORY_HOST.replace("-", "_"), None)
+    with GitServer(_cache_dir(pytestconfig, tmp_path_factory, GIT_REPOSITORIES_CACHE_DIR_NAME), host) as server:
+        if source_dir:
+            server.add_directory(Path(source_dir))
+        yield server
+
+
 @pytest.fixture(scope="module")
 def cluster_type(pytestconfig: Config) -> str:
     """Return a type of cluster used for testing (from command line argument)."""
@@ -124,7 +166,8 @@ def kube_cluster(
     on the '--cluster-type' command line option."""
     cluster = ExistingCluster(kube_config)
 
-    cluster.create()
+    kube_client = cluster.create()
+    install_api_call_counter(kube_client)
     logger.debug("Cluster connection configured")
     yield cluster
 
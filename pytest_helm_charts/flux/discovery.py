@@ -0,0 +1,200 @@
+"""This module discovers Flux installed in the cluster: which controllers run, their versions and the versions
+of Flux CRDs. Controllers are found with a single label-selected LIST request, so the discovery is cheap
+and doesn't depend on optional controllers being installed."""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import pykube
+import pytest
+from pykube import HTTPClient
+
+from pytest_helm_charts.k8s.deployment import deployment_running
+from pytest_helm_charts.timing import timed
+
+logger = logging.getLogger(__name__)
+
+FLUX_PART_OF_LABEL = "app.kubernetes.io/part-of"
+FLUX_PART_OF_VALUE = "flux"
+FLUX_COMPONENT_LABEL = "app.kubernetes.io/component"
+FLUX_VERSION_LABEL = "app.kubernetes.io/version"
+FLUX_DISCOVERY_TIMEOUT_SEC = 180
+# controllers the Flux fixtures need, waited for until they run
+FLUX_REQUIRED_CONTROLLERS = ("helm-controller", "kustomize-controller", "notification-controller", "source-controller")
+# controllers that may be missing; tests needing them are skipped if they are
+FLUX_OPTIONAL_CONTROLLERS = ("image-automation-controller", "image-reflector-controller")
+# namespace searched by names of the controllers if they don't have the `app.kubernetes.io/part-of=flux` label
+FLUX_FALLBACK_NAMESPACE = "default"
+
+
+def _image_version(image: str) -> Optional[str]:
+    image = image.split("@")[0]
+    name, _, tag = image.rpartition(":")
+    return tag if name and "/" not in tag else None
+
+
+@dataclass
+class FluxController:
+    """Class that represents a running Flux controller and the version of its image."""
+
+    name: str
+    namespace: str
+    image: str
+    version: Optional[str]
+    deployment: pykube.Deployment = field(repr=False)
+
+
+@dataclass
+class FluxInstallation:
+    """Class that represents Flux installed in the cluster."""
+
+    version: Optional[str]
+    controllers: Dict[str, FluxController]
+    crd_versions: Dict[str, str]
+
+    @property
+    def deployments(self) -> List[pykube.Deployment]:
+        """Deployments of all the installed controllers."""
+        return [c.deployment for c in self.controllers.values()]
+
+    def require_controllers(self, *names: str) -> None:
+        """Skip the current test if any of the controllers in `names` isn't installed."""
+        missing = [n for n in names if n not in self.controllers]
+        if missing:
+            pytest.skip(f"Flux controllers {missing} are not installed.")
+
+
+def _list_flux_deployments(kube_client: HTTPClient) -> List[pykube.Deployment]:
+    try:
+        deployments = list(
+            pykube.Deployment.objects(kube_client).filter(
+                namespace=pykube.all, selector={FLUX_PART_OF_LABEL: FLUX_PART_OF_VALUE}
+            )
+        )
+    except pykube.exceptions.HTTPError as e:
+        if e.code != 403:
+            raise
+        # accounts scoped to a single namespace can't list Deployments in all of them
+        logger.debug(f"Not allowed to list Deployments in all namespaces, using '{FLUX_FALLBACK_NAMESPACE}'.")
+        deployments = []
+    if deployments:
+        return deployments
+    known = set(FLUX_REQUIRED_CONTROLLERS + FLUX_OPTIONAL_CONTROLLERS)
+    return [
+        d for d in pykube.Deployment.objects(kube_client).filter(namespace=FLUX_FALLBACK_NAMESPACE) if d.name in known
+    ]
+
+
+def _make_controller(deployment: pykube.Deployment) -> FluxController:
+    containers = deployment.obj["spec"]["template"]["spec"].get("containers") or [{}]
+    image = containers[0].get("image", "")
+    name = deployment.labels.get(FLUX_COMPONENT_LABEL, deployment.name)
+    return FluxController(name, deployment.namespace, image, _image_version(image), deployment)
+
+
+def _crd_versions(kube_client: HTTPClient) -> Dict[str, str]:
+    crd_versions: Dict[str, str] = {}
+    try:
+        crds = list(
+            pykube.CustomResourceDefinition.objects(kube_client).filter(
+                selector={FLUX_PART_OF_LABEL: FLUX_PART_OF_VALUE}
+            )
+        )
+    except pykube.exceptions.HTTPError as e:
+        if e.code != 403:
+            raise
+        # CRD versions are informational only; namespace-scoped test accounts often can't list CRDs
+        logger.warning("Not allowed to list CustomResourceDefinitions, versions of Flux CRDs are unknown.")
+        return crd_versions
+    for crd in crds:
+        storage = [v["name"] for v in crd.obj["spec"].get("versions", []) if v.get("storage")]
+        if storage:
+            crd_versions[crd.obj["spec"]["names"]["kind"]] = storage[0]
+    return crd_versions
+
+
+def discover_flux(
+    kube_client: HTTPClient,
+    timeout_sec: int = FLUX_DISCOVERY_TIMEOUT_SEC,
+    required_controllers: Sequence[str] = FLUX_REQUIRED_CONTROLLERS,
+) -> FluxInstallation:
+    """
+    Find the installed Flux controllers and block until all of them run.
+
+    Each round of checks lists Deployments labeled `app.kubernetes.io/part-of=flux` in all the namespaces
+    with a single request. Installations without the label are found by controller names in
+    [FLUX_FALLBACK_NAMESPACE](FLUX_FALLBACK_NAMESPACE).
+
+    Args:
+        kube_client: client to use to connect to the k8s cluster
+        timeout_sec: timeout for the call
+        required_controllers: controllers that have to be installed; others are waited for only if they are
+
+    Returns:
+        The discovered [FluxInstallation](FluxInstallation), with versions of the controllers taken from tags
+        of their images and storage versions of Flux CRDs by their kinds. CRD versions are empty if the client
+        isn't allowed to list CRDs.
+
+    Raises:
+        TimeoutError: when any of the `required_controllers` is missing or any of the installed controllers
+            doesn't run when the timeout is reached.
+    """
+    missing: List[str] = list(required_controllers)
+    not_running: List[str] = []
+    deployments: List[pykube.Deployment] = []
+    with timed("discover", "Flux", None, ",".join(required_controllers)):
+        for _ in range(timeout_sec):
+            deployments = _list_flux_deployments(kube_client)
+            names = {d.labels.get(FLUX_COMPONENT_LABEL, d.name) for d in deployments}
+            missing = [c for c in required_controllers if c not in names]
+            not_running = [f"{d.namespace}/{d.name}" for d in deployments if not deployment_running(d)]
+            if not missing and not not_running:
+                break
+            time.sleep(1)
+        else:
+            raise TimeoutError(
+                f"Error waiting for Flux controllers to run; missing: {missing}, not running: {not_running}."
+            )
+        controllers = {c.name: c for c in (_make_controller(d) for d in deployments)}
+        versions = {d.labels.get(FLUX_VERSION_LABEL) for d in deployments} - {None}
+        installation = FluxInstallation(
+            versions.pop() if len(versions) == 1 else None, controllers, _crd_versions(kube_client)
+        )
+    logger.info(
+        f"Discovered Flux {installation.version or '(unknown version)'} with controllers: "
+        + ", ".join(f"{c.name} {c.version}" for c in controllers.values())
+    )
+    return installation
+
+
+class FluxDiscoveryCache:
+    """Keeps the [FluxInstallation](FluxInstallation) discovered in each cluster, so Flux is discovered
+    (and waited for) only once per session. A failed discovery is kept too, so tests that come after it
+    fail right away instead of waiting for the timeout again."""
+
+    def __init__(self) -> None:
+        self._installations: Dict[str, FluxInstallation] = {}
+        self._errors: Dict[str, Exception] = {}
+        self._lock = threading.Lock()
+
+    def get(self, kube_client: HTTPClient, timeout_sec: int = FLUX_DISCOVERY_TIMEOUT_SEC) -> FluxInstallation:
+        """
+        Return the Flux installation of the cluster `kube_client` connects to, discovering it if needed.
+
+        Raises:
+            Exception: the error of the discovery, also when it failed in an earlier call.
+        """
+        with self._lock:
+            key = str(kube_client.url)
+            if key in self._errors:
+                raise self._errors[key]
+            if key not in self._installations:
+                try:
+                    self._installations[key] = discover_flux(kube_client, timeout_sec)
+                except Exception as e:
+                    self._errors[key] = e
+                    raise
+            return self._installations[key]
@@ -1,55 +1,81 @@
-from typing import Iterable, List
+from typing import Dict, Iterable, List, Type
 
 import pykube
 import pytest
 
-from pytest_helm_charts.k8s.deployment import wait_for_deployments_to_run
+from pytest_helm_charts.chart_repository import ChartRepositoryServer
 from pytest_helm_charts.k8s.fixtures import NamespaceFactoryFunc
 from pytest_helm_charts.clusters import Cluster
+from pytest_helm_charts.git_server import GitServer
+from pytest_helm_charts.flux.discovery import FluxDiscoveryCache, FluxInstallation
 from pytest_helm_charts.flux.git_repository import (
     GitRepositoryCR,
     GitRepositoryFactoryFunc,
     git_repository_factory_func,
 )
-from pytest_helm_charts.flux.helm_release import HelmReleaseCR, HelmReleaseFactoryFunc, helm_release_factory_func
+from pytest_helm_charts.flux.helm_release import (
+    HelmReleaseCR,
+    HelmReleaseFactoryFunc,
+    HelmReleaseGraphFactoryFunc,
+    helm_release_factory_func,
+    helm_release_graph_factory_func,
+)
 from pytest_helm_charts.flux.helm_repository import (
     HelmRepositoryCR,
     HelmRepositoryFactoryFunc,
     helm_repository_factory_func,
 )
 from pytest_helm_charts.flux.kustomization import KustomizationCR, KustomizationFactoryFunc, kustomization_factory_func
+from pytest_helm_charts.flux.suspend import FluxSuspendFunc, flux_suspend_func, resume_flux_objects
+from pytest_helm_charts.flux.utils import NamespacedFluxCR
+from pytest_helm_charts.parallel import worker_unique_name
 from pytest_helm_charts.utils import delete_and_wait_for_objects
 
 FLUX_NAMESPACE_NAME = "default"
 FLUX_DEPLOYMENTS_READY_TIMEOUT: int = 180
+CHART_REPOSITORY_NAME = "chart-repository"
+LOCAL_GIT_REPOSITORY_NAME = "local-git-repository"
+
+
+@pytest.fixture(scope="session")
+def flux_discovery_cache() -> FluxDiscoveryCache:
+    """Returns the [FluxDiscoveryCache](pytest_helm_charts.flux.discovery.FluxDiscoveryCache) used to discover
+    Flux only once per session. Fixture's scope is 'session'."""
+    return FluxDiscoveryCache()
 
 
 @pytest.fixture(scope="module")
-def flux_deployments(kube_cluster: Cluster) -> List[pykube.Deployment]:
+def flux_installation(kube_cluster: Cluster, flux_discovery_cache: FluxDiscoveryCache) -> FluxInstallation:
     """
-    Waits (blocks) until all the Deployments used to deploy Flux itself run
-    (a.k.a. "wait for Flux to be ready for use").
+    Waits (blocks) until all the installed Flux controllers run, the first time it's used in a session,
+    and returns the discovered installation with versions of the controllers and the CRDs.
+
+    Tests that need an optional controller, like `image-automation-controller`, should call
+    `flux_installation.require_controllers(...)`, which skips them if the controller isn't installed.
 
     Args:
         kube_cluster: Cluster to use to connect to the k8s cluster
+        flux_discovery_cache: cache of the discovered installation
+
+    Returns: The discovered [FluxInstallation](pytest_helm_charts.flux.discovery.FluxInstallation).
+
+    """
+    return flux_discovery_cache.get(kube_cluster.kube_client, FLUX_DEPLOYMENTS_READY_TIMEOUT)
+
+
+@pytest.fixture(scope="module")
+def flux_deployments(flux_installation: FluxInstallation) -> List[pykube.Deployment]:
+    """
+    Waits (blocks) until all the Deployments used to deploy Flux itself run
+    (a.k.a. "wait for Flux to be ready for use"). Optional controllers that aren't installed are not waited for.
+
+    Args:
+        flux_installation: Flux discovered in the cluster
 
     Returns: A List of `pykube.Deployment` objects used by Flux itself.
 
     """
-    deployments = wait_for_deployments_to_run(
-        kube_cluster.kube_client,
-        [
-            "helm-controller",
-            "image-automation-controller",
-            "image-reflector-controller",
-            "kustomize-controller",
-            "notification-controller",
-            "source-controller",
-        ],
-        FLUX_NAMESPACE_NAME,
-        FLUX_DEPLOYMENTS_READY_TIMEOUT,
-    )
-    return deployments
+    return flux_installation.deployments
 
 
 @pytest.fixture(scope="function")
@@ -106,6 +132,23 @@ def _git_repository_factory_impl(
     delete_and_wait_for_objects(kube_cluster.kube_client, GitRepositoryCR, created_objects)
 
 
+@pytest.fixture(scope="module")
+def local_git_repository(git_repository_factory: GitRepositoryFactoryFunc, git_server: GitServer) -> GitRepositoryCR:
+    """Returns a [Git Repository](https://fluxcd.io/docs/components/source/gitrepositories/) in the
+    Flux namespace pointing to the directory served by the [git_server](pytest_helm_charts.fixtures.git_server),
+    so Kustomizations can be tested without a remote Git server. Fixture's scope is 'module'."""
+    if not git_server.repositories:
+        raise ValueError("'git_server' serves no repositories; set '--helm-charts-git-repository-dir' or a chart path.")
+    snapshot = git_server.repositories[0]
+    return git_repository_factory(
+        worker_unique_name(LOCAL_GIT_REPOSITORY_NAME),
+        FLUX_NAMESPACE_NAME,
+        "10m",
+        git_server.url_for(snapshot),
+        snapshot.branch,
+    )
+
+
 @pytest.fixture(scope="function")
 def helm_repository_factory_function_scope(
     kube_cluster: Cluster, namespace_factory: NamespaceFactoryFunc
@@ -132,6 +175,18 @@ def _helm_repository_factory_impl(
     delete_and_wait_for_objects(kube_cluster.kube_client, HelmRepositoryCR, created_objects)
 
 
+@pytest.fixture(scope="module")
+def chart_helm_repository(
+    helm_repository_factory: HelmRepositoryFactoryFunc, chart_repository: ChartRepositoryServer
+) -> HelmRepositoryCR:
+    """Returns a [Helm Repository](https://fluxcd.io/docs/components/source/helmrepositories/) in the
+    Flux namespace pointing to the [chart_repository](pytest_helm_charts.fixtures.chart_repository),
+    so HelmReleases can install the chart under test from it. Fixture's scope is 'module'."""
+    return helm_repository_factory(
+        worker_unique_name(CHART_REPOSITORY_NAME), FLUX_NAMESPACE_NAME, "10m", chart_repository.url
+    )
+
+
 @pytest.fixture(scope="function")
 def helm_release_factory_function_scope(
     kube_cluster: Cluster, namespace_factory: NamespaceFactoryFunc
@@ -156,3 +211,64 @@ def _helm_release_factory_impl(
     yield helm_release_factory_func(kube_cluster.kube_client, namespace_factory, created_objects)
 
     delete_and_wait_for_objects(kube_cluster.kube_client, HelmReleaseCR, created_objects)
+
+
+@pytest.fixture(scope="function")
+def helm_release_graph_factory_function_scope(
+    kube_cluster: Cluster, namespace_factory: NamespaceFactoryFunc
+) -> Iterable[HelmReleaseGraphFactoryFunc]:
+    """Returns function-scoped factory deploying graphs of dependent
+    [Helm Releases](https://fluxcd.io/docs/components/helm/helmreleases/) and their sources at once."""
+    yield from _helm_release_graph_factory_impl(kube_cluster, namespace_factory)
+
+
+@pytest.fixture(scope="module")
+def helm_release_graph_factory(
+    kube_cluster: Cluster, namespace_factory: NamespaceFactoryFunc
+) -> Iterable[HelmReleaseGraphFactoryFunc]:
+    """Returns module-scoped factory deploying graphs of dependent
+    [Helm Releases](https://fluxcd.io/docs/components/helm/helmreleases/) and their sources at once."""
+    yield from _helm_release_graph_factory_impl(kube_cluster, namespace_factory)
+
+
+def _helm_release_graph_factory_impl(
+    kube_cluster: Cluster, namespace_factory: NamespaceFactoryFunc
+) -> Iterable[HelmReleaseGraphFactoryFunc]:
+    created_helm_releases: List[HelmReleaseCR] = []
+    created_sources: List[NamespacedFluxCR] = []
+
+    yield helm_release_graph_factory_func(
+        kube_cluster.kube_client, namespace_factory, created_helm_releases, created_sources
+    )
+
+    # HelmReleases are deleted first, so helm-controller can still uninstall them using their sources
+    delete_and_wait_for_objects(kube_cluster.kube_client, HelmReleaseCR, created_helm_releases)
+    sources_by_type: Dict[Type[NamespacedFluxCR], List[NamespacedFluxCR]] = {}
+    for source in created_sources:
+        sources_by_type.setdefault(type(source), []).append(source)
+    for source_type, sources in sources_by_type.items():
+        delete_and_wait_for_objects(kube_cluster.kube_client, source_type, sources)
+
+
+@pytest.fixture(scope="function")
+def flux_suspender_function_scope(kube_cluster: Cluster) -> Iterable[FluxSuspendFunc]:
+    """Returns a function suspending Flux objects (see
+    [suspend_flux_objects](pytest_helm_charts.flux.suspend.suspend_flux_objects)) until the end of the test.
+    They are resumed even if the test fails."""
+    yield from _flux_suspender_impl(kube_cluster)
+
+
+@pytest.fixture(scope="module")
+def flux_suspender(kube_cluster: Cluster) -> Iterable[FluxSuspendFunc]:
+    """Returns a function suspending Flux objects (see
+    [suspend_flux_objects](pytest_helm_charts.flux.suspend.suspend_flux_objects)) until the end of the module.
+    They are resumed even if tests fail."""
+    yield from _flux_suspender_impl(kube_cluster)
+
+
+def _flux_suspender_impl(kube_cluster: Cluster) -> Iterable[FluxSuspendFunc]:
+    suspended_objects: List[NamespacedFluxCR] = []
+
+    yield flux_suspend_func(kube_cluster.kube_client, suspended_objects)
+
+    resume_flux_objects(suspended_objects)
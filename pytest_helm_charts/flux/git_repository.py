@@ -4,7 +4,9 @@ from typing import Protocol, Optional, Any, List, Dict
 from pykube import HTTPClient
 
 from pytest_helm_charts.k8s.fixtures import NamespaceFactoryFunc
-from pytest_helm_charts.flux.utils import NamespacedFluxCR, flux_cr_ready
+from pytest_helm_charts.failures import failure_condition_for, register_failure_condition
+from pytest_helm_charts.flux.utils import NamespacedFluxCR, flux_cr_failed, flux_cr_ready, reconcile_flux_objects
+from pytest_helm_charts.timing import timed
 from pytest_helm_charts.utils import wait_for_objects_condition, inject_extra
 
 
@@ -17,6 +19,9 @@ class GitRepositoryCR(NamespacedFluxCR):
     kind = "GitRepository"
 
 
+register_failure_condition(GitRepositoryCR.kind, flux_cr_failed)
+
+
 class GitRepositoryFactoryFunc(Protocol):
     def __call__(
         self,
@@ -30,6 +35,7 @@ class GitRepositoryFactoryFunc(Protocol):
         extra_metadata: Optional[dict] = None,
         extra_spec: Optional[dict] = None,
         wait_timeout_sec: int = 30,
+        reconcile: bool = False,
     ) -> GitRepositoryCR: ...
 
 
@@ -51,6 +57,7 @@ def git_repository_factory_func(
         extra_metadata: Optional[dict] = None,
         extra_spec: Optional[dict] = None,
         wait_timeout_sec: int = 30,
+        reconcile: bool = False,
     ) -> GitRepositoryCR:
         """A factory function used to create Flux GitRepository.
         Args:
@@ -70,6 +77,9 @@ def git_repository_factory_func(
             extra_spec: a dictionary of any additional attributes to put directly into "spec"
                 part of the object
             wait_timeout_sec: How long to wait for the HelmRelease to be ready.
+            reconcile: if the object was already created by this factory, request its reconciliation and wait
+                until Flux handled it, instead of waiting for the next `interval` (see
+                [reconcile_flux_objects](pytest_helm_charts.flux.utils.reconcile_flux_objects)).
         Returns:
             GitRepositoryCR created or found in the k8s API.
         Raises:
@@ -77,6 +87,8 @@ def git_repository_factory_func(
         """
         for gr in created_git_repositories:
             if gr.metadata["name"] == name and gr.metadata["namespace"] == namespace:
+                if reconcile:
+                    reconcile_flux_objects(kube_client, GitRepositoryCR, [name], namespace, wait_timeout_sec)
                 return gr
 
         namespace_factory(namespace)
@@ -93,7 +105,8 @@ def git_repository_factory_func(
             extra_spec=extra_spec,
         )
         created_git_repositories.append(git_repository)
-        git_repository.create()
+        with timed("create", GitRepositoryCR.kind, namespace, name):
+            git_repository.create()
         logger.debug(f"Created Flux GitRepository '{git_repository.namespace}/{git_repository.name}'.")
         wait_for_git_repositories_to_be_ready(kube_client, [name], namespace, wait_timeout_sec, missing_ok=True)
         return git_repository
@@ -145,8 +158,11 @@ def wait_for_git_repositories_to_be_ready(
     git_repo_namespace: str,
     timeout_sec: int,
     missing_ok: bool = False,
+    fail_fast: Optional[bool] = None,
 ) -> List[GitRepositoryCR]:
-    """Block until all Git Repository objects in `git_repo_names` have status 'Ready'."""
+    """Block until all Git Repository objects in `git_repo_names` have status 'Ready'.
+    With `fail_fast` (the session's default if `None`, see [failures](pytest_helm_charts.failures)),
+    fails as soon as any of them is stalled (see [flux_cr_failed](pytest_helm_charts.flux.utils.flux_cr_failed))."""
     objects = wait_for_objects_condition(
         kube_client,
         GitRepositoryCR,
@@ -155,5 +171,6 @@ def wait_for_git_repositories_to_be_ready(
         flux_cr_ready,
         timeout_sec,
         missing_ok,
+        failure_condition_for(GitRepositoryCR.kind, fail_fast),
     )
     return objects
@@ -1,11 +1,19 @@
 import logging
 from dataclasses import dataclass, field, asdict
-from typing import Protocol, Optional, List, Any, Dict
+from typing import Protocol, Optional, List, Any, Dict, Sequence, Set, Tuple
 
 from pykube import HTTPClient
 
 from pytest_helm_charts.k8s.fixtures import NamespaceFactoryFunc
-from pytest_helm_charts.flux.utils import NamespacedFluxCR, flux_cr_ready
+from pytest_helm_charts.failures import failure_condition_for, register_failure_condition
+from pytest_helm_charts.flux.utils import (
+    NamespacedFluxCR,
+    flux_cr_failed,
+    flux_cr_ready,
+    reconcile_flux_objects,
+    wait_for_flux_objects_to_be_ready,
+)
+from pytest_helm_charts.timing import timed
 from pytest_helm_charts.utils import wait_for_objects_condition, inject_extra
 
 
@@ -18,6 +26,9 @@ class HelmReleaseCR(NamespacedFluxCR):
     kind = "HelmRelease"
 
 
+register_failure_condition(HelmReleaseCR.kind, flux_cr_failed)
+
+
 @dataclass
 class CrossNamespaceObjectReference:
     kind: str
@@ -61,6 +72,7 @@ class HelmReleaseFactoryFunc(Protocol):
         extra_metadata: Optional[dict] = None,
         extra_spec: Optional[dict] = None,
         wait_timeout_sec: int = 30,
+        reconcile: bool = False,
     ) -> HelmReleaseCR: ...
 
 
@@ -87,6 +99,7 @@ def helm_release_factory_func(
         extra_metadata: Optional[dict] = None,
         extra_spec: Optional[dict] = None,
         wait_timeout_sec: int = 30,
+        reconcile: bool = False,
     ) -> HelmReleaseCR:
         """A factory function used to create Flux HelmRepository.
         Args:
@@ -111,6 +124,9 @@ def helm_release_factory_func(
             extra_spec: a dictionary of any additional attributes to put directly into "spec"
                 part of the object
             wait_timeout_sec: How long to wait for the HelmRelease to be ready.
+            reconcile: if the object was already created by this factory, request its reconciliation and wait
+                until Flux handled it, instead of waiting for the next `interval` (see
+                [reconcile_flux_objects](pytest_helm_charts.flux.utils.reconcile_flux_objects)).
         Returns:
             HelmRelease created or found in the k8s API.
         Raises:
@@ -118,6 +134,8 @@ def helm_release_factory_func(
         """
         for hr in created_helm_releases:
             if hr.metadata["name"] == name and hr.metadata["namespace"] == namespace:
+                if reconcile:
+                    reconcile_flux_objects(kube_client, HelmReleaseCR, [name], namespace, wait_timeout_sec)
                 return hr
 
         namespace_factory(namespace)
@@ -141,7 +159,8 @@ def helm_release_factory_func(
             extra_spec=extra_spec,
         )
         created_helm_releases.append(helm_release)
-        helm_release.create()
+        with timed("create", HelmReleaseCR.kind, namespace, name):
+            helm_release.create()
         logger.debug(f"Created Flux HelmRelease '{helm_release.namespace}/{helm_release.name}'.")
         wait_for_helm_releases_to_be_ready(kube_client, [name], namespace, wait_timeout_sec, missing_ok=True)
         return helm_release
@@ -149,6 +168,170 @@ def helm_release_factory_func(
     return _helm_release_factory
 
 
+@dataclass
+class HelmReleaseSpec:
+    """Class that describes a HelmRelease to deploy with [HelmReleaseGraphFactoryFunc](HelmReleaseGraphFactoryFunc).
+
+    Attributes have the same meaning as arguments of [HelmReleaseFactoryFunc](HelmReleaseFactoryFunc).
+    """
+
+    name: str
+    namespace: str
+    chart: ChartTemplate
+    interval: str = "1m"
+    release_name: Optional[str] = None
+    target_namespace: Optional[str] = None
+    depends_on: List[CrossNamespaceObjectReference] = field(default_factory=list)
+    timeout: Optional[str] = None
+    values_from: Optional[List[ValuesReference]] = None
+    values: Optional[dict] = None
+    service_account_name: Optional[str] = None
+    extra_metadata: Optional[dict] = None
+    extra_spec: Optional[dict] = None
+
+
+class HelmReleaseGraphFactoryFunc(Protocol):
+    def __call__(
+        self,
+        helm_releases: List[HelmReleaseSpec],
+        sources: Optional[List[NamespacedFluxCR]] = None,
+        timeout_sec: int = 300,
+        fail_fast: Optional[bool] = None,
+    ) -> List[HelmReleaseCR]: ...
+
+
+def helm_release_dependency_layers(
+    helm_releases: List[HelmReleaseSpec], sources: Sequence[NamespacedFluxCR] = ()
+) -> List[List[HelmReleaseSpec]]:
+    """
+    Work out the dependency graph of HelmReleases from their `depends_on` and `chart.sourceRef` and sort them
+    into layers, so that HelmReleases in every layer depend only on the `sources` and HelmReleases from
+    the previous layers. That's the order in which Flux will install them.
+
+    References to objects that are not included in `helm_releases` or `sources` are allowed, as they can
+    already exist in the cluster. Namespaces of references default to the namespace of the HelmRelease.
+
+    Args:
+        helm_releases: HelmReleases to sort
+        sources: HelmRepository, GitRepository and other source objects deployed with the HelmReleases
+
+    Returns:
+        A list of layers of HelmReleases.
+
+    Raises:
+        ValueError: if HelmReleases or sources are not unique or dependencies form a cycle.
+    """
+    source_keys = [(s.kind, s.namespace, s.name) for s in sources]
+    if len(set(source_keys)) != len(source_keys):
+        raise ValueError(f"Sources are not unique: {source_keys}.")
+    specs_by_key: Dict[Tuple[str, str], HelmReleaseSpec] = {}
+    for spec in helm_releases:
+        if (spec.namespace, spec.name) in specs_by_key:
+            raise ValueError(f"HelmRelease '{spec.namespace}/{spec.name}' is listed more than once.")
+        specs_by_key[(spec.namespace, spec.name)] = spec
+
+    dependencies: Dict[Tuple[str, str], Set[Tuple[str, str]]] = {}
+    for key, spec in specs_by_key.items():
+        dependencies[key] = {(d.namespace or spec.namespace, d.name) for d in spec.depends_on} & specs_by_key.keys()
+        source_ref = spec.chart.sourceRef
+        if (source_ref.kind, source_ref.namespace or spec.namespace, source_ref.name) not in source_keys:
+            logger.debug(f"Source of HelmRelease '{key[0]}/{key[1]}' is not deployed with it, it has to exist.")
+
+    layers: List[List[HelmReleaseSpec]] = []
+    done: Set[Tuple[str, str]] = set()
+    remaining = list(specs_by_key)
+    while remaining:
+        layer = [k for k in remaining if dependencies[k] <= done]
+        if not layer:
+            raise ValueError(f"Dependencies of HelmReleases {[f'{ns}/{n}' for ns, n in remaining]} form a cycle.")
+        layers.append([specs_by_key[k] for k in layer])
+        done.update(layer)
+        remaining = [k for k in remaining if k not in done]
+    return layers
+
+
+def helm_release_graph_factory_func(
+    kube_client: HTTPClient,
+    namespace_factory: NamespaceFactoryFunc,
+    created_helm_releases: List[HelmReleaseCR],
+    created_sources: List[NamespacedFluxCR],
+) -> HelmReleaseGraphFactoryFunc:
+    """Return a factory object, that can be used to deploy graphs of HelmReleases and their sources"""
+
+    def _helm_release_graph_factory(
+        helm_releases: List[HelmReleaseSpec],
+        sources: Optional[List[NamespacedFluxCR]] = None,
+        timeout_sec: int = 300,
+        fail_fast: Optional[bool] = None,
+    ) -> List[HelmReleaseCR]:
+        """A factory function used to deploy many HelmReleases with dependencies between them at once.
+
+        The dependency graph is validated first (see [helm_release_dependency_layers](helm_release_dependency_layers)).
+        Then all the sources and HelmReleases are created without waiting for each other, with their
+        `dependsOn` set, so helm-controller installs them in the right order and as soon as possible.
+        A single loop waits for the whole graph to be ready
+        (see [wait_for_flux_objects_to_be_ready](pytest_helm_charts.flux.utils.wait_for_flux_objects_to_be_ready)).
+
+        Args:
+            helm_releases: HelmReleases to deploy
+            sources: source objects, like HelmRepositories and GitRepositories, to deploy with the HelmReleases;
+                make them with `make_helm_repository_obj()` or `make_git_repository_obj()`
+            timeout_sec: timeout in seconds for the whole graph to be ready; if 0, objects are not waited for
+            fail_fast: same as in [wait_for_helm_releases_to_be_ready](wait_for_helm_releases_to_be_ready)
+
+        Returns:
+            The list of created HelmReleases, in the same order as `helm_releases`.
+
+        Raises:
+            ValueError: if the dependency graph is invalid.
+            TimeoutError: when the timeout has been reached.
+            ObjectStatusError: when fail fast is enabled and any of the objects failed.
+        """
+        sources = sources or []
+        layers = helm_release_dependency_layers(helm_releases, sources)
+        logger.debug(
+            f"Deploying HelmReleases in {len(layers)} layers: {[[s.name for s in layer] for layer in layers]}."
+        )
+        namespaces = [s.namespace for s in sources]
+        for spec in helm_releases:
+            namespaces.extend([spec.namespace] + ([spec.target_namespace] if spec.target_namespace else []))
+        for namespace in dict.fromkeys(namespaces):
+            namespace_factory(namespace)
+
+        for source in sources:
+            with timed("create", source.kind, source.namespace, source.name):
+                source.create()
+            created_sources.append(source)
+        objects: List[HelmReleaseCR] = []
+        for spec in helm_releases:
+            helm_release = make_helm_release_obj(
+                kube_client,
+                spec.name,
+                spec.namespace,
+                spec.chart,
+                spec.interval,
+                False,
+                spec.release_name,
+                spec.target_namespace,
+                spec.depends_on,
+                spec.timeout,
+                spec.values_from,
+                spec.values,
+                spec.service_account_name,
+                extra_metadata=spec.extra_metadata,
+                extra_spec=spec.extra_spec,
+            )
+            with timed("create", HelmReleaseCR.kind, spec.namespace, spec.name):
+                helm_release.create()
+            created_helm_releases.append(helm_release)
+            objects.append(helm_release)
+        if timeout_sec > 0:
+            wait_for_flux_objects_to_be_ready(kube_client, [*sources, *objects], timeout_sec, fail_fast)
+        return objects
+
+    return _helm_release_graph_factory
+
+
 def make_helm_release_obj(
     kube_client: HTTPClient,
     name: str,
@@ -204,8 +387,11 @@ def wait_for_helm_releases_to_be_ready(
     helm_release_namespace: str,
     timeout_sec: int,
     missing_ok: bool = False,
+    fail_fast: Optional[bool] = None,
 ) -> List[HelmReleaseCR]:
-    """Block until all Helm Release objects in `helm_release_names` have status 'Ready'."""
+    """Block until all Helm Release objects in `helm_release_names` have status 'Ready'.
+    With `fail_fast` (the session's default if `None`, see [failures](pytest_helm_charts.failures)),
+    fails as soon as any of them is stalled (see [flux_cr_failed](pytest_helm_charts.flux.utils.flux_cr_failed))."""
     objects = wait_for_objects_condition(
         kube_client,
         HelmReleaseCR,
@@ -214,5 +400,6 @@ def wait_for_helm_releases_to_be_ready(
         flux_cr_ready,
         timeout_sec,
         missing_ok,
+        failure_condition_for(HelmReleaseCR.kind, fail_fast),
     )
     return objects
@@ -4,7 +4,9 @@ from typing import Protocol, Optional, Any, List, Dict
 from pykube import HTTPClient
 
 from pytest_helm_charts.k8s.fixtures import NamespaceFactoryFunc
-from pytest_helm_charts.flux.utils import NamespacedFluxCR, flux_cr_ready
+from pytest_helm_charts.failures import failure_condition_for, register_failure_condition
+from pytest_helm_charts.flux.utils import NamespacedFluxCR, flux_cr_failed, flux_cr_ready, reconcile_flux_objects
+from pytest_helm_charts.timing import timed
 from pytest_helm_charts.utils import wait_for_objects_condition, inject_extra
 
 
@@ -17,6 +19,9 @@ class HelmRepositoryCR(NamespacedFluxCR):
     kind = "HelmRepository"
 
 
+register_failure_condition(HelmRepositoryCR.kind, flux_cr_failed)
+
+
 class HelmRepositoryFactoryFunc(Protocol):
     def __call__(
         self,
@@ -31,6 +36,7 @@ class HelmRepositoryFactoryFunc(Protocol):
         extra_metadata: Optional[dict] = None,
         extra_spec: Optional[dict] = None,
         wait_timeout_sec: int = 30,
+        reconcile: bool = False,
     ) -> HelmRepositoryCR: ...
 
 
@@ -53,6 +59,7 @@ def helm_repository_factory_func(
         extra_metadata: Optional[dict] = None,
         extra_spec: Optional[dict] = None,
         wait_timeout_sec: int = 30,
+        reconcile: bool = False,
     ) -> HelmRepositoryCR:
         """A factory function used to create Flux HelmRepository.
         Args:
@@ -72,6 +79,9 @@ def helm_repository_factory_func(
             extra_spec: a dictionary of any additional attributes to put directly into "spec"
                 part of the object
             wait_timeout_sec: How long to wait for the HelmRelease to be ready.
+            reconcile: if the object was already created by this factory, request its reconciliation and wait
+                until Flux handled it, instead of waiting for the next `interval` (see
+                [reconcile_flux_objects](pytest_helm_charts.flux.utils.reconcile_flux_objects)).
         Returns:
             HelmRepository created or found in the k8s API.
         Raises:
@@ -79,6 +89,8 @@ def helm_repository_factory_func(
         """
         for hr in created_helm_repositories:
             if hr.metadata["name"] == name and hr.metadata["namespace"] == namespace:
+                if reconcile:
+                    reconcile_flux_objects(kube_client, HelmRepositoryCR, [name], namespace, wait_timeout_sec)
                 return hr
 
         namespace_factory(namespace)
@@ -96,7 +108,8 @@ def helm_repository_factory_func(
             extra_spec=extra_spec,
         )
         created_helm_repositories.append(helm_repository)
-        helm_repository.create()
+        with timed("create", HelmRepositoryCR.kind, namespace, name):
+            helm_repository.create()
         logger.debug(f"Created Flux HelmRepository '{helm_repository.namespace}/{helm_repository.name}'.")
         wait_for_helm_repositories_to_be_ready(kube_client, [name], namespace, wait_timeout_sec, missing_ok=True)
         return helm_repository
@@ -148,8 +161,11 @@ def wait_for_helm_repositories_to_be_ready(
     helm_repo_namespace: str,
     timeout_sec: int,
     missing_ok: bool = False,
+    fail_fast: Optional[bool] = None,
 ) -> List[HelmRepositoryCR]:
-    """Block until all Helm Repository objects in `helm_repo_names` have status 'Ready'."""
+    """Block until all Helm Repository objects in `helm_repo_names` have status 'Ready'.
+    With `fail_fast` (the session's default if `None`, see [failures](pytest_helm_charts.failures)),
+    fails as soon as any of them is stalled (see [flux_cr_failed](pytest_helm_charts.flux.utils.flux_cr_failed))."""
     objects = wait_for_objects_condition(
         kube_client,
         HelmRepositoryCR,
@@ -158,5 +174,6 @@ def wait_for_helm_repositories_to_be_ready(
         flux_cr_ready,
         timeout_sec,
         missing_ok,
+        failure_condition_for(HelmRepositoryCR.kind, fail_fast),
     )
     return objects
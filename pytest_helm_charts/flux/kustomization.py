@@ -1,11 +1,28 @@
 import logging
-from typing import Protocol, Optional, Any, List, Dict
+import time
+from dataclasses import dataclass
+from typing import Protocol, Optional, Any, List, Dict, Callable, Sequence, Tuple, Type
 
+import pykube
 from pykube import HTTPClient
+from pykube.objects import NamespacedAPIObject
 
+from pytest_helm_charts.diagnostics import collect_diagnostics
+from pytest_helm_charts.errors import ObjectStatusError
 from pytest_helm_charts.k8s.fixtures import NamespaceFactoryFunc
-from pytest_helm_charts.flux.utils import NamespacedFluxCR, flux_cr_ready
-from pytest_helm_charts.utils import wait_for_objects_condition, inject_extra
+from pytest_helm_charts.k8s.job import job_complete
+from pytest_helm_charts.k8s.workloads import workload_ready
+from pytest_helm_charts.failures import failure_condition_for, register_failure_condition
+from pytest_helm_charts.flux.helm_release import HelmReleaseCR
+from pytest_helm_charts.flux.utils import NamespacedFluxCR, flux_cr_failed, flux_cr_ready, reconcile_flux_objects
+from pytest_helm_charts.timing import timed
+from pytest_helm_charts.utils import (
+    WAIT_SLOWEST_OBJECTS_COUNT,
+    ObjectWaitStats,
+    WaitStats,
+    wait_for_objects_condition,
+    inject_extra,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -17,6 +34,52 @@ class KustomizationCR(NamespacedFluxCR):
     kind = "Kustomization"
 
 
+register_failure_condition(KustomizationCR.kind, flux_cr_failed)
+
+# kinds of inventoried objects (by API group and kind) checked by
+# [wait_for_kustomization_inventory_to_be_healthy](wait_for_kustomization_inventory_to_be_healthy),
+# with the types used to list them and functions checking if they're healthy
+INVENTORY_HEALTH_CHECKS: Dict[Tuple[str, str], Tuple[Type[NamespacedAPIObject], Callable[[Any], bool]]] = {
+    ("apps", "Deployment"): (pykube.Deployment, workload_ready),
+    ("apps", "StatefulSet"): (pykube.StatefulSet, workload_ready),
+    ("apps", "DaemonSet"): (pykube.DaemonSet, workload_ready),
+    ("batch", "Job"): (pykube.Job, job_complete),
+    ("helm.toolkit.fluxcd.io", "HelmRelease"): (HelmReleaseCR, flux_cr_ready),
+}
+
+
+@dataclass(frozen=True)
+class InventoryEntry:
+    """Class that represents an object applied by a Kustomization, as listed in its `status.inventory`."""
+
+    namespace: str
+    name: str
+    group: str
+    kind: str
+    version: str
+
+    @classmethod
+    def from_id(cls, entry_id: str, version: str = "") -> "InventoryEntry":
+        """
+        Parse the `id` of an inventory entry, formatted as `<namespace>_<name>_<group>_<kind>`, the same way
+        Flux does: colons in names (like `system:auth-delegator`) are encoded as `__`, so the namespace ends
+        at the first `_`, the kind and group are the last two fields and the name is everything in between.
+        """
+        namespace, sep, rest = entry_id.partition("_")
+        rest, kind_sep, kind = rest.rpartition("_")
+        name, group_sep, group = rest.rpartition("_")
+        name = name.replace("__", ":")
+        if not (sep and kind_sep and group_sep) or "_" in name:
+            raise ValueError(f"Invalid Kustomization inventory entry ID '{entry_id}'.")
+        return cls(namespace, name, group, kind, version)
+
+
+def kustomization_inventory(kustomization: KustomizationCR) -> List[InventoryEntry]:
+    """Return the objects applied by the `kustomization` (empty, if Flux didn't report any yet)."""
+    inventory = kustomization.obj.get("status", {}).get("inventory") or {}
+    return [InventoryEntry.from_id(e["id"], e.get("v", "")) for e in inventory.get("entries") or []]
+
+
 class KustomizationFactoryFunc(Protocol):
     def __call__(
         self,
@@ -31,6 +94,7 @@ class KustomizationFactoryFunc(Protocol):
         extra_metadata: Optional[dict] = None,
         extra_spec: Optional[dict] = None,
         wait_timeout_sec: int = 30,
+        reconcile: bool = False,
     ) -> KustomizationCR: ...
 
 
@@ -53,6 +117,7 @@ def kustomization_factory_func(
         extra_metadata: Optional[dict] = None,
         extra_spec: Optional[dict] = None,
         wait_timeout_sec: int = 30,
+        reconcile: bool = False,
     ) -> KustomizationCR:
         """A factory function used to create Flux Kustomizations.
         Args:
@@ -70,6 +135,9 @@ def kustomization_factory_func(
             extra_spec: a dictionary of any additional attributes to put directly into "spec"
                 part of the object
             wait_timeout_sec: How long to wait for the HelmRelease to be ready.
+            reconcile: if the object was already created by this factory, request its reconciliation and wait
+                until Flux handled it, instead of waiting for the next `interval` (see
+                [reconcile_flux_objects](pytest_helm_charts.flux.utils.reconcile_flux_objects)).
         Returns:
             KustomizationCR created or found in the k8s API.
         Raises:
@@ -77,6 +145,8 @@ def kustomization_factory_func(
         """
         for k in created_kustomizations:
             if k.metadata["name"] == name and k.metadata["namespace"] == namespace:
+                if reconcile:
+                    reconcile_flux_objects(kube_client, KustomizationCR, [name], namespace, wait_timeout_sec)
                 return k
 
         namespace_factory(namespace)
@@ -94,7 +164,8 @@ def kustomization_factory_func(
             extra_spec=extra_spec,
         )
         created_kustomizations.append(kustomization)
-        kustomization.create()
+        with timed("create", KustomizationCR.kind, namespace, name):
+            kustomization.create()
         logger.debug(f"Created Flux Kustomization '{kustomization.namespace}/{kustomization.name}'.")
         wait_for_kustomizations_to_be_ready(kube_client, [name], namespace, wait_timeout_sec, missing_ok=True)
         return kustomization
@@ -146,8 +217,16 @@ def wait_for_kustomizations_to_be_ready(
     kustomization_namespace: str,
     timeout_sec: int,
     missing_ok: bool = False,
+    fail_fast: Optional[bool] = None,
+    wait_for_inventory: bool = False,
 ) -> List[KustomizationCR]:
-    """Block until all Kustomization objects in `kustomization_names` have status 'Ready'."""
+    """Block until all Kustomization objects in `kustomization_names` have status 'Ready'.
+    With `fail_fast` (the session's default if `None`, see [failures](pytest_helm_charts.failures)),
+    fails as soon as any of them is stalled (see [flux_cr_failed](pytest_helm_charts.flux.utils.flux_cr_failed)).
+    With `wait_for_inventory`, also blocks until the workloads and HelmReleases they applied are healthy (see
+    [wait_for_kustomization_inventory_to_be_healthy](wait_for_kustomization_inventory_to_be_healthy)),
+    within the same `timeout_sec`."""
+    start = time.monotonic()
     objects = wait_for_objects_condition(
         kube_client,
         KustomizationCR,
@@ -156,5 +235,101 @@ def wait_for_kustomizations_to_be_ready(
         flux_cr_ready,
         timeout_sec,
         missing_ok,
+        failure_condition_for(KustomizationCR.kind, fail_fast),
     )
+    if wait_for_inventory:
+        remaining_sec = max(1, timeout_sec - int(time.monotonic() - start))
+        wait_for_kustomization_inventory_to_be_healthy(kube_client, objects, remaining_sec, fail_fast)
     return objects
+
+
+def wait_for_kustomization_inventory_to_be_healthy(
+    kube_client: HTTPClient,
+    kustomizations: Sequence[KustomizationCR],
+    timeout_sec: int,
+    fail_fast: Optional[bool] = None,
+) -> WaitStats:
+    """
+    Block until all the objects listed in `status.inventory` of the `kustomizations` that have a health check
+    in [INVENTORY_HEALTH_CHECKS](INVENTORY_HEALTH_CHECKS) are healthy: Deployments, StatefulSets and DaemonSets
+    run, Jobs completed and HelmReleases are ready. Objects of other kinds are ignored. Objects of each kind
+    and namespace are listed with a single request in each round of checks, whatever their number.
+
+    Args:
+        kube_client: client to use to connect to the k8s cluster
+        kustomizations: ready Kustomizations, as returned by
+            [wait_for_kustomizations_to_be_ready](wait_for_kustomizations_to_be_ready)
+        timeout_sec: timeout for the whole call
+        fail_fast: fail as soon as any of the objects failed; the session's default if `None`
+            (see [failures](pytest_helm_charts.failures))
+
+    Returns:
+        [WaitStats](pytest_helm_charts.utils.WaitStats) with the time it took each of the objects (named like
+        'Deployment namespace/name') to be found and to become healthy. They are included in the timing report too.
+
+    Raises:
+        TimeoutError: when the timeout is reached. The message lists the slowest objects and the exception's
+            `wait_stats` attribute holds the [WaitStats](pytest_helm_charts.utils.WaitStats) of the wait.
+        ObjectStatusError: when `fail_fast` is enabled and any of the objects failed.
+    """
+    groups: Dict[Tuple[str, str, str], Dict[str, ObjectWaitStats]] = {}
+    for entry in (e for k in kustomizations for e in kustomization_inventory(k)):
+        if (entry.group, entry.kind) in INVENTORY_HEALTH_CHECKS:
+            groups.setdefault((entry.group, entry.kind, entry.namespace), {}).setdefault(
+                entry.name, ObjectWaitStats(f"{entry.kind} {entry.namespace}/{entry.name}")
+            )
+    kinds = "+".join(sorted({kind for _, kind, _ in groups}))
+    namespaces = sorted({namespace for _, _, namespace in groups})
+    stats = WaitStats(kinds, ",".join(namespaces), objects=[o for g in groups.values() for o in g.values()])
+    if not stats.objects:
+        return stats
+    start = time.monotonic()
+    with timed("wait", kinds, ",".join(namespaces), ",".join(k.name for k in kustomizations)) as span:
+        try:
+            for _ in range(timeout_sec):
+                if _check_inventory_health(kube_client, groups, fail_fast, start):
+                    return stats
+                time.sleep(1)
+            error = TimeoutError(f"Error waiting for Kustomizations' inventory to be healthy; {stats.describe()}.")
+            setattr(error, "wait_stats", stats)
+            raise error
+        except (TimeoutError, ObjectStatusError) as e:
+            collect_diagnostics(kube_client, namespaces, f"waiting for Kustomizations' inventory failed: {e}")
+            raise
+        finally:
+            stats.duration_sec = time.monotonic() - start
+            span.details["slowest_objects"] = [
+                {"name": o.name, "first_seen_sec": o.first_seen_sec, "ready_sec": o.ready_sec}
+                for o in stats.slowest(WAIT_SLOWEST_OBJECTS_COUNT)
+            ]
+            span.details["objects"] = {o.name: o.ready_sec for o in stats.objects}
+
+
+def _check_inventory_health(
+    kube_client: HTTPClient,
+    groups: Dict[Tuple[str, str, str], Dict[str, ObjectWaitStats]],
+    fail_fast: Optional[bool],
+    start: float,
+) -> bool:
+    all_healthy = True
+    for (group, kind, namespace), objects in groups.items():
+        obj_type, healthy = INVENTORY_HEALTH_CHECKS[(group, kind)]
+        found = {o.name: o for o in obj_type.objects(kube_client).filter(namespace=namespace)}
+        failed = failure_condition_for(kind, fail_fast)
+        now = time.monotonic() - start
+        for name, obj_stats in objects.items():
+            obj = found.get(name)
+            if obj is None:
+                all_healthy = False
+                continue
+            if obj_stats.first_seen_sec is None:
+                obj_stats.first_seen_sec = now
+            obj_stats.last_status = obj.obj.get("status")
+            if failed is not None and failed(obj):
+                raise ObjectStatusError(f"{kind} '{namespace}/{name}' applied by a Kustomization failed.")
+            if not healthy(obj):
+                obj_stats.ready_sec = None
+                all_healthy = False
+            elif obj_stats.ready_sec is None:
+                obj_stats.ready_sec = now
+    return all_healthy
@@ -0,0 +1,160 @@
+"""This module suspends and resumes reconciliation of many Flux objects at once, so objects unrelated
+to a test don't compete with it for the Flux controllers' work queues."""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Protocol, Sequence, Set, Tuple, Type
+
+import pykube
+from pykube import HTTPClient
+
+from pytest_helm_charts.flux.git_repository import GitRepositoryCR
+from pytest_helm_charts.flux.helm_release import HelmReleaseCR
+from pytest_helm_charts.flux.helm_repository import HelmRepositoryCR
+from pytest_helm_charts.flux.kustomization import KustomizationCR
+from pytest_helm_charts.flux.utils import NamespacedFluxCR
+from pytest_helm_charts.timing import timed
+
+logger = logging.getLogger(__name__)
+
+# kinds of Flux objects suspended when no kinds are given
+FLUX_SUSPENDABLE_TYPES: Tuple[Type[NamespacedFluxCR], ...] = (
+    KustomizationCR,
+    HelmReleaseCR,
+    GitRepositoryCR,
+    HelmRepositoryCR,
+)
+SUSPEND_MAX_WORKERS = 8
+
+
+def _key(flux_obj: NamespacedFluxCR) -> Tuple[str, str, str]:
+    return flux_obj.kind, flux_obj.namespace, flux_obj.name
+
+
+def _patch_suspend(
+    flux_objects: Sequence[NamespacedFluxCR], suspend: bool, max_workers: int
+) -> Tuple[List[NamespacedFluxCR], List[Exception]]:
+    def _patch(flux_obj: NamespacedFluxCR) -> Optional[Exception]:
+        try:
+            flux_obj.patch({"spec": {"suspend": suspend}})
+            return None
+        except Exception as e:
+            if isinstance(e, pykube.exceptions.HTTPError) and e.code == 404:
+                # deleted meanwhile, there's nothing to suspend or resume anymore
+                return None
+            logger.warning(
+                f"Failed to set 'suspend: {suspend}' of {flux_obj.kind} '{flux_obj.namespace}/{flux_obj.name}'."
+            )
+            return e
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(_patch, flux_objects))
+    patched = [o for o, e in zip(flux_objects, results) if e is None]
+    return patched, [e for e in results if e is not None]
+
+
+def suspend_flux_objects(
+    kube_client: HTTPClient,
+    obj_types: Optional[Sequence[Type[NamespacedFluxCR]]] = None,
+    namespace: Optional[str] = None,
+    selector: Optional[Dict[str, str]] = None,
+    exclude: Sequence[NamespacedFluxCR] = (),
+    max_workers: int = SUSPEND_MAX_WORKERS,
+) -> List[NamespacedFluxCR]:
+    """
+    Suspend reconciliation of all the Flux objects matching the filters, by setting their `spec.suspend`
+    with concurrent patches. Objects that are suspended already are left alone, so resuming the returned
+    objects doesn't resume objects suspended by someone else.
+
+    Args:
+        kube_client: client to use to connect to the k8s cluster
+        obj_types: kinds of objects to suspend; [FLUX_SUSPENDABLE_TYPES](FLUX_SUSPENDABLE_TYPES) if `None`
+        namespace: namespace of the objects; all the namespaces if `None`
+        selector: labels the objects need to have
+        exclude: objects not to suspend, like the ones used by the test itself
+        max_workers: maximum number of patches sent at the same time
+
+    Returns:
+        The list of objects suspended by this call; pass it to [resume_flux_objects](resume_flux_objects).
+
+    Raises:
+        pykube.exceptions.HTTPError: when any of the objects couldn't be suspended. Objects suspended by
+            the call are resumed before the error is raised.
+    """
+    excluded: Set[Tuple[str, str, str]] = {_key(o) for o in exclude}
+    to_suspend: List[NamespacedFluxCR] = []
+    types = obj_types or FLUX_SUSPENDABLE_TYPES
+    kinds = "+".join(t.kind for t in types)
+    with timed("suspend", kinds, namespace, ",".join(f"{k}={v}" for k, v in (selector or {}).items()) or "*"):
+        for obj_type in types:
+            query = obj_type.objects(kube_client).filter(namespace=namespace or pykube.all, selector=selector)
+            to_suspend.extend(o for o in query if not o.obj["spec"].get("suspend") and _key(o) not in excluded)
+        suspended, errors = _patch_suspend(to_suspend, True, max_workers)
+        if errors:
+            resume_flux_objects(suspended, max_workers)
+            raise errors[0]
+    logger.info(f"Suspended {len(suspended)} Flux objects ({kinds}).")
+    return suspended
+
+
+def resume_flux_objects(flux_objects: Sequence[NamespacedFluxCR], max_workers: int = SUSPEND_MAX_WORKERS) -> None:
+    """
+    Resume reconciliation of the Flux objects with concurrent patches. Objects that don't exist anymore
+    are skipped. All the objects are patched even if some of the patches fail.
+
+    Raises:
+        pykube.exceptions.HTTPError: when any of the objects couldn't be resumed.
+    """
+    if not flux_objects:
+        return
+    kinds = "+".join(sorted({o.kind for o in flux_objects}))
+    with timed("resume", kinds, None, ",".join(o.name for o in flux_objects)):
+        _, errors = _patch_suspend(flux_objects, False, max_workers)
+    if errors:
+        raise errors[0]
+    logger.info(f"Resumed {len(flux_objects)} Flux objects ({kinds}).")
+
+
+@contextmanager
+def flux_objects_suspended(
+    kube_client: HTTPClient,
+    obj_types: Optional[Sequence[Type[NamespacedFluxCR]]] = None,
+    namespace: Optional[str] = None,
+    selector: Optional[Dict[str, str]] = None,
+    exclude: Sequence[NamespacedFluxCR] = (),
+) -> Iterator[List[NamespacedFluxCR]]:
+    """Context manager that suspends Flux objects (see [suspend_flux_objects](suspend_flux_objects))
+    and resumes them on exit, also when the block raised an exception."""
+    suspended = suspend_flux_objects(kube_client, obj_types, namespace, selector, exclude)
+    try:
+        yield suspended
+    finally:
+        resume_flux_objects(suspended)
+
+
+class FluxSuspendFunc(Protocol):
+    def __call__(
+        self,
+        obj_types: Optional[Sequence[Type[NamespacedFluxCR]]] = None,
+        namespace: Optional[str] = None,
+        selector: Optional[Dict[str, str]] = None,
+        exclude: Sequence[NamespacedFluxCR] = (),
+    ) -> List[NamespacedFluxCR]: ...
+
+
+def flux_suspend_func(kube_client: HTTPClient, suspended_objects: List[NamespacedFluxCR]) -> FluxSuspendFunc:
+    """Return a function suspending Flux objects (see [suspend_flux_objects](suspend_flux_objects)) that
+    records them in `suspended_objects`, so they can be resumed later."""
+
+    def _flux_suspend(
+        obj_types: Optional[Sequence[Type[NamespacedFluxCR]]] = None,
+        namespace: Optional[str] = None,
+        selector: Optional[Dict[str, str]] = None,
+        exclude: Sequence[NamespacedFluxCR] = (),
+    ) -> List[NamespacedFluxCR]:
+        suspended = suspend_flux_objects(kube_client, obj_types, namespace, selector, exclude)
+        suspended_objects.extend(suspended)
+        return suspended
+
+    return _flux_suspend
@@ -1,27 +1,270 @@
 import abc
 import logging
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Type, TypeVar
 
+from pykube import HTTPClient
 from pykube.objects import NamespacedAPIObject
 
+from pytest_helm_charts.diagnostics import collect_diagnostics
+from pytest_helm_charts.errors import ObjectStatusError
+from pytest_helm_charts.failures import failure_condition_for
+from pytest_helm_charts.timing import timed
+from pytest_helm_charts.utils import YamlDict, wait_for_objects_condition
+
 logger = logging.getLogger(__name__)
 
 FLUX_CR_READY_TIMEOUT_SEC = 30
+# annotation that makes Flux controllers reconcile an object immediately, when its value changes
+FLUX_RECONCILE_REQUESTED_AT_ANNOTATION = "reconcile.fluxcd.io/requestedAt"
+# statuses of Flux objects computed by `flux_cr_status`, named after the ones of kstatus
+FLUX_STATUS_CURRENT = "Current"
+FLUX_STATUS_IN_PROGRESS = "InProgress"
+FLUX_STATUS_FAILED = "Failed"
+FLUX_STATUS_TERMINATING = "Terminating"
+# reasons of the `Ready=False` condition that Flux controllers won't fix by retrying; `BuildFailed` is not
+# one of them, as it's also reported for transient errors (a build that can't be retried is `Stalled`)
+FLUX_TERMINAL_REASONS = {
+    "InvalidURL",
+    "InvalidChartReference",
+    "RetriesExceeded",
+    "UnsupportedSourceKind",
+    "AccessDenied",
+}
 
 
 class NamespacedFluxCR(NamespacedAPIObject, abc.ABC):
-    pass
+    kind: str
+
+
+TFlux = TypeVar("TFlux", bound=NamespacedFluxCR)
+
+
+def _observed_current(observed_generation: Optional[int], generation: Optional[int]) -> bool:
+    return observed_generation is None or generation is None or observed_generation >= generation
+
+
+def _conditions_by_type(flux_obj: NamespacedFluxCR) -> Dict[str, YamlDict]:
+    return {c.get("type", ""): c for c in flux_obj.obj.get("status", {}).get("conditions") or []}
+
+
+def flux_cr_status(flux_obj: NamespacedFluxCR) -> str:
+    """
+    Compute the status of the Flux object the same way kstatus (used by `flux` and `kubectl wait`) does.
+
+    The object is [FLUX_STATUS_IN_PROGRESS](FLUX_STATUS_IN_PROGRESS) until its controller observed its current
+    generation (`status.observedGeneration` and `observedGeneration` of the `Ready` condition) and while it has
+    the `Reconciling=True` condition, [FLUX_STATUS_FAILED](FLUX_STATUS_FAILED) with `Stalled=True` and
+    [FLUX_STATUS_CURRENT](FLUX_STATUS_CURRENT) with `Ready=True`. Conditions are looked up by their type,
+    not by their position in the list.
+
+    Returns:
+        One of the `FLUX_STATUS_*` constants.
+    """
+    metadata = flux_obj.obj.get("metadata", {})
+    if metadata.get("deletionTimestamp"):
+        return FLUX_STATUS_TERMINATING
+    generation = metadata.get("generation")
+    if not _observed_current(flux_obj.obj.get("status", {}).get("observedGeneration"), generation):
+        return FLUX_STATUS_IN_PROGRESS
+    conditions = _conditions_by_type(flux_obj)
+    if conditions.get("Reconciling", {}).get("status") == "True":
+        return FLUX_STATUS_IN_PROGRESS
+    stalled = conditions.get("Stalled", {})
+    if stalled.get("status") == "True" and _observed_current(stalled.get("observedGeneration"), generation):
+        return FLUX_STATUS_FAILED
+    ready = conditions.get("Ready", {})
+    if ready.get("status") == "True" and _observed_current(ready.get("observedGeneration"), generation):
+        return FLUX_STATUS_CURRENT
+    return FLUX_STATUS_IN_PROGRESS
 
 
 def flux_cr_ready(flux_obj: NamespacedFluxCR) -> bool:
-    has_conditions = "status" in flux_obj.obj and "conditions" in flux_obj.obj["status"]
-    if not has_conditions:
-        return False
-    conditions_count = len(flux_obj.obj["status"]["conditions"])
-    if conditions_count == 0:
-        return False
-    if conditions_count > 1:
-        logging.warning(
-            f"Found '{conditions_count}' status conditions when expecting just 1. Using only the first one on the list."
+    """Return `True` if the current generation of the Flux object is ready (see [flux_cr_status](flux_cr_status))."""
+    return flux_cr_status(flux_obj) == FLUX_STATUS_CURRENT
+
+
+def flux_cr_failed(flux_obj: NamespacedFluxCR) -> bool:
+    """Return `True` if the Flux object failed in a way its controller won't fix by retrying: it has
+    the `Stalled=True` condition or `Ready=False` with one of [FLUX_TERMINAL_REASONS](FLUX_TERMINAL_REASONS).
+    Conditions observed for an older generation of the object are ignored."""
+    generation = flux_obj.obj.get("metadata", {}).get("generation")
+    conditions = _conditions_by_type(flux_obj)
+    stalled, ready = conditions.get("Stalled", {}), conditions.get("Ready", {})
+    if stalled.get("status") == "True" and _observed_current(stalled.get("observedGeneration"), generation):
+        return True
+    return (
+        ready.get("status") == "False"
+        and ready.get("reason") in FLUX_TERMINAL_REASONS
+        and _observed_current(ready.get("observedGeneration"), generation)
+    )
+
+
+def _reconcile_requested_at() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def request_flux_reconciliation(flux_obj: NamespacedFluxCR, requested_at: Optional[str] = None) -> str:
+    """
+    Make the Flux controller reconcile the object now, instead of on the next tick of its `interval`,
+    by setting the [FLUX_RECONCILE_REQUESTED_AT_ANNOTATION](FLUX_RECONCILE_REQUESTED_AT_ANNOTATION)
+    annotation (the same thing `flux reconcile` does).
+
+    Args:
+        flux_obj: the object to reconcile
+        requested_at: value of the annotation; the current time if `None`
+
+    Returns:
+        The value of the annotation. The controller reports it in `status.lastHandledReconcileAt` when it
+        handled the request (see [flux_cr_reconciled](flux_cr_reconciled)).
+    """
+    if requested_at is None:
+        requested_at = _reconcile_requested_at()
+    flux_obj.patch({"metadata": {"annotations": {FLUX_RECONCILE_REQUESTED_AT_ANNOTATION: requested_at}}})
+    return requested_at
+
+
+def flux_cr_reconciled(requested_at: str) -> Callable[[NamespacedFluxCR], bool]:
+    """Return a condition checking that the Flux object handled the reconciliation requested with the
+    `requested_at` value of the annotation and is ready."""
+
+    def _reconciled(flux_obj: NamespacedFluxCR) -> bool:
+        handled = flux_obj.obj.get("status", {}).get("lastHandledReconcileAt") == requested_at
+        return handled and flux_cr_ready(flux_obj)
+
+    return _reconciled
+
+
+def _failed_after_reconciliation(
+    failure_func: Optional[Callable[..., bool]], requested_at: str
+) -> Optional[Callable[..., bool]]:
+    if failure_func is None:
+        return None
+
+    def _failed(flux_obj: NamespacedFluxCR) -> bool:
+        # until the object handles the request, its conditions describe the previous reconciliation
+        handled = flux_obj.obj.get("status", {}).get("lastHandledReconcileAt") == requested_at
+        return handled and failure_func(flux_obj)
+
+    return _failed
+
+
+def reconcile_flux_objects(
+    kube_client: HTTPClient,
+    obj_type: Type[TFlux],
+    names: List[str],
+    namespace: str,
+    timeout_sec: int = FLUX_CR_READY_TIMEOUT_SEC,
+    fail_fast: Optional[bool] = None,
+) -> List[TFlux]:
+    """
+    Request reconciliation of Flux objects (see [request_flux_reconciliation](request_flux_reconciliation))
+    and block until all of them handled it and are ready.
+
+    Args:
+        kube_client: client to use to connect to the k8s cluster
+        obj_type: type of the objects, like [HelmReleaseCR](pytest_helm_charts.flux.helm_release.HelmReleaseCR)
+        names: names of the objects to reconcile
+        namespace: namespace of the objects
+        timeout_sec: timeout for the whole call
+        fail_fast: same as in [wait_for_objects_condition](pytest_helm_charts.utils.wait_for_objects_condition);
+            the session's default if `None`
+
+    Returns:
+        The list of the reconciled objects.
+
+    Raises:
+        pykube.exceptions.ObjectDoesNotExist: when any of the objects doesn't exist.
+        TimeoutError: when the timeout is reached.
+        ObjectStatusError: when any of the objects failed (see [flux_cr_failed](flux_cr_failed)) after handling
+            the reconciliation request; failures of the previous reconciliation are ignored, as it might be
+            the one the request is meant to fix.
+    """
+    if len(names) == 0:
+        raise ValueError("'names' list can't be empty.")
+    query = obj_type.objects(kube_client).filter(namespace=namespace)
+    with timed("reconcile", obj_type.kind, namespace, ",".join(names)):
+        # all the objects get the same value, so a single condition checks all of them
+        requested_at = _reconcile_requested_at()
+        for name in names:
+            request_flux_reconciliation(query.get_by_name(name), requested_at)
+        return wait_for_objects_condition(
+            kube_client,
+            obj_type,
+            names,
+            namespace,
+            flux_cr_reconciled(requested_at),
+            timeout_sec,
+            False,
+            _failed_after_reconciliation(failure_condition_for(obj_type.kind, fail_fast), requested_at),
         )
-    condition = flux_obj.obj["status"]["conditions"][0]
-    return condition["type"] == "Ready" and condition["status"] == "True"
+
+
+def wait_for_flux_objects_to_be_ready(
+    kube_client: HTTPClient,
+    flux_objects: Sequence[NamespacedFluxCR],
+    timeout_sec: int,
+    fail_fast: Optional[bool] = None,
+) -> List[NamespacedFluxCR]:
+    """
+    Block until all the Flux objects, which can be of different kinds and in different namespaces, are ready
+    (see [flux_cr_ready](flux_cr_ready)). Objects of each kind and namespace are listed with a single request
+    in each round of checks, so waiting for a graph of many objects costs a few requests per second.
+
+    Args:
+        kube_client: client to use to connect to the k8s cluster
+        flux_objects: the objects to wait for; objects that don't exist yet are waited for as well
+        timeout_sec: timeout for the whole call
+        fail_fast: fail as soon as any of the objects failed (see [flux_cr_failed](flux_cr_failed));
+            the session's default if `None` (see [failures](pytest_helm_charts.failures))
+
+    Returns:
+        The list of the ready objects, in the same order as `flux_objects`.
+
+    Raises:
+        TimeoutError: when the timeout is reached; the message lists objects that are not ready.
+        ObjectStatusError: when `fail_fast` is enabled and any of the objects failed.
+    """
+    if len(flux_objects) == 0:
+        raise ValueError("'flux_objects' list can't be empty.")
+    groups: Dict[Tuple[Type[NamespacedFluxCR], str], List[str]] = {}
+    for o in flux_objects:
+        groups.setdefault((type(o), o.namespace), []).append(o.name)
+    kinds = "+".join(sorted({t.kind for t, _ in groups}))
+    namespaces = sorted({ns for _, ns in groups})
+    with timed("wait", kinds, ",".join(namespaces), ",".join(o.name for o in flux_objects)):
+        not_ready: List[str] = []
+        try:
+            for _ in range(timeout_sec):
+                ready, not_ready = _check_flux_objects(kube_client, groups, fail_fast)
+                if not not_ready:
+                    return [ready[(type(o).kind, o.namespace, o.name)] for o in flux_objects]
+                time.sleep(1)
+            raise TimeoutError(f"Error waiting for Flux objects to be ready; not ready: {not_ready}.")
+        except (TimeoutError, ObjectStatusError) as e:
+            collect_diagnostics(kube_client, namespaces, f"waiting for {kinds} failed: {e}")
+            raise
+
+
+def _check_flux_objects(
+    kube_client: HTTPClient, groups: Dict[Tuple[Type[NamespacedFluxCR], str], List[str]], fail_fast: Optional[bool]
+) -> Tuple[Dict[Tuple[str, str, str], NamespacedFluxCR], List[str]]:
+    ready: Dict[Tuple[str, str, str], NamespacedFluxCR] = {}
+    not_ready: List[str] = []
+    for (obj_type, namespace), names in groups.items():
+        found = {o.name: o for o in obj_type.objects(kube_client).filter(namespace=namespace)}
+        failed = failure_condition_for(obj_type.kind, fail_fast)
+        for name in names:
+            obj = found.get(name)
+            if obj is None:
+                not_ready.append(f"{obj_type.kind} {namespace}/{name} (missing)")
+            elif failed is not None and failed(obj):
+                message = _conditions_by_type(obj).get("Ready", {}).get("message", "")
+                raise ObjectStatusError(f"{obj_type.kind} '{namespace}/{name}' failed: {message}")
+            elif flux_cr_ready(obj):
+                ready[(obj_type.kind, namespace, name)] = obj
+            else:
+                message = _conditions_by_type(obj).get("Ready", {}).get("message")
+                not_ready.append(f"{obj_type.kind} {namespace}/{name}" + (f" ({message})" if message else ""))
+    return ready, not_ready
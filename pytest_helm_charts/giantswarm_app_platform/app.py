@@ -1,19 +1,41 @@
+import contextvars
+import hashlib
+import json
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
-from typing import List, Protocol, Optional, NamedTuple
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Protocol, Optional, NamedTuple, Set, Tuple
 
 import pykube
 import yaml
 from pykube import HTTPClient, ConfigMap
 from pykube.objects import NamespacedAPIObject
 
+from pytest_helm_charts.app_timeline import AppStatusEvent, recorder as app_timeline_recorder
+from pytest_helm_charts.errors import ObjectStatusError
+from pytest_helm_charts.failures import failure_condition_for, register_failure_condition
 from pytest_helm_charts.k8s.fixtures import NamespaceFactoryFunc
-from pytest_helm_charts.giantswarm_app_platform.catalog import CatalogFactoryFunc
-from pytest_helm_charts.utils import YamlDict, wait_for_objects_condition, inject_extra
+from pytest_helm_charts.k8s.namespace import ensure_namespace_exists
+from pytest_helm_charts.k8s.workloads import find_helm_release_workloads, workload_failed, workload_ready
+from pytest_helm_charts.giantswarm_app_platform.catalog import CatalogCR, CatalogFactoryFunc, make_catalog_obj
+from pytest_helm_charts.giantswarm_app_platform.catalog_index import CatalogIndexCache
+from pytest_helm_charts.giantswarm_app_platform.values_config_map import (
+    ValuesConfigMapStore,
+    is_shared_values_config_map,
+)
+from pytest_helm_charts.timing import recorder as timing_recorder, timed
+from pytest_helm_charts.utils import YamlDict, wait_for_objects_condition, inject_extra, delete_and_wait_for_objects
 
 
 logger = logging.getLogger(__name__)
 
+APP_SPEC_HASH_ANNOTATION = "pytest-helm-charts.giantswarm.io/spec-hash"
+# the API server ends watches of the app timeline after this time, and they are started again
+APP_WATCH_TIMEOUT_SEC = 300
+
 
 class AppCR(NamespacedAPIObject):
     version = "application.giantswarm.io/v1alpha1"
@@ -42,6 +64,7 @@ class AppFactoryFunc(Protocol):
         extra_metadata: Optional[dict] = None,
         extra_spec: Optional[dict] = None,
         timeout_sec: int = 60,
+        wait_for_workloads: bool = False,
     ) -> ConfiguredApp: ...
 
 
@@ -50,6 +73,9 @@ def app_factory_func(
     catalog_factory: CatalogFactoryFunc,
     namespace_factory: NamespaceFactoryFunc,
     created_apps: List[ConfiguredApp],
+    reusable_apps: Optional["ReusableAppRegistry"] = None,
+    catalog_index_cache: Optional[CatalogIndexCache] = None,
+    values_store: Optional[ValuesConfigMapStore] = None,
 ) -> AppFactoryFunc:
     def _app_factory(
         app_name: str,
@@ -63,6 +89,7 @@ def app_factory_func(
         extra_metadata: Optional[dict] = None,
         extra_spec: Optional[dict] = None,
         timeout_sec: int = 60,
+        wait_for_workloads: bool = False,
     ) -> ConfiguredApp:
         """Factory function used to create and deploy new apps using App CR. Calls are blocking.
 
@@ -83,6 +110,9 @@ def app_factory_func(
              extra_metadata: optional dict that will be merged with the 'metadata:' section of the object
              extra_spec: optional dict that will be merged with the 'spec:' section of the object
              timeout_sec: timeout in seconds for the create operation
+             wait_for_workloads: if `True`, wait also for the Deployments, StatefulSets and DaemonSets
+                created by the app to be ready (see
+                [wait_for_apps_and_workloads_to_run](wait_for_apps_and_workloads_to_run))
 
         Returns:
             The [ConfiguredApp](ConfiguredApp) object that includes both AppCR and ConfigMap created to
@@ -92,11 +122,21 @@ def app_factory_func(
             pykube.exceptions.ObjectDoesNotExist: if for any reason the created App CR object doesn't exist after
                 creation and it's impossible to check its readiness.
                 TimeoutError: when the timeout has been reached.
+            AppVersionNotFoundError: if the factory validates app versions and `app_version` is not available
+                in the catalog.
         """
         assert catalog_url != ""
-        catalog_factory(catalog_name, catalog_namespace, catalog_url)
-        namespace_factory(namespace)
-        configured_app = create_app(
+        if reusable_apps is None:
+            catalog = catalog_factory(catalog_name, catalog_namespace, catalog_url)
+            namespace_factory(namespace)
+        else:
+            # reused apps outlive the module, so their catalog and namespace can't be the ones deleted
+            # by the module's factories at teardown
+            catalog = reusable_apps.ensure_catalog(kube_client, catalog_name, catalog_namespace, catalog_url)
+            reusable_apps.ensure_namespace(kube_client, namespace)
+        # reused apps outlive the factory, so they keep their own ConfigMaps
+        store = values_store if reusable_apps is None else None
+        configured_app = make_app_object(
             kube_client,
             app_name,
             app_version,
@@ -107,10 +147,21 @@ def app_factory_func(
             config_values,
             extra_metadata,
             extra_spec,
+            store,
         )
-        created_apps.append(configured_app)
+        if catalog_index_cache is not None:
+            _check_app_version(catalog_index_cache, catalog, configured_app)
+        with timed("create", AppCR.kind, namespace, app_name):
+            if reusable_apps is None:
+                _create_app_objects(configured_app, store)
+                created_apps.append(configured_app)
+            else:
+                # reused apps are deleted by the registry at the end of the session
+                configured_app = reusable_apps.adopt_or_create(kube_client, configured_app)
         logger.debug(f"Created App '{configured_app.app.namespace}/{configured_app.app.name}'.")
-        if timeout_sec > 0:
+        if timeout_sec > 0 and wait_for_workloads:
+            wait_for_apps_and_workloads_to_run(kube_client, [app_name], namespace, timeout_sec)
+        elif timeout_sec > 0:
             wait_for_apps_to_run(kube_client, [app_name], namespace, timeout_sec)
 
         # we return a new object here, so that user doesn't alter the one added to created_apps
@@ -119,6 +170,261 @@ def app_factory_func(
     return _app_factory
 
 
+@dataclass
+class AppSpec:
+    """Class that describes an app to deploy with [BatchAppFactoryFunc](BatchAppFactoryFunc).
+
+    Attributes have the same meaning as arguments of [AppFactoryFunc](AppFactoryFunc). `depends_on` lists
+    other apps from the same batch that have to be running before this one is created, as `namespace/name`
+    or just `name` for apps in the same namespace.
+    """
+
+    app_name: str
+    app_version: str
+    catalog_name: str
+    catalog_namespace: str
+    catalog_url: str
+    namespace: str = "default"
+    deployment_namespace: str = "default"
+    config_values: Optional[YamlDict] = None
+    extra_metadata: Optional[dict] = None
+    extra_spec: Optional[dict] = None
+    depends_on: List[str] = field(default_factory=list)
+
+
+class BatchAppFactoryFunc(Protocol):
+    def __call__(
+        self,
+        app_specs: List[AppSpec],
+        timeout_sec: int = 60,
+        max_workers: int = 8,
+    ) -> List[ConfiguredApp]: ...
+
+
+def app_dependency_layers(app_specs: List[AppSpec]) -> List[List[AppSpec]]:
+    """
+    Sort apps into layers, so that apps in every layer depend only on apps from the previous layers.
+
+    Args:
+        app_specs: apps to sort; apps have to be unique by their namespace and name
+
+    Returns:
+        A list of layers; apps in each of them can be deployed at the same time.
+
+    Raises:
+        ValueError: if apps are not unique, an app depends on an app not included in `app_specs`
+            or dependencies form a cycle.
+    """
+    specs_by_key: Dict[Tuple[str, str], AppSpec] = {}
+    for spec in app_specs:
+        if _app_spec_key(spec) in specs_by_key:
+            raise ValueError(f"App '{spec.namespace}/{spec.app_name}' is listed more than once.")
+        specs_by_key[_app_spec_key(spec)] = spec
+    for spec in app_specs:
+        unknown = [d for d in spec.depends_on if _dependency_key(spec, d) not in specs_by_key]
+        if unknown:
+            raise ValueError(
+                f"App '{spec.namespace}/{spec.app_name}' depends on apps that are not deployed: {unknown}."
+            )
+
+    layers: List[List[AppSpec]] = []
+    done: Set[Tuple[str, str]] = set()
+    remaining = list(app_specs)
+    while remaining:
+        layer = [s for s in remaining if all(_dependency_key(s, d) in done for d in s.depends_on)]
+        if not layer:
+            raise ValueError(f"Dependencies of apps {[f'{s.namespace}/{s.app_name}' for s in remaining]} form a cycle.")
+        layers.append(layer)
+        done.update(_app_spec_key(s) for s in layer)
+        remaining = [s for s in remaining if _app_spec_key(s) not in done]
+    return layers
+
+
+def _app_spec_key(spec: AppSpec) -> Tuple[str, str]:
+    return spec.namespace, spec.app_name
+
+
+def _dependency_key(spec: AppSpec, dependency: str) -> Tuple[str, str]:
+    namespace, _, name = dependency.rpartition("/")
+    return namespace or spec.namespace, name
+
+
+def batch_app_factory_func(
+    kube_client: HTTPClient,
+    catalog_factory: CatalogFactoryFunc,
+    namespace_factory: NamespaceFactoryFunc,
+    created_apps: List[ConfiguredApp],
+    catalog_index_cache: Optional[CatalogIndexCache] = None,
+    values_store: Optional[ValuesConfigMapStore] = None,
+) -> BatchAppFactoryFunc:
+    def _create_app_from_spec(spec: AppSpec) -> ConfiguredApp:
+        with timed("create", AppCR.kind, spec.namespace, spec.app_name):
+            return create_app(
+                kube_client,
+                spec.app_name,
+                spec.app_version,
+                spec.catalog_name,
+                spec.catalog_namespace,
+                spec.namespace,
+                spec.deployment_namespace,
+                spec.config_values,
+                spec.extra_metadata,
+                spec.extra_spec,
+                values_store,
+            )
+
+    def _batch_app_factory(
+        app_specs: List[AppSpec],
+        timeout_sec: int = 60,
+        max_workers: int = 8,
+    ) -> List[ConfiguredApp]:
+        """Factory function used to deploy many apps with dependencies between them. Calls are blocking.
+
+        Apps are deployed in layers computed by [app_dependency_layers](app_dependency_layers): all the apps
+        of a layer are created concurrently and then waited for together, before the next layer is started.
+        That way deploying the apps takes as long as the longest chain of dependencies, not as long as
+        all the apps together.
+
+        Args:
+            app_specs: apps to deploy
+            timeout_sec: timeout in seconds for deploying each of the layers; if 0, apps are not waited for
+                and layers only set the order in which apps are created
+            max_workers: maximum number of apps created at the same time
+
+        Returns:
+            The list of [ConfiguredApp](ConfiguredApp) objects, in the same order as `app_specs`.
+
+        Raises:
+            ValueError: if dependencies between apps are invalid.
+            AppVersionNotFoundError: if the factory validates app versions and any of the versions is not
+                available in its catalog.
+            TimeoutError: when the timeout has been reached.
+        """
+        layers = app_dependency_layers(app_specs)
+        # all the catalogs and app versions are checked before anything is deployed
+        for spec in app_specs:
+            assert spec.catalog_url != ""
+            catalog = catalog_factory(spec.catalog_name, spec.catalog_namespace, spec.catalog_url)
+            if catalog_index_cache is not None:
+                # the App CR is only rendered here to be checked; it's created later, layer by layer
+                rendered_app = make_app_object(
+                    kube_client,
+                    spec.app_name,
+                    spec.app_version,
+                    spec.catalog_name,
+                    spec.catalog_namespace,
+                    spec.namespace,
+                    spec.deployment_namespace,
+                    spec.config_values,
+                    spec.extra_metadata,
+                    spec.extra_spec,
+                )
+                _check_app_version(catalog_index_cache, catalog, rendered_app)
+        configured_apps: Dict[Tuple[str, str], ConfiguredApp] = {}
+        for layer in layers:
+            # namespaces are shared between apps, so they are created one by one
+            for spec in layer:
+                namespace_factory(spec.namespace)
+            for spec, configured_app in _create_apps_concurrently(_create_app_from_spec, layer, max_workers):
+                created_apps.append(configured_app)
+                configured_apps[_app_spec_key(spec)] = configured_app
+                logger.debug(f"Created App '{spec.namespace}/{spec.app_name}'.")
+            if timeout_sec > 0:
+                wait_for_apps_in_namespaces_to_run(kube_client, [(s.app_name, s.namespace) for s in layer], timeout_sec)
+
+        # we return new objects here, so that user doesn't alter the ones added to created_apps
+        return [deepcopy(configured_apps[_app_spec_key(s)]) for s in app_specs]
+
+    return _batch_app_factory
+
+
+def _check_app_version(index_cache: CatalogIndexCache, catalog: CatalogCR, configured_app: ConfiguredApp) -> None:
+    # the rendered App CR is checked, as `extra_spec` can override the chart's name and version
+    app_spec = configured_app.app.obj["spec"]
+    index_cache.check_app_version(catalog.obj["spec"]["storage"]["URL"], app_spec["name"], str(app_spec["version"]))
+
+
+def _create_apps_concurrently(
+    create_func: Callable[[AppSpec], ConfiguredApp], layer: List[AppSpec], max_workers: int
+) -> Iterator[Tuple[AppSpec, ConfiguredApp]]:
+    """Create apps in a thread pool and yield the created ones; the first error is raised after that."""
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(layer)))) as pool:
+        # each task runs in a copy of the current context, so its tracing spans keep their parent
+        futures = [pool.submit(contextvars.copy_context().run, create_func, s) for s in layer]
+    error: Optional[BaseException] = None
+    for spec, future in zip(layer, futures):
+        if future.exception() is not None:
+            error = error or future.exception()
+            continue
+        yield spec, future.result()
+    if error is not None:
+        raise error
+
+
+def wait_for_apps_in_namespaces_to_run(
+    kube_client: HTTPClient,
+    apps: List[Tuple[str, str]],
+    timeout_sec: int,
+    missing_ok: bool = False,
+    fail_fast: bool = False,
+) -> List[AppCR]:
+    """
+    Block until all the apps, which can be stored in different namespaces, are running or timeout is reached.
+    Apps in all the namespaces are checked in each round, so the timeout applies to all of them together.
+
+    Args:
+        kube_client: client to use to connect to the k8s cluster
+        apps: a list of tuples of App CR name and namespace
+        timeout_sec: timeout for the whole call
+        missing_ok: same as in [wait_for_apps_to_run](wait_for_apps_to_run)
+        fail_fast: same as in [wait_for_apps_to_run](wait_for_apps_to_run)
+
+    Returns:
+        The list of App CRs of all the apps, in the order of `apps`.
+
+    Raises:
+        TimeoutError: when timeout is reached; the message lists the apps that are not running.
+        pykube.exceptions.ObjectDoesNotExist: when `missing_ok == False` and one of the apps can't be found
+            in k8s API
+        ObjectStatusError: when `fail_fast` is set and an App has `Status: failed` status.
+    """
+    names_by_namespace: Dict[str, List[str]] = {}
+    for name, namespace in apps:
+        names_by_namespace.setdefault(namespace, []).append(name)
+    namespaces = ",".join(sorted(names_by_namespace))
+    with timed("wait", AppCR.kind, namespaces, ",".join(name for name, _ in apps)):
+        not_ready: List[str] = []
+        for _ in range(timeout_sec):
+            found, not_ready = _check_apps_in_namespaces(kube_client, names_by_namespace, missing_ok, fail_fast)
+            if not not_ready:
+                return [found[(namespace, name)] for name, namespace in apps]
+            time.sleep(1)
+        raise TimeoutError(f"Error waiting for apps to run; not running: {not_ready}.")
+
+
+def _check_apps_in_namespaces(
+    kube_client: HTTPClient, names_by_namespace: Dict[str, List[str]], missing_ok: bool, fail_fast: bool
+) -> Tuple[Dict[Tuple[str, str], AppCR], List[str]]:
+    found: Dict[Tuple[str, str], AppCR] = {}
+    not_ready: List[str] = []
+    app_failed = failure_condition_for(AppCR.kind, fail_fast)
+    for namespace, names in names_by_namespace.items():
+        apps = {a.name: a for a in AppCR.objects(kube_client).filter(namespace=namespace)}
+        for name in names:
+            app = apps.get(name)
+            if app is None:
+                if not missing_ok:
+                    raise pykube.exceptions.ObjectDoesNotExist(f"App '{namespace}/{name}' doesn't exist.")
+                not_ready.append(f"{namespace}/{name} (missing)")
+                continue
+            if app_failed is not None and app_failed(app):
+                raise ObjectStatusError(f"App '{namespace}/{name}' status shows failure.")
+            found[(namespace, name)] = app
+            if not _app_deployed(app):
+                not_ready.append(f"{namespace}/{name}")
+    return found, not_ready
+
+
 def _app_has_status(app: AppCR, status: str) -> bool:
     complete = (
         "status" in app.obj
@@ -134,10 +440,21 @@ def _app_failed(app: AppCR) -> bool:
     return _app_has_status(app, "failed")
 
 
+register_failure_condition(AppCR.kind, _app_failed)
+
+
 def _app_deployed(app: AppCR) -> bool:
     return _app_has_status(app, "deployed")
 
 
+def _app_status_events(kube_client: HTTPClient, namespace: str) -> Iterator[AppStatusEvent]:
+    query = AppCR.objects(kube_client).filter(namespace=namespace)
+    for event in query.watch(params={"timeoutSeconds": APP_WATCH_TIMEOUT_SEC}):
+        if event.type != "DELETED":
+            release_status = event.object.obj.get("status", {}).get("release", {}).get("status", "")
+            yield namespace, event.object.name, release_status.lower()
+
+
 def _app_deleted(app: AppCR) -> bool:
     return _app_has_status(app, "deleted")
 
@@ -163,7 +480,8 @@ def wait_for_apps_to_run(
             don't exist in k8s API and waits for them to show up; when `False`, an
             [ObjectNotFound](pykube.exceptions.ObjectDoesNotExist) exception is raised.
         fail_fast: if set to True, the function fails as soon as the App reaches 'status=failed`, without
-            waiting for any subsequent status changes.
+            waiting for any subsequent status changes. It's not enabled by default, as app-operator retries
+            failed apps, so the status is not terminal.
 
     Returns:
         The list of App CRs with all the apps listed in `app_names` included.
@@ -183,11 +501,192 @@ def wait_for_apps_to_run(
         _app_deployed,
         timeout_sec,
         missing_ok,
-        _app_failed if fail_fast else None,
+        failure_condition_for(AppCR.kind, fail_fast),
     )
     return apps
 
 
+def wait_for_apps_and_workloads_to_run(
+    kube_client: HTTPClient,
+    app_names: List[str],
+    app_namespace: str,
+    timeout_sec: int,
+    missing_ok: bool = False,
+    fail_fast: bool = False,
+) -> List[AppCR]:
+    """
+    Block until all the apps are running and all the workloads (Deployments, StatefulSets and DaemonSets)
+    they created are ready, or timeout is reached.
+
+    Workloads are discovered with
+    [find_helm_release_workloads](pytest_helm_charts.k8s.workloads.find_helm_release_workloads)
+    in the deployment namespace of each app (`spec.namespace` of the App CR) as soon as the app is deployed.
+    Statuses of the apps and of their workloads are checked in the same loop, so apps that are already
+    deployed don't wait for the others before their workloads are checked.
+
+    Args:
+        kube_client: client to use to connect to the k8s cluster
+        app_names: a list of application names to check
+        app_namespace: namespace where the App CRs of all the apps are stored
+        timeout_sec: timeout for the call
+        missing_ok: same as in [wait_for_apps_to_run](wait_for_apps_to_run)
+        fail_fast: same as in [wait_for_apps_to_run](wait_for_apps_to_run)
+
+    Returns:
+        The list of App CRs with all the apps listed in `app_names` included.
+
+    Raises:
+        TimeoutError: when timeout is reached; the message lists the apps and workloads that are not ready.
+        pykube.exceptions.ObjectDoesNotExist: when `missing_ok == False` and one of the apps
+            listed in `app_names` can't be found in k8s API
+        ObjectStatusError: when `fail_fast` is set and an App has `Status: failed` status or fail fast is
+            enabled for the session and one of the workloads failed (see [failures](pytest_helm_charts.failures)).
+    """
+    if len(app_names) == 0:
+        raise ValueError("'app_names' list can't be empty.")
+
+    with timed("wait", f"{AppCR.kind}+workloads", app_namespace, ",".join(app_names)):
+        not_ready: List[str] = []
+        for _ in range(timeout_sec):
+            apps, not_ready = _check_apps_and_workloads(kube_client, app_names, app_namespace, missing_ok, fail_fast)
+            if not not_ready:
+                return apps
+            time.sleep(1)
+        raise TimeoutError(f"Error waiting for apps and their workloads to be ready; not ready: {not_ready}.")
+
+
+def _check_apps_and_workloads(
+    kube_client: HTTPClient, app_names: List[str], app_namespace: str, missing_ok: bool, fail_fast: bool
+) -> Tuple[List[AppCR], List[str]]:
+    apps: List[AppCR] = []
+    not_ready: List[str] = []
+    query = AppCR.objects(kube_client).filter(namespace=app_namespace)
+    for name in app_names:
+        app = query.get_or_none(name=name)
+        if app is None:
+            if not missing_ok:
+                raise pykube.exceptions.ObjectDoesNotExist(f"App '{app_namespace}/{name}' doesn't exist.")
+            not_ready.append(f"App {app_namespace}/{name} (missing)")
+            continue
+        app_failed = failure_condition_for(AppCR.kind, fail_fast)
+        if app_failed is not None and app_failed(app):
+            raise ObjectStatusError(f"App '{app_namespace}/{name}' status shows failure.")
+        apps.append(app)
+        if not _app_deployed(app):
+            not_ready.append(f"App {app_namespace}/{name}")
+            continue
+        # the release deployed by app-operator is named after the App CR
+        for workload in find_helm_release_workloads(kube_client, app.name, app.obj["spec"]["namespace"]):
+            if workload_failed(workload):
+                raise ObjectStatusError(f"{workload.kind} '{workload.namespace}/{workload.name}' failed.")
+            if not workload_ready(workload):
+                not_ready.append(f"{workload.kind} {workload.namespace}/{workload.name}")
+    return apps, not_ready
+
+
+class AppUpdateResult(NamedTuple):
+    """Class that represents the result of an in-place app upgrade or reconfiguration."""
+
+    app: AppCR
+    latency_sec: float
+
+
+def upgrade_app(
+    kube_client: HTTPClient,
+    configured_app: ConfiguredApp,
+    app_version: Optional[str] = None,
+    config_values: Optional[YamlDict] = None,
+    timeout_sec: int = 60,
+    fail_fast: bool = False,
+) -> AppUpdateResult:
+    """
+    Upgrade an already deployed app in place and block until app-operator reports the change as deployed.
+
+    `spec.version` of the App CR and the values ConfigMap are changed with JSON merge patches. Apps reused
+    across modules (see [ReusableAppRegistry](ReusableAppRegistry)) get their
+    [APP_SPEC_HASH_ANNOTATION](APP_SPEC_HASH_ANNOTATION) updated in the same patch, so they aren't adopted
+    later as apps with the original configuration. The app is considered updated when its release was
+    deployed again (`status.release.lastDeployed` changed), its status reports `app_version` (if given) and
+    the App's `status.observedGeneration`, if reported, matches the patched generation.
+
+    Args:
+        kube_client: client to use to connect to the k8s cluster
+        configured_app: the app to upgrade, as returned by [create_app](create_app) or `app_factory`
+        app_version: the new version of the app from the catalog; `None` to keep the current one
+        config_values: the new values to configure the app with; `None` to keep the current ones
+        timeout_sec: timeout for waiting for the app to be deployed again
+        fail_fast: same as in [wait_for_apps_to_run](wait_for_apps_to_run)
+
+    Returns:
+        [AppUpdateResult](AppUpdateResult) with the updated App CR and the time it took from sending
+        the patches until the app was reported as deployed.
+
+    Raises:
+        ValueError: if neither `app_version` nor `config_values` are given or `config_values` are given, but
+            the app was created without a values ConfigMap or with a shared one (which other apps use too).
+        TimeoutError: when timeout is reached.
+        ObjectStatusError: when `fail_fast` is set and the App reaches the 'failed' status.
+    """
+    if app_version is None and config_values is None:
+        raise ValueError("At least one of 'app_version' and 'config_values' has to be given.")
+    if config_values is not None and configured_app.app_cm is None:
+        raise ValueError(f"App '{configured_app.app.name}' was created without a values ConfigMap.")
+    if config_values is not None and configured_app.app_cm is not None:
+        if is_shared_values_config_map(configured_app.app_cm):
+            raise ValueError(f"App '{configured_app.app.name}' uses a shared values ConfigMap.")
+
+    app = configured_app.app
+    app.reload()
+    last_deployed = app.obj.get("status", {}).get("release", {}).get("lastDeployed")
+
+    start = time.monotonic()
+    with timed("upgrade", AppCR.kind, app.namespace, app.name):
+        if config_values is not None and configured_app.app_cm is not None:
+            configured_app.app_cm.patch({"data": {"values": yaml.dump(config_values)}})
+        app_patch: YamlDict = {"spec": {"version": app_version}} if app_version is not None else {}
+        if APP_SPEC_HASH_ANNOTATION in app.obj["metadata"].get("annotations", {}):
+            updated = AppCR(app.api, deepcopy(app.obj))
+            if app_version is not None:
+                updated.obj["spec"]["version"] = app_version
+            spec_hash = app_spec_hash(ConfiguredApp(updated, configured_app.app_cm))
+            app_patch["metadata"] = {"annotations": {APP_SPEC_HASH_ANNOTATION: spec_hash}}
+        if app_patch:
+            app.patch(app_patch)
+        generation = app.obj["metadata"].get("generation")
+
+        def _app_updated(a: AppCR) -> bool:
+            status = a.obj.get("status", {})
+            return (
+                _app_deployed(a)
+                and status["release"].get("lastDeployed") != last_deployed
+                and (app_version is None or status.get("version") == app_version)
+                and status.get("observedGeneration", generation) == generation
+            )
+
+        apps = wait_for_objects_condition(
+            kube_client,
+            AppCR,
+            [app.name],
+            app.namespace,
+            _app_updated,
+            timeout_sec,
+            missing_ok=False,
+            failure_condition_func=failure_condition_for(AppCR.kind, fail_fast),
+        )
+    return AppUpdateResult(apps[0], time.monotonic() - start)
+
+
+def reconfigure_app(
+    kube_client: HTTPClient,
+    configured_app: ConfiguredApp,
+    config_values: YamlDict,
+    timeout_sec: int = 60,
+    fail_fast: bool = False,
+) -> AppUpdateResult:
+    """Change values of an already deployed app in place. See [upgrade_app](upgrade_app) for details."""
+    return upgrade_app(kube_client, configured_app, None, config_values, timeout_sec, fail_fast)
+
+
 def wait_for_app_to_be_deleted(
     kube_client: HTTPClient,
     app_name: str,
@@ -219,17 +718,19 @@ def wait_for_app_to_be_deleted(
     return len(apps) == 1
 
 
-def delete_app(configured_app: ConfiguredApp) -> None:
+def delete_app(configured_app: ConfiguredApp, values_store: Optional[ValuesConfigMapStore] = None) -> None:
     """
     Deletes the app created by [create_app](create_app).
     Args:
         configured_app: ConfiguredApp (with optional ConfigMap configuration) to be deleted.
+        values_store: the store the app was created with; its values ConfigMap is deleted only if no other
+            app uses it
 
     Returns:
         None
     """
     configured_app.app.delete()
-    if configured_app.app_cm:
+    if configured_app.app_cm and (values_store is None or values_store.release(configured_app.app_cm)):
         configured_app.app_cm.delete()
 
 
@@ -244,6 +745,7 @@ def make_app_object(
     config_values: Optional[YamlDict] = None,
     extra_metadata: Optional[dict] = None,
     extra_spec: Optional[dict] = None,
+    values_store: Optional[ValuesConfigMapStore] = None,
 ) -> ConfiguredApp:
     """Creates a new App object. Optionally creates a values ConfigMap. Objects are not sent to API server.
 
@@ -262,6 +764,9 @@ def make_app_object(
             a Helm Chart directly).
         extra_metadata: optional dict that will be merged with the 'metadata:' section of the object
         extra_spec: optional dict that will be merged with the 'spec:' section of the object
+        values_store: if given, the values ConfigMap is named by a hash of `config_values` and shared with
+            other apps using the same values (see
+            [ValuesConfigMapStore](pytest_helm_charts.giantswarm_app_platform.values_config_map.ValuesConfigMapStore))
 
     Returns:
         The [ConfiguredApp](ConfiguredApp) object that includes both AppCR and ConfigMap.
@@ -294,7 +799,10 @@ def make_app_object(
         },
     }
     app_cm_obj: Optional[ConfigMap] = None
-    if config_values:
+    if config_values and values_store is not None:
+        app_cm_obj = values_store.make_config_map(kube_client, namespace, config_values)
+        app["spec"]["config"] = {"configMap": {"name": app_cm_obj.name, "namespace": namespace}}
+    elif config_values:
         app["spec"]["config"] = {"configMap": {"name": app_cm_name, "namespace": namespace}}
         app_cm: YamlDict = {
             "apiVersion": "v1",
@@ -308,6 +816,153 @@ def make_app_object(
     return ConfiguredApp(app_obj, app_cm_obj)
 
 
+def app_spec_hash(configured_app: ConfiguredApp) -> str:
+    """Return a hash of the App CR and values ConfigMap, which changes when anything affecting the deployed app
+    changes. Only the name, namespace, labels, annotations and `spec` of the App are hashed, so fields set by
+    the API server don't change the hash. The [APP_SPEC_HASH_ANNOTATION](APP_SPEC_HASH_ANNOTATION) annotation
+    is ignored."""
+    metadata = configured_app.app.obj["metadata"]
+    annotations = {k: v for k, v in metadata.get("annotations", {}).items() if k != APP_SPEC_HASH_ANNOTATION}
+    content = {
+        "app": {
+            "metadata": {
+                "name": metadata.get("name"),
+                "namespace": metadata.get("namespace"),
+                "labels": metadata.get("labels") or None,
+                "annotations": annotations or None,
+            },
+            "spec": configured_app.app.obj.get("spec"),
+        },
+        "values": configured_app.app_cm.obj.get("data") if configured_app.app_cm is not None else None,
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+class ReusableAppRegistry:
+    """Registry of apps that are reused by all the app factories of a test session, instead of being created
+    and deleted in each test module.
+
+    Apps are recognized by a hash of their App CR and values ConfigMap (see [app_spec_hash](app_spec_hash))
+    stored in the [APP_SPEC_HASH_ANNOTATION](APP_SPEC_HASH_ANNOTATION) annotation. An existing App with
+    the same name and hash is adopted, while any other App with the same name is replaced.
+
+    Catalogs and namespaces of reused apps are ensured by the registry too, as the ones created by module
+    scoped factories are deleted (together with the apps in them) at the end of each module.
+    """
+
+    def __init__(self) -> None:
+        self.apps: Dict[Tuple[str, str], ConfiguredApp] = {}
+        self.catalogs: Dict[Tuple[str, str], CatalogCR] = {}
+        self.namespaces: Dict[str, pykube.Namespace] = {}
+        # only the catalogs and namespaces that didn't exist before are deleted by the registry
+        self._created_catalogs: List[CatalogCR] = []
+        self._created_namespaces: List[pykube.Namespace] = []
+
+    def ensure_namespace(self, kube_client: HTTPClient, name: str) -> pykube.Namespace:
+        """Return the namespace `name`, creating it if it doesn't exist."""
+        if name not in self.namespaces:
+            with timed("create", "Namespace", None, name):
+                ns, created = ensure_namespace_exists(kube_client, name)
+            if created:
+                self._created_namespaces.append(ns)
+            self.namespaces[name] = ns
+        return self.namespaces[name]
+
+    def ensure_catalog(
+        self, kube_client: HTTPClient, catalog_name: str, catalog_namespace: str, catalog_url: str
+    ) -> CatalogCR:
+        """
+        Return the Catalog CR `catalog_name`, creating it (and its namespace) if it doesn't exist.
+
+        Raises:
+            ValueError: if the catalog already exists with a different URL.
+        """
+        key = (catalog_namespace, catalog_name)
+        if key not in self.catalogs:
+            self.ensure_namespace(kube_client, catalog_namespace)
+            catalog = CatalogCR.objects(kube_client).filter(namespace=catalog_namespace).get_or_none(name=catalog_name)
+            if catalog is None:
+                catalog = make_catalog_obj(kube_client, catalog_name, catalog_namespace, catalog_url)
+                with timed("create", CatalogCR.kind, catalog_namespace, catalog_name):
+                    catalog.create()
+                self._created_catalogs.append(catalog)
+            self.catalogs[key] = catalog
+        existing_url = self.catalogs[key].obj["spec"]["storage"]["URL"]
+        if existing_url != catalog_url:
+            raise ValueError(
+                f"You requested Catalog named {catalog_name} in namespace {catalog_namespace} "
+                f"with URL {catalog_url}, but it already exists with another URL {existing_url}."
+            )
+        return self.catalogs[key]
+
+    def adopt_or_create(self, kube_client: HTTPClient, configured_app: ConfiguredApp) -> ConfiguredApp:
+        """
+        Adopt an already deployed App matching `configured_app` or create a new one.
+
+        Args:
+            kube_client: client to use to connect to the k8s cluster
+            configured_app: App (and its optional ConfigMap) made with [make_app_object](make_app_object)
+
+        Returns:
+            The adopted or created [ConfiguredApp](ConfiguredApp).
+        """
+        spec_hash = app_spec_hash(configured_app)
+        configured_app.app.obj["metadata"].setdefault("annotations", {})[APP_SPEC_HASH_ANNOTATION] = spec_hash
+        namespace, name = configured_app.app.obj["metadata"]["namespace"], configured_app.app.obj["metadata"]["name"]
+        existing = AppCR.objects(kube_client).filter(namespace=namespace).get_or_none(name=name)
+        if existing is not None and existing.annotations.get(APP_SPEC_HASH_ANNOTATION) == spec_hash:
+            logger.debug(f"Reusing already deployed App '{namespace}/{name}'.")
+            adopted = ConfiguredApp(existing, configured_app.app_cm)
+            self.apps[(namespace, name)] = adopted
+            return adopted
+        if existing is not None:
+            # the App was deployed with a different configuration or not by the registry at all
+            logger.debug(f"Replacing App '{namespace}/{name}' deployed with a different configuration.")
+            self.apps.pop((namespace, name), None)
+            delete_and_wait_for_objects(kube_client, AppCR, [existing])
+        if configured_app.app_cm is not None:
+            cm_name = configured_app.app_cm.obj["metadata"]["name"]
+            stale_cm = ConfigMap.objects(kube_client).filter(namespace=namespace).get_or_none(name=cm_name)
+            delete_and_wait_for_objects(kube_client, ConfigMap, [stale_cm] if stale_cm else [])
+        _create_app_objects(configured_app)
+        self.apps[(namespace, name)] = configured_app
+        return configured_app
+
+    def delete_all(self) -> None:
+        """Delete all the apps (and their ConfigMaps), catalogs and namespaces created or adopted by the registry.
+        Catalogs and namespaces that existed before the registry used them are left in place."""
+        if self.apps:
+            kube_client = next(iter(self.apps.values())).app.api
+            delete_and_wait_for_objects(kube_client, AppCR, [a.app for a in self.apps.values()])
+            delete_and_wait_for_objects(
+                kube_client, ConfigMap, [a.app_cm for a in self.apps.values() if a.app_cm is not None]
+            )
+        if self._created_catalogs:
+            delete_and_wait_for_objects(self._created_catalogs[0].api, CatalogCR, self._created_catalogs)
+        if self._created_namespaces:
+            delete_and_wait_for_objects(self._created_namespaces[0].api, pykube.Namespace, self._created_namespaces)
+        self.apps, self.catalogs, self.namespaces = {}, {}, {}
+        self._created_catalogs, self._created_namespaces = [], []
+
+
+def _create_app_objects(configured_app: ConfiguredApp, values_store: Optional[ValuesConfigMapStore] = None) -> None:
+    if configured_app.app_cm and values_store is not None:
+        values_store.acquire(configured_app.app_cm)
+    elif configured_app.app_cm:
+        configured_app.app_cm.create()
+    try:
+        configured_app.app.create()
+    except Exception:
+        # no App uses the values ConfigMap now, so it's not left behind (or referenced forever)
+        cm = configured_app.app_cm
+        if cm and (values_store is None or values_store.release(cm)):
+            delete_and_wait_for_objects(cm.api, ConfigMap, [cm])
+        raise
+    app = configured_app.app
+    app_timeline_recorder.app_created(app.namespace, app.name, timing_recorder.current_node_id)
+    app_timeline_recorder.watch(f"{app.api.url}/{app.namespace}", partial(_app_status_events, app.api, app.namespace))
+
+
 def create_app(
     kube_client: HTTPClient,
     app_name: str,
@@ -319,6 +974,7 @@ def create_app(
     config_values: Optional[YamlDict] = None,
     extra_metadata: Optional[dict] = None,
     extra_spec: Optional[dict] = None,
+    values_store: Optional[ValuesConfigMapStore] = None,
 ) -> ConfiguredApp:
     configured_app = make_app_object(
         kube_client,
@@ -331,8 +987,7 @@ def create_app(
         config_values,
         extra_metadata,
         extra_spec,
+        values_store,
     )
-    if configured_app.app_cm:
-        configured_app.app_cm.create()
-    configured_app.app.create()
+    _create_app_objects(configured_app, values_store)
     return configured_app
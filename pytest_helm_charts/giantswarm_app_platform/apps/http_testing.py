@@ -7,6 +7,9 @@ import pytest
 from pykube import ConfigMap
 from pytest_helm_charts.clusters import Cluster
 from pytest_helm_charts.giantswarm_app_platform.app import AppFactoryFunc, ConfiguredApp
+from pytest_helm_charts.k8s.fixtures import NamespaceFactoryFunc
+from pytest_helm_charts.parallel import worker_unique_name
+from pytest_helm_charts.timing import timed
 from pytest_helm_charts.utils import YamlDict, delete_and_wait_for_objects
 
 
@@ -98,13 +101,18 @@ class GatlingAppFactoryFunc(Protocol):
 
 
 @pytest.fixture(scope="module")
-def gatling_app_factory(kube_cluster: Cluster, app_factory: AppFactoryFunc) -> Iterable[GatlingAppFactoryFunc]:
+def gatling_app_factory(
+    kube_cluster: Cluster, app_factory: AppFactoryFunc, namespace_factory: NamespaceFactoryFunc
+) -> Iterable[GatlingAppFactoryFunc]:
     """A factory fixture to return a function that can produce Gatling instances. Gatling is a HTTP
-    performance testing tool. Fixture's scope is 'module'..
+    performance testing tool. Fixture's scope is 'module'. When tests are run in parallel with pytest-xdist,
+    each worker deploys Gatling to its own namespace.
 
     Args:
         app_factory: auto-injected [app_factory](pytest_helm_charts.giantswarm_app_platform.app.app_factory) fixture.
         kube_cluster: auto-injected [kube_cluster](pytest_helm_charts.fixtures.kube_cluster) fixture.
+        namespace_factory: auto-injected [namespace_factory](pytest_helm_charts.k8s.fixtures.namespace_factory)
+            fixture.
 
     Returns:
         A function you can use to create Gatling instances.
@@ -118,7 +126,8 @@ def gatling_app_factory(kube_cluster: Cluster, app_factory: AppFactoryFunc) -> I
         extra_metadata: Optional[dict] = None,
         extra_spec: Optional[dict] = None,
     ) -> ConfiguredApp:
-        namespace = "default"
+        namespace = worker_unique_name("default")
+        namespace_factory(namespace)
         with open(simulation_file) as f:
             simulation_code = f.read()
         simulation_cm: YamlDict = {
@@ -136,7 +145,8 @@ def gatling_app_factory(kube_cluster: Cluster, app_factory: AppFactoryFunc) -> I
             config_values["nodeAffinity"] = {"enabled": "true", "selector": node_affinity_selector}
 
         simulation_cm_obj = ConfigMap(kube_cluster.kube_client, simulation_cm)
-        simulation_cm_obj.create()
+        with timed("create", "ConfigMap", namespace, simulation_cm["metadata"]["name"]):
+            simulation_cm_obj.create()
         created_configmaps.append(simulation_cm_obj)
         gatling_app = app_factory(
             "gatling-app",
@@ -145,6 +155,7 @@ def gatling_app_factory(kube_cluster: Cluster, app_factory: AppFactoryFunc) -> I
             "default",
             "https://giantswarm.github.io/giantswarm-playground-catalog/",
             namespace=namespace,
+            deployment_namespace=namespace,
             config_values=config_values,
             extra_metadata=extra_metadata,
             extra_spec=extra_spec,
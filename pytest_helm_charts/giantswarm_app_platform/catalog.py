@@ -4,8 +4,11 @@ from typing import List, Optional, Protocol, Dict
 from pykube import HTTPClient
 from pykube.objects import NamespacedAPIObject
 
+from pytest_helm_charts.giantswarm_app_platform.catalog_index import CatalogIndexCache
 from pytest_helm_charts.k8s.fixtures import NamespaceFactoryFunc
-from pytest_helm_charts.utils import inject_extra
+from pytest_helm_charts.parallel import SharedResourceRegistry
+from pytest_helm_charts.timing import timed
+from pytest_helm_charts.utils import inject_extra, release_and_delete_shared_objects, shared_object_key
 
 logger = logging.getLogger(__name__)
 
@@ -65,11 +68,48 @@ def make_catalog_obj(
     return CatalogCR(kube_client, catalog_obj)
 
 
+def _create_catalog(catalog: CatalogCR) -> bool:
+    catalog.create()
+    return True
+
+
+def _acquire_shared_catalog(
+    kube_client: HTTPClient, catalog: CatalogCR, objects: List[CatalogCR], shared_resources: SharedResourceRegistry
+) -> None:
+    catalog_url = catalog.obj["spec"]["storage"]["URL"]
+    created = False
+
+    def _create() -> bool:
+        nonlocal created
+        created = _create_catalog(catalog)
+        return created
+
+    shared_resources.acquire(shared_object_key(catalog), _create)
+    if created:
+        return
+    # created by another worker, possibly with another URL
+    catalog.reload()
+    existing_url = catalog.obj["spec"]["storage"]["URL"]
+    if existing_url != catalog_url:
+        objects.remove(catalog)
+        release_and_delete_shared_objects(kube_client, CatalogCR, [catalog], shared_resources)
+        raise ValueError(
+            f"You requested creation of Catalog named {catalog.name} in namespace {catalog.namespace} "
+            f"with URL {catalog_url}, but another worker already created it with URL {existing_url}."
+        )
+
+
 def catalog_factory_func(
-    kube_client: HTTPClient, objects: List[CatalogCR], namespace_factory: NamespaceFactoryFunc
+    kube_client: HTTPClient,
+    objects: List[CatalogCR],
+    namespace_factory: NamespaceFactoryFunc,
+    shared_resources: Optional[SharedResourceRegistry] = None,
+    index_cache: Optional[CatalogIndexCache] = None,
 ) -> CatalogFactoryFunc:
     """Return a factory object, that can be used to configure new Catalog CRs
-    for the 'app-operator' running in the cluster"""
+    for the 'app-operator' running in the cluster. If `shared_resources` is passed, each Catalog CR is created
+    only once for all the pytest-xdist workers. If `index_cache` is passed, the index of each created catalog
+    is downloaded to it and a warning is logged if that's not possible."""
 
     def _catalog_factory(
         catalog_name: str,
@@ -117,9 +157,16 @@ def catalog_factory_func(
             kube_client, catalog_name, catalog_namespace, catalog_url, repositories_urls, extra_metadata, extra_spec
         )
         objects.append(catalog)
-        catalog.create()
+        with timed("create", CatalogCR.kind, catalog_namespace, catalog_name):
+            if shared_resources is not None:
+                _acquire_shared_catalog(kube_client, catalog, objects, shared_resources)
+            else:
+                catalog.create()
         logger.debug(f"Created Catalog '{catalog.namespace}/{catalog.name}'.")
-        # TODO: once Catalog CR supports `status` fields, check here that the catalog is present
+        # Catalog CR has no `status`, so the catalog is checked by downloading its index; it's only
+        # logged if that fails, as the catalog might be reachable only from inside the cluster
+        if index_cache is not None:
+            index_cache.try_get(catalog_url)
         return catalog
 
     return _catalog_factory
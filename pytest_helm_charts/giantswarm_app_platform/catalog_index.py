@@ -0,0 +1,180 @@
+"""This module fetches and caches `index.yaml` files of Helm catalogs, so app versions can be validated
+before App CRs are created."""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Set
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+import requests
+import yaml
+
+from pytest_helm_charts.errors import AppVersionNotFoundError
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE_NAME = "index.yaml"
+DEFAULT_INDEX_TTL_SEC = 300
+FETCH_TIMEOUT_SEC = 10
+
+
+def _normalize_version(version: str) -> str:
+    return version[1:] if version.startswith("v") else version
+
+
+def _write_atomically(path: Path, content: str) -> None:
+    # renaming is atomic, so pytest-xdist workers sharing the cache never read a partially written file
+    with tempfile.NamedTemporaryFile("w", dir=path.parent, suffix=".tmp", delete=False) as tmp:
+        tmp.write(content)
+    os.replace(tmp.name, path)
+
+
+@dataclass
+class CatalogIndex:
+    """Class that represents charts and their versions available in a catalog."""
+
+    url: str
+    charts: Dict[str, Set[str]]
+    etag: Optional[str]
+    fetched_at: float
+
+    @classmethod
+    def parse(cls, url: str, content: str, etag: Optional[str], fetched_at: float) -> "CatalogIndex":
+        data = yaml.safe_load(content) or {}
+        charts = {
+            name: {_normalize_version(str(e["version"])) for e in entries or [] if "version" in e}
+            for name, entries in (data.get("entries") or {}).items()
+        }
+        return cls(url, charts, etag, fetched_at)
+
+    def has_version(self, chart_name: str, version: str) -> bool:
+        return _normalize_version(version) in self.charts.get(chart_name, set())
+
+
+class CatalogIndexCache:
+    """Cache of catalog indexes.
+
+    Each `index.yaml` is downloaded once and then reused for `ttl_sec` seconds. After that, it's revalidated
+    with its ETag (or modification time for `file://` catalogs) and downloaded again only if it changed.
+    If `cache_dir` is given, indexes are also stored there, so they are shared by all the processes using
+    the same directory (like pytest-xdist workers).
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, ttl_sec: int = DEFAULT_INDEX_TTL_SEC) -> None:
+        self.cache_dir = cache_dir
+        self.ttl_sec = ttl_sec
+        self._indexes: Dict[str, CatalogIndex] = {}
+        self._failures: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, catalog_url: str) -> CatalogIndex:
+        """
+        Return the index of the catalog available at `catalog_url`, downloading it if needed.
+
+        Args:
+            catalog_url: URL of the catalog; `http://`, `https://` and `file://` URLs are supported
+
+        Returns:
+            The [CatalogIndex](CatalogIndex) of the catalog.
+
+        Raises:
+            OSError: if a `file://` catalog can't be read.
+            ValueError: if the index cached on disk can't be parsed.
+            requests.RequestException: if the index can't be downloaded.
+        """
+        with self._lock:
+            index = self._indexes.get(catalog_url) or self._load_from_disk(catalog_url)
+            if index is not None and time.time() - index.fetched_at < self.ttl_sec:
+                self._indexes[catalog_url] = index
+                return index
+            index = self._fetch(catalog_url, index)
+            self._indexes[catalog_url] = index
+            self._save_to_disk(index)
+            return index
+
+    def try_get(self, catalog_url: str) -> Optional[CatalogIndex]:
+        """
+        Same as [get](CatalogIndexCache.get), but returns `None` and logs a warning if the index can't be
+        downloaded. Failures are remembered for `ttl_sec` seconds, so an unreachable catalog is not retried
+        over and over again.
+        """
+        failed_at = self._failures.get(catalog_url)
+        if failed_at is not None and time.time() - failed_at < self.ttl_sec:
+            return None
+        try:
+            return self.get(catalog_url)
+        except (OSError, ValueError, requests.RequestException, yaml.YAMLError) as e:
+            self._failures[catalog_url] = time.time()
+            logger.warning(f"Can't get index of catalog '{catalog_url}', app versions won't be validated: {e}")
+            return None
+
+    def check_app_version(self, catalog_url: str, chart_name: str, version: str) -> None:
+        """
+        Check that `version` of the chart `chart_name` is available in the catalog. If the catalog's index
+        can't be downloaded, the check passes (see [try_get](CatalogIndexCache.try_get)).
+
+        Raises:
+            AppVersionNotFoundError: if the index was downloaded, but the version is not listed in it.
+        """
+        index = self.try_get(catalog_url)
+        if index is not None and not index.has_version(chart_name, version):
+            available = sorted(index.charts.get(chart_name, set()))
+            raise AppVersionNotFoundError(
+                f"Version '{version}' of app '{chart_name}' not found in catalog '{catalog_url}'. "
+                f"Available versions: {available[-10:] if available else 'none'}."
+            )
+
+    def _fetch(self, catalog_url: str, cached: Optional[CatalogIndex]) -> CatalogIndex:
+        index_url = catalog_url.rstrip("/") + "/" + INDEX_FILE_NAME
+        now = time.time()
+        parsed_url = urlparse(index_url)
+        if parsed_url.scheme == "file":
+            path = Path(url2pathname(parsed_url.path))
+            etag: Optional[str] = str(path.stat().st_mtime_ns)
+            if cached is not None and cached.etag == etag:
+                cached.fetched_at = now
+                return cached
+            content = path.read_text()
+        else:
+            headers = {"If-None-Match": cached.etag} if cached is not None and cached.etag else {}
+            response = requests.get(index_url, headers=headers, timeout=FETCH_TIMEOUT_SEC)
+            if response.status_code == 304 and cached is not None:
+                cached.fetched_at = now
+                return cached
+            response.raise_for_status()
+            content = response.text
+            etag = response.headers.get("ETag")
+        logger.debug(f"Downloaded index of catalog '{catalog_url}'.")
+        index = CatalogIndex.parse(catalog_url, content, etag, now)
+        if self.cache_dir is not None:
+            _write_atomically(self._cache_path(catalog_url, ".yaml"), content)
+        return index
+
+    def _cache_path(self, catalog_url: str, suffix: str) -> Path:
+        assert self.cache_dir is not None
+        return self.cache_dir / (hashlib.sha256(catalog_url.encode()).hexdigest() + suffix)
+
+    def _load_from_disk(self, catalog_url: str) -> Optional[CatalogIndex]:
+        if self.cache_dir is None:
+            return None
+        meta_path, content_path = self._cache_path(catalog_url, ".json"), self._cache_path(catalog_url, ".yaml")
+        if not meta_path.exists() or not content_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text())
+        return CatalogIndex.parse(catalog_url, content_path.read_text(), meta["etag"], meta["fetched_at"])
+
+    def _save_to_disk(self, index: CatalogIndex) -> None:
+        if self.cache_dir is None:
+            return
+        meta = {"url": index.url, "etag": index.etag, "fetched_at": index.fetched_at}
+        _write_atomically(self._cache_path(index.url, ".json"), json.dumps(meta))
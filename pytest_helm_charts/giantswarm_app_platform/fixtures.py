@@ -1,15 +1,21 @@
 import logging
-from typing import List, Iterable
+from typing import List, Iterable, Optional
 
 import pytest
+from _pytest.config import Config
+from _pytest.tmpdir import TempPathFactory
 from deprecated import deprecated
 from pykube import ConfigMap
 
+from pytest_helm_charts.chart_repository import ChartRepositoryServer
 from pytest_helm_charts.k8s.fixtures import NamespaceFactoryFunc
 from pytest_helm_charts.clusters import Cluster
 from pytest_helm_charts.giantswarm_app_platform.app import (
     AppFactoryFunc,
     app_factory_func,
+    BatchAppFactoryFunc,
+    batch_app_factory_func,
+    ReusableAppRegistry,
     ConfiguredApp,
     AppCR,
 )
@@ -23,10 +29,28 @@ from pytest_helm_charts.giantswarm_app_platform.catalog import (
     CatalogCR,
     catalog_factory_func,
 )
-from pytest_helm_charts.utils import object_factory_helper, delete_and_wait_for_objects
+from pytest_helm_charts.giantswarm_app_platform.catalog_index import CatalogIndexCache
+from pytest_helm_charts.giantswarm_app_platform.values_config_map import ValuesConfigMapStore
+from pytest_helm_charts.options import (
+    CMD_OPT_CATALOG_INDEX_TTL,
+    CMD_OPT_REUSE_APPS,
+    CMD_OPT_SHARED_VALUES,
+    REUSE_APPS_OFF,
+    REUSE_APPS_SESSION,
+)
+from pytest_helm_charts.parallel import SharedResourceRegistry, is_parallel_run, worker_unique_name
+from pytest_helm_charts.utils import (
+    object_factory_helper,
+    delete_and_wait_for_objects,
+    release_and_delete_shared_objects,
+)
 
 logger = logging.getLogger(__name__)
 
+CATALOG_INDEX_CACHE_DIR_NAME = "pytest-helm-charts-catalog-index"
+CHART_CATALOG_NAME = "chart-repository"
+CHART_CATALOG_NAMESPACE = "default"
+
 
 @deprecated(version="0.5.3", reason="Please use `catalog_factory` fixture instead.")
 @pytest.fixture(scope="module")
@@ -42,58 +66,226 @@ def app_catalog_factory(kube_cluster: Cluster) -> Iterable[AppCatalogFactoryFunc
     yield from object_factory_helper(kube_cluster, app_catalog_factory_func, AppCatalogCR)
 
 
+@pytest.fixture(scope="session")
+def catalog_index_cache(pytestconfig: Config, tmp_path_factory: TempPathFactory) -> Optional[CatalogIndexCache]:
+    """Return the [CatalogIndexCache](pytest_helm_charts.giantswarm_app_platform.catalog_index.CatalogIndexCache)
+    used by the catalog and app factories to validate app versions before App CRs are created, or `None`
+    unless the validation is enabled with `--helm-charts-catalog-index-ttl SEC`. Fixture's scope is 'session'."""
+    ttl_sec = pytestconfig.getoption(CMD_OPT_CATALOG_INDEX_TTL.replace("-", "_"), 0)
+    if ttl_sec <= 0:
+        return None
+    base_dir = tmp_path_factory.getbasetemp()
+    # all the xdist workers share the parent of their own base temp directories
+    if is_parallel_run():
+        base_dir = base_dir.parent
+    return CatalogIndexCache(base_dir / CATALOG_INDEX_CACHE_DIR_NAME, ttl_sec)
+
+
+@pytest.fixture(scope="module")
+def chart_catalog(catalog_factory: CatalogFactoryFunc, chart_repository: ChartRepositoryServer) -> CatalogCR:
+    """Return a Catalog CR pointing to the [chart_repository](pytest_helm_charts.fixtures.chart_repository),
+    so apps can be installed from the chart under test. Each pytest-xdist worker serves the chart itself,
+    so it gets its own catalog. Fixture's scope is 'module'."""
+    return catalog_factory(worker_unique_name(CHART_CATALOG_NAME), CHART_CATALOG_NAMESPACE, chart_repository.url)
+
+
 @pytest.fixture(scope="function")
 def catalog_factory_function_scope(
-    kube_cluster: Cluster, namespace_factory: NamespaceFactoryFunc
+    kube_cluster: Cluster,
+    namespace_factory: NamespaceFactoryFunc,
+    shared_resource_registry: SharedResourceRegistry,
+    catalog_index_cache: Optional[CatalogIndexCache],
 ) -> Iterable[CatalogFactoryFunc]:
     """Return a factory object, that can be used to configure new Catalog CRs
     for the 'app-operator' running in the cluster. Fixture's scope is 'function'."""
-    yield from _catalog_factory_impl(kube_cluster, namespace_factory)
+    yield from _catalog_factory_impl(kube_cluster, namespace_factory, shared_resource_registry, catalog_index_cache)
 
 
 @pytest.fixture(scope="module")
-def catalog_factory(kube_cluster: Cluster, namespace_factory: NamespaceFactoryFunc) -> Iterable[CatalogFactoryFunc]:
+def catalog_factory(
+    kube_cluster: Cluster,
+    namespace_factory: NamespaceFactoryFunc,
+    shared_resource_registry: SharedResourceRegistry,
+    catalog_index_cache: Optional[CatalogIndexCache],
+) -> Iterable[CatalogFactoryFunc]:
     """Return a factory object, that can be used to configure new Catalog CRs
     for the 'app-operator' running in the cluster. Fixture's scope is 'module'."""
-    yield from _catalog_factory_impl(kube_cluster, namespace_factory)
+    yield from _catalog_factory_impl(kube_cluster, namespace_factory, shared_resource_registry, catalog_index_cache)
 
 
 def _catalog_factory_impl(
-    kube_cluster: Cluster, namespace_factory: NamespaceFactoryFunc
+    kube_cluster: Cluster,
+    namespace_factory: NamespaceFactoryFunc,
+    shared_resource_registry: Optional[SharedResourceRegistry] = None,
+    catalog_index_cache: Optional[CatalogIndexCache] = None,
 ) -> Iterable[CatalogFactoryFunc]:
     created_objects: List[CatalogCR] = []
+    # catalogs are shared by all the pytest-xdist workers and deleted by the last one using them
+    registry = shared_resource_registry if is_parallel_run() else None
+
+    yield catalog_factory_func(
+        kube_cluster.kube_client, created_objects, namespace_factory, registry, catalog_index_cache
+    )
+
+    if registry is not None:
+        release_and_delete_shared_objects(kube_cluster.kube_client, CatalogCR, created_objects, registry)
+    else:
+        delete_and_wait_for_objects(kube_cluster.kube_client, CatalogCR, created_objects)
+
+
+@pytest.fixture(scope="session")
+def reusable_app_registry(pytestconfig: Config) -> Iterable[Optional[ReusableAppRegistry]]:
+    """Return the [ReusableAppRegistry](pytest_helm_charts.giantswarm_app_platform.app.ReusableAppRegistry)
+    used by `app_factory` when the `--helm-charts-reuse-apps` option is enabled, `None` otherwise.
+    Fixture's scope is 'session'."""
+    reuse_mode = pytestconfig.getoption(CMD_OPT_REUSE_APPS.replace("-", "_"), REUSE_APPS_OFF)
+    if reuse_mode == REUSE_APPS_OFF:
+        yield None
+        return
+
+    registry = ReusableAppRegistry()
+    yield registry
 
-    yield catalog_factory_func(kube_cluster.kube_client, created_objects, namespace_factory)
+    if reuse_mode == REUSE_APPS_SESSION:
+        registry.delete_all()
 
-    delete_and_wait_for_objects(kube_cluster.kube_client, CatalogCR, created_objects)
+
+@pytest.fixture(scope="session")
+def values_config_map_store(pytestconfig: Config) -> Optional[ValuesConfigMapStore]:
+    """Return the store of values ConfigMaps shared by apps (see
+    [ValuesConfigMapStore](pytest_helm_charts.giantswarm_app_platform.values_config_map.ValuesConfigMapStore))
+    used by the app factories when the `--helm-charts-shared-values` option is enabled, `None` otherwise.
+    Fixture's scope is 'session'."""
+    if not pytestconfig.getoption(CMD_OPT_SHARED_VALUES.replace("-", "_"), False):
+        return None
+    return ValuesConfigMapStore()
 
 
 @pytest.fixture(scope="module")
 def app_factory(
-    kube_cluster: Cluster, catalog_factory: CatalogFactoryFunc, namespace_factory: NamespaceFactoryFunc
+    kube_cluster: Cluster,
+    catalog_factory: CatalogFactoryFunc,
+    namespace_factory: NamespaceFactoryFunc,
+    reusable_app_registry: Optional[ReusableAppRegistry],
+    catalog_index_cache: Optional[CatalogIndexCache],
+    values_config_map_store: Optional[ValuesConfigMapStore],
 ) -> Iterable[AppFactoryFunc]:
     """Returns a factory function which can be used to install an app using App CR. Fixture's scope is 'module'."""
-    yield from _app_factory_impl(kube_cluster, catalog_factory, namespace_factory)
+    yield from _app_factory_impl(
+        kube_cluster,
+        catalog_factory,
+        namespace_factory,
+        reusable_app_registry,
+        catalog_index_cache,
+        values_config_map_store,
+    )
 
 
 @pytest.fixture(scope="function")
 def app_factory_function_scope(
-    kube_cluster: Cluster, catalog_factory: CatalogFactoryFunc, namespace_factory: NamespaceFactoryFunc
+    kube_cluster: Cluster,
+    catalog_factory: CatalogFactoryFunc,
+    namespace_factory: NamespaceFactoryFunc,
+    reusable_app_registry: Optional[ReusableAppRegistry],
+    catalog_index_cache: Optional[CatalogIndexCache],
+    values_config_map_store: Optional[ValuesConfigMapStore],
 ) -> Iterable[AppFactoryFunc]:
     """Returns a factory function which can be used to install an app using App CR. Fixture's scope is 'module'."""
-    yield from _app_factory_impl(kube_cluster, catalog_factory, namespace_factory)
+    yield from _app_factory_impl(
+        kube_cluster,
+        catalog_factory,
+        namespace_factory,
+        reusable_app_registry,
+        catalog_index_cache,
+        values_config_map_store,
+    )
 
 
 def _app_factory_impl(
-    kube_cluster: Cluster, catalog_factory: CatalogFactoryFunc, namespace_factory: NamespaceFactoryFunc
+    kube_cluster: Cluster,
+    catalog_factory: CatalogFactoryFunc,
+    namespace_factory: NamespaceFactoryFunc,
+    reusable_app_registry: Optional[ReusableAppRegistry] = None,
+    catalog_index_cache: Optional[CatalogIndexCache] = None,
+    values_config_map_store: Optional[ValuesConfigMapStore] = None,
 ) -> Iterable[AppFactoryFunc]:
     """Returns a factory function which can be used to install an app using App CR."""
 
     created_apps: List[ConfiguredApp] = []
 
-    yield app_factory_func(kube_cluster.kube_client, catalog_factory, namespace_factory, created_apps)
+    yield app_factory_func(
+        kube_cluster.kube_client,
+        catalog_factory,
+        namespace_factory,
+        created_apps,
+        reusable_app_registry,
+        catalog_index_cache,
+        values_config_map_store,
+    )
+
+    _delete_apps(kube_cluster, created_apps, values_config_map_store)
+
+
+@pytest.fixture(scope="module")
+def batch_app_factory(
+    kube_cluster: Cluster,
+    catalog_factory: CatalogFactoryFunc,
+    namespace_factory: NamespaceFactoryFunc,
+    catalog_index_cache: Optional[CatalogIndexCache],
+    values_config_map_store: Optional[ValuesConfigMapStore],
+) -> Iterable[BatchAppFactoryFunc]:
+    """Returns a factory function which can be used to install many apps with dependencies between them
+    using App CRs. Independent apps are installed concurrently. Fixture's scope is 'module'."""
+    yield from _batch_app_factory_impl(
+        kube_cluster, catalog_factory, namespace_factory, catalog_index_cache, values_config_map_store
+    )
+
+
+@pytest.fixture(scope="function")
+def batch_app_factory_function_scope(
+    kube_cluster: Cluster,
+    catalog_factory: CatalogFactoryFunc,
+    namespace_factory: NamespaceFactoryFunc,
+    catalog_index_cache: Optional[CatalogIndexCache],
+    values_config_map_store: Optional[ValuesConfigMapStore],
+) -> Iterable[BatchAppFactoryFunc]:
+    """Returns a factory function which can be used to install many apps with dependencies between them
+    using App CRs. Independent apps are installed concurrently. Fixture's scope is 'function'."""
+    yield from _batch_app_factory_impl(
+        kube_cluster, catalog_factory, namespace_factory, catalog_index_cache, values_config_map_store
+    )
+
+
+def _batch_app_factory_impl(
+    kube_cluster: Cluster,
+    catalog_factory: CatalogFactoryFunc,
+    namespace_factory: NamespaceFactoryFunc,
+    catalog_index_cache: Optional[CatalogIndexCache] = None,
+    values_config_map_store: Optional[ValuesConfigMapStore] = None,
+) -> Iterable[BatchAppFactoryFunc]:
+    created_apps: List[ConfiguredApp] = []
+
+    yield batch_app_factory_func(
+        kube_cluster.kube_client,
+        catalog_factory,
+        namespace_factory,
+        created_apps,
+        catalog_index_cache,
+        values_config_map_store,
+    )
+
+    _delete_apps(kube_cluster, created_apps, values_config_map_store)
+
 
+def _delete_apps(
+    kube_cluster: Cluster, created_apps: List[ConfiguredApp], values_store: Optional[ValuesConfigMapStore] = None
+) -> None:
     apps_to_delete = [a.app for a in created_apps]
     delete_and_wait_for_objects(kube_cluster.kube_client, AppCR, apps_to_delete)
-    cms_to_delete = [a.app_cm for a in created_apps if a.app_cm is not None]
+    # shared values ConfigMaps are deleted only by the last app using them
+    cms_to_delete = [
+        a.app_cm
+        for a in created_apps
+        if a.app_cm is not None and (values_store is None or values_store.release(a.app_cm))
+    ]
     delete_and_wait_for_objects(kube_cluster.kube_client, ConfigMap, cms_to_delete)
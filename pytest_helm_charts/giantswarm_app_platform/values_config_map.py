@@ -0,0 +1,121 @@
+"""This module manages values ConfigMaps named by a hash of their content, so apps configured with the same values
+can share a single ConfigMap."""
+
+import hashlib
+import json
+import logging
+import threading
+from typing import Dict, Tuple
+
+import yaml
+from pykube import ConfigMap, HTTPClient
+from pykube.exceptions import HTTPError
+
+from pytest_helm_charts.parallel import worker_unique_name
+from pytest_helm_charts.utils import YamlDict
+
+logger = logging.getLogger(__name__)
+
+VALUES_HASH_LABEL = "pytest-helm-charts.giantswarm.io/values-hash"
+VALUES_CONFIG_MAP_NAME_PREFIX = "values-"
+VALUES_HASH_LENGTH = 16
+
+
+def is_shared_values_config_map(config_map: ConfigMap) -> bool:
+    """Return `True` if `config_map` was made by [ValuesConfigMapStore](ValuesConfigMapStore)."""
+    return VALUES_HASH_LABEL in config_map.labels
+
+
+class ValuesConfigMapStore:
+    """Reference counting store of values ConfigMaps shared by apps.
+
+    Each ConfigMap is named by a hash of its values, so all the apps in a namespace configured with the same
+    values use one ConfigMap. Values are serialized to YAML once and then kept in memory. The ConfigMap
+    is created when the first app acquires it and should be deleted when the last app releases it.
+    The store is thread safe.
+    """
+
+    def __init__(self) -> None:
+        self._serialized: Dict[str, Tuple[str, str]] = {}
+        self._refs: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def _serialize(self, config_values: YamlDict) -> Tuple[str, str]:
+        # JSON with sorted keys is a canonical form of the values that is much cheaper to get than YAML
+        key = json.dumps(config_values, sort_keys=True, default=str)
+        with self._lock:
+            serialized = self._serialized.get(key)
+            if serialized is None:
+                values_hash = hashlib.sha256(key.encode()).hexdigest()[:VALUES_HASH_LENGTH]
+                serialized = (values_hash, yaml.dump(config_values))
+                self._serialized[key] = serialized
+            return serialized
+
+    def make_config_map(self, kube_client: HTTPClient, namespace: str, config_values: YamlDict) -> ConfigMap:
+        """
+        Make the values ConfigMap for `config_values`. The object is not sent to the API server.
+
+        Args:
+            kube_client: client to use to connect to the k8s cluster
+            namespace: namespace of the ConfigMap
+            config_values: values to store in the ConfigMap
+
+        Returns:
+            The ConfigMap named by the hash of `config_values`.
+        """
+        values_hash, values_yaml = self._serialize(config_values)
+        # ConfigMaps are counted by each pytest-xdist worker, so the workers can't share them
+        name = worker_unique_name(VALUES_CONFIG_MAP_NAME_PREFIX + values_hash)
+        return ConfigMap(
+            kube_client,
+            {
+                "apiVersion": "v1",
+                "kind": "ConfigMap",
+                "metadata": {"name": name, "namespace": namespace, "labels": {VALUES_HASH_LABEL: values_hash}},
+                "data": {"values": values_yaml},
+            },
+        )
+
+    def acquire(self, config_map: ConfigMap) -> bool:
+        """
+        Take a reference to `config_map`, creating it in the API server if nobody holds it yet. A ConfigMap
+        with the same name that already exists (for example left by a previous test run) is adopted.
+
+        Returns:
+            `True` if the ConfigMap was created by this call, `False` otherwise.
+        """
+        key = (config_map.namespace, config_map.name)
+        with self._lock:
+            refs = self._refs.get(key, 0)
+            created = False
+            if refs == 0:
+                try:
+                    config_map.create()
+                    created = True
+                except HTTPError as e:
+                    if e.code != 409:
+                        raise
+                    logger.debug(f"Adopting already existing values ConfigMap '{key[0]}/{key[1]}'.")
+            self._refs[key] = refs + 1
+            return created
+
+    def release(self, config_map: ConfigMap) -> bool:
+        """
+        Drop a reference to `config_map`. The ConfigMap is not deleted by the store.
+
+        Returns:
+            `True` if it was the last reference and the ConfigMap should be deleted now, `False` otherwise.
+        """
+        key = (config_map.namespace, config_map.name)
+        with self._lock:
+            refs = self._refs.get(key, 0) - 1
+            if refs > 0:
+                self._refs[key] = refs
+                return False
+            self._refs.pop(key, None)
+            return refs == 0
+
+    def refs(self, config_map: ConfigMap) -> int:
+        """Return the number of apps currently using `config_map`."""
+        with self._lock:
+            return self._refs.get((config_map.namespace, config_map.name), 0)
@@ -0,0 +1,220 @@
+"""This module commits local directories (like the chart under test or a directory of manifests) to bare Git
+repositories and serves them over the Git smart HTTP protocol from the test process, so Flux GitRepositories
+can be tested without a remote Git server.
+
+Repositories are cached in a directory keyed by a hash of the committed content. Commits are made with
+a fixed author and date, so the same content always gets the same commit ID. Serving repositories needs
+the `git` binary with its `http-backend` command.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import subprocess  # nosec
+import tempfile
+from dataclasses import dataclass
+from functools import partial
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote
+
+from pytest_helm_charts.local_server import LocalHTTPServer, directory_content_hash
+
+logger = logging.getLogger(__name__)
+
+GIT_REPOSITORIES_CACHE_DIR_NAME = "pytest-helm-charts-git-repositories"
+# the default branch of GitRepositories created by `git_repository_factory`
+DEFAULT_GIT_BRANCH = "master"
+# git runs with no user and system config, so hooks, signing and other local settings don't change commits
+GIT_ENV = {
+    "GIT_CONFIG_GLOBAL": os.devnull,
+    "GIT_CONFIG_NOSYSTEM": "1",
+    "GIT_AUTHOR_NAME": "pytest-helm-charts",
+    "GIT_AUTHOR_EMAIL": "pytest-helm-charts@localhost",
+    "GIT_AUTHOR_DATE": "2000-01-01T00:00:00+0000",
+    "GIT_COMMITTER_NAME": "pytest-helm-charts",
+    "GIT_COMMITTER_EMAIL": "pytest-helm-charts@localhost",
+    "GIT_COMMITTER_DATE": "2000-01-01T00:00:00+0000",
+}
+
+
+@dataclass
+class GitSnapshot:
+    """Class that represents the content of a directory committed to a bare Git repository."""
+
+    source_dir: Path
+    path: Path
+    branch: str
+    commit: str
+
+
+def _git(*args: str, env: Optional[Dict[str, str]] = None, cwd: Optional[Path] = None) -> str:
+    result = subprocess.run(  # nosec
+        ["git", *args], env=dict(os.environ, **GIT_ENV, **(env or {})), cwd=cwd, check=True, capture_output=True
+    )
+    return result.stdout.decode().strip()
+
+
+def _create_repository(source_dir: Path, path: Path, branch: str) -> None:
+    tmp = Path(tempfile.mkdtemp(dir=path.parent, suffix=".tmp"))
+    try:
+        _git("init", "--quiet", "--bare", str(tmp))
+        # the source directory is used as the work tree of the bare repository; its .gitignore files are honored
+        env = {"GIT_DIR": str(tmp), "GIT_WORK_TREE": str(source_dir), "GIT_INDEX_FILE": str(tmp / "index")}
+        _git("add", "--all", ".", env=env, cwd=source_dir)
+        tree = _git("write-tree", env=env)
+        commit = _git("commit-tree", tree, "-m", "Snapshot of a local directory", env=env)
+        _git("update-ref", f"refs/heads/{branch}", commit, env=env)
+        _git("symbolic-ref", "HEAD", f"refs/heads/{branch}", env=env)
+        (tmp / "index").unlink()
+        try:
+            # renaming is atomic, so concurrent sessions (or pytest-xdist workers) never see a partial repository
+            os.replace(tmp, path)
+        except OSError:
+            if not path.exists():
+                raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def commit_directory(source_dir: Path, cache_dir: Path, branch: str = DEFAULT_GIT_BRANCH) -> GitSnapshot:
+    """
+    Commit all the files in `source_dir` to the `branch` of a bare repository in `cache_dir`, unless
+    a repository with the same content already exists there.
+
+    Args:
+        source_dir: directory to commit; it doesn't need to be a Git repository
+        cache_dir: directory to keep repositories in; they are named after hashes of the committed content
+        branch: name of the branch to commit to
+
+    Returns:
+        The committed snapshot.
+    """
+    repo_hash = hashlib.sha256(f"{directory_content_hash(source_dir)}:{branch}".encode()).hexdigest()
+    path = cache_dir / f"{repo_hash[:16]}.git"
+    if path.exists():
+        logger.info(f"Using cached Git repository '{path}' of '{source_dir}'.")
+    else:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        _create_repository(source_dir, path, branch)
+        logger.info(f"Committed '{source_dir}' to Git repository '{path}'.")
+    commit = _git("rev-parse", f"refs/heads/{branch}", env={"GIT_DIR": str(path)})
+    return GitSnapshot(source_dir, path, branch, commit)
+
+
+class _GitHTTPBackendHandler(BaseHTTPRequestHandler):
+    """Runs `git http-backend` as a CGI script for each request to one of the `repositories`."""
+
+    def __init__(self, *args: Any, project_root: str, repositories: Set[str], **kwargs: Any) -> None:
+        self.project_root = project_root
+        self.repositories = repositories
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self) -> None:
+        self._run_backend()
+
+    def do_POST(self) -> None:
+        self._run_backend()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"Git server: {format % args}")
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() != "chunked":
+            return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        chunks: List[bytes] = []
+        while True:
+            size = int(self.rfile.readline().split(b";")[0].strip(), 16)
+            if size == 0:
+                self.rfile.readline()
+                return b"".join(chunks)
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
+
+    def _run_backend(self) -> None:
+        path, _, query = self.path.partition("?")
+        path = unquote(path)
+        segments = path.lstrip("/").split("/")
+        # only repositories added to the server are served, not anything else in the (shared) cache directory
+        if segments[0] not in self.repositories or ".." in segments:
+            self.send_error(404)
+            return
+        body = self._read_body()
+        env = {
+            "GIT_PROJECT_ROOT": self.project_root,
+            "GIT_HTTP_EXPORT_ALL": "1",
+            "REQUEST_METHOD": self.command,
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "CONTENT_TYPE": self.headers.get("Content-Type", ""),
+            "CONTENT_LENGTH": str(len(body)),
+            "REMOTE_ADDR": self.client_address[0],
+            "GIT_PROTOCOL": self.headers.get("Git-Protocol", ""),
+            "HTTP_CONTENT_ENCODING": self.headers.get("Content-Encoding", ""),
+        }
+        result = subprocess.run(  # nosec
+            ["git", "http-backend"], input=body, env=dict(os.environ, **GIT_ENV, **env), capture_output=True
+        )
+        if result.returncode != 0 and not result.stdout:
+            logger.warning(f"'git http-backend' failed: {result.stderr.decode(errors='replace')}")
+            self.send_error(500)
+            return
+        status, headers, payload = _parse_cgi_output(result.stdout)
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def _parse_cgi_output(output: bytes) -> Tuple[int, List[Tuple[str, str]], bytes]:
+    separator = b"\r\n\r\n" if b"\r\n\r\n" in output else b"\n\n"
+    raw_headers, _, payload = output.partition(separator)
+    status = 200
+    headers: List[Tuple[str, str]] = []
+    for line in raw_headers.decode("latin-1").splitlines():
+        name, _, value = line.partition(":")
+        if name.lower() == "status":
+            status = int(value.split()[0])
+        elif name:
+            headers.append((name, value.strip()))
+    return status, headers, payload
+
+
+class GitServer(LocalHTTPServer):
+    """
+    Git smart HTTP server running in a thread of the test process, serving bare repositories made
+    with [commit_directory](commit_directory). Only repositories added with
+    [add_directory](GitServer.add_directory) are served, other ones in `root_dir` are not.
+
+    Args:
+        root_dir: directory with the bare repositories; new ones are committed there too
+        host: address the server is advertised with, which needs to be reachable from the cluster;
+            detected with [detect_host_address](pytest_helm_charts.local_server.detect_host_address) if `None`
+        bind_address: address to listen on
+        port: port to listen on; a free one is picked if 0
+    """
+
+    def __init__(
+        self, root_dir: Path, host: Optional[str] = None, bind_address: str = "0.0.0.0", port: int = 0
+    ) -> None:
+        root_dir.mkdir(parents=True, exist_ok=True)
+        self._served_names: Set[str] = set()
+        handler = partial(_GitHTTPBackendHandler, project_root=str(root_dir), repositories=self._served_names)
+        super().__init__("Git server", handler, host, bind_address, port)
+        self.root_dir = root_dir
+        self.repositories: List[GitSnapshot] = []
+
+    def add_directory(self, source_dir: Path, branch: str = DEFAULT_GIT_BRANCH) -> GitSnapshot:
+        """Commit the `source_dir` (see [commit_directory](commit_directory)) and serve it."""
+        snapshot = commit_directory(source_dir, self.root_dir, branch)
+        self.repositories.append(snapshot)
+        self._served_names.add(snapshot.path.name)
+        return snapshot
+
+    def url_for(self, snapshot: GitSnapshot) -> str:
+        """Return the URL to clone the `snapshot` from, to be used in GitRepository CRs."""
+        return f"{self.url}/{snapshot.path.name}"
@@ -1,12 +1,18 @@
-from typing import List
+from typing import List, Optional
 
 import pykube
 from pykube import HTTPClient
 
+from pytest_helm_charts.failures import failure_condition_for, register_failure_condition
+from pytest_helm_charts.k8s.pod import find_workload_pods, pod_failure_condition
 from pytest_helm_charts.utils import wait_for_objects_condition
 
+# label of DaemonSet's pods with the generation of the DaemonSet they were created from
+POD_TEMPLATE_GENERATION_LABEL = "pod-template-generation"
 
-def _daemon_set_ready(ds: pykube.DaemonSet) -> bool:
+
+def daemon_set_ready(ds: pykube.DaemonSet) -> bool:
+    """Return `True` if the DaemonSet `ds` has a ready pod on every node it should run on."""
     complete = (
         "desiredNumberScheduled" in ds.obj["status"]
         and "numberReady" in ds.obj["status"]
@@ -15,12 +21,37 @@ def _daemon_set_ready(ds: pykube.DaemonSet) -> bool:
     return complete
 
 
+def _daemon_set_failed(ds: pykube.DaemonSet) -> bool:
+    # with the `OnDelete` strategy pods are replaced only when deleted, so a stuck revision never changes
+    status = ds.obj.get("status", {})
+    desired = int(status.get("desiredNumberScheduled", 0))
+    generation = int(ds.obj["metadata"].get("generation", 0))
+    if not (
+        ds.obj.get("spec", {}).get("updateStrategy", {}).get("type") == "OnDelete"
+        and int(status.get("observedGeneration", 0)) >= generation
+        and int(status.get("updatedNumberScheduled", 0)) < desired
+        and int(status.get("numberReady", 0)) < desired
+    ):
+        return False
+    # counters lag behind during the initial rollout and when a node joins, so the DaemonSet failed only
+    # if some of its pods really run an older template
+    return any(
+        int(p.labels.get(POD_TEMPLATE_GENERATION_LABEL, generation)) < generation
+        for p in find_workload_pods(ds.api, ds)
+    )
+
+
+register_failure_condition(pykube.DaemonSet.kind, _daemon_set_failed)
+
+
 def wait_for_daemon_sets_to_run(
     kube_client: HTTPClient,
     daemon_set_names: List[str],
     daemon_sets_namespace: str,
     timeout_sec: int,
     missing_ok: bool = False,
+    fail_fast: Optional[bool] = None,
+    watch_pods: bool = False,
 ) -> List[pykube.DaemonSet]:
     """
     Block until all the DaemonSets are running or timeout is reached.
@@ -33,6 +64,12 @@ def wait_for_daemon_sets_to_run(
         missing_ok: when `True`, the function ignores that some of the objects listed in the `daemon_set_names`
             don't exist in k8s API and waits for them to show up; when `False`, an
             [ObjectNotFound](pykube.exceptions.ObjectDoesNotExist) exception is raised.
+        fail_fast: when `True`, the function fails as soon as any of the DaemonSets is not ready and its new
+            revision can't be rolled out without manual action (`OnDelete` update strategy); when `None`,
+            the session's default is used (see [failures](pytest_helm_charts.failures))
+        watch_pods: when `True`, Pods of DaemonSets that are not ready are checked too and the function fails
+            as soon as any of them fails in a way it won't recover from (see
+            [find_pod_failure](pytest_helm_charts.k8s.pod.find_pod_failure))
 
     Returns:
         The list of DaemonSet resources with all the objects listed in `daemon_set_names` included.
@@ -41,15 +78,22 @@ def wait_for_daemon_sets_to_run(
         TimeoutError: when timeout is reached.
         pykube.exceptions.ObjectDoesNotExist: when `missing_ok == False` and one of the objects
             listed in `daemon_set_names` can't be found in k8s API
+        ObjectStatusError: when failing fast and one of the DaemonSets failed.
+        PodFailureError: when `watch_pods` is set and a Pod of one of the DaemonSets failed; the error's
+            `failure` attribute is the [PodFailure](pytest_helm_charts.k8s.pod.PodFailure).
 
     """
+    failure_func = failure_condition_for(pykube.DaemonSet.kind, fail_fast)
+    if watch_pods:
+        failure_func = pod_failure_condition(kube_client, daemon_set_ready, failure_func)
     result = wait_for_objects_condition(
         kube_client,
         pykube.DaemonSet,
         daemon_set_names,
         daemon_sets_namespace,
-        _daemon_set_ready,
+        daemon_set_ready,
         timeout_sec,
         missing_ok=missing_ok,
+        failure_condition_func=failure_func,
     )
     return result
@@ -1,11 +1,14 @@
-from typing import List
+from typing import List, Optional
 
 from pykube import Deployment, HTTPClient
 
-from pytest_helm_charts.utils import wait_for_objects_condition
+from pytest_helm_charts.failures import failure_condition_for, register_failure_condition
+from pytest_helm_charts.k8s.pod import pod_failure_condition
+from pytest_helm_charts.utils import find_condition, wait_for_objects_condition
 
 
-def _deployment_running(deploy: Deployment) -> bool:
+def deployment_running(deploy: Deployment) -> bool:
+    """Return `True` if all the replicas of the current generation of the Deployment `deploy` are available."""
     complete = (
         "status" in deploy.obj
         and "availableReplicas" in deploy.obj["status"]
@@ -20,12 +23,26 @@ def _deployment_running(deploy: Deployment) -> bool:
     return complete
 
 
+def _deployment_failed(deploy: Deployment) -> bool:
+    progressing = find_condition(deploy, "Progressing")
+    return (
+        progressing is not None
+        and progressing.get("status") == "False"
+        and progressing.get("reason") == "ProgressDeadlineExceeded"
+    )
+
+
+register_failure_condition(Deployment.kind, _deployment_failed)
+
+
 def wait_for_deployments_to_run(
     kube_client: HTTPClient,
     deployment_names: List[str],
     deployments_namespace: str,
     timeout_sec: int,
     missing_ok: bool = True,
+    fail_fast: Optional[bool] = None,
+    watch_pods: bool = False,
 ) -> List[Deployment]:
     """
     Block until all the Deployments are running or timeout is reached.
@@ -38,6 +55,12 @@ def wait_for_deployments_to_run(
         missing_ok: when `True`, the function ignores that some of the objects listed in the `deployment_names`
             don't exist in k8s API and waits for them to show up; when `False`, a
             `pykube.exceptions.ObjectDoesNotExist` exception is raised.
+        fail_fast: when `True`, the function fails as soon as the rollout of any of the Deployments exceeds
+            its `progressDeadlineSeconds`; when `None`, the session's default is used (see
+            [failures](pytest_helm_charts.failures))
+        watch_pods: when `True`, Pods of Deployments that are not ready are checked too and the function fails
+            as soon as any of them fails in a way it won't recover from (see
+            [find_pod_failure](pytest_helm_charts.k8s.pod.find_pod_failure))
 
     Returns:
         The list of Deployment resources with all the objects listed in `deployment_names` included.
@@ -46,15 +69,22 @@ def wait_for_deployments_to_run(
         TimeoutError: when timeout is reached.
         pykube.exceptions.ObjectDoesNotExist: when `missing_ok == False` and one of the objects
             listed in `deployment_names` can't be found in k8s API
+        ObjectStatusError: when failing fast and one of the Deployments failed.
+        PodFailureError: when `watch_pods` is set and a Pod of one of the Deployments failed; the error's
+            `failure` attribute is the [PodFailure](pytest_helm_charts.k8s.pod.PodFailure).
 
     """
+    failure_func = failure_condition_for(Deployment.kind, fail_fast)
+    if watch_pods:
+        failure_func = pod_failure_condition(kube_client, deployment_running, failure_func)
     result = wait_for_objects_condition(
         kube_client,
         Deployment,
         deployment_names,
         deployments_namespace,
-        _deployment_running,
+        deployment_running,
         timeout_sec,
         missing_ok,
+        failure_func,
     )
     return result
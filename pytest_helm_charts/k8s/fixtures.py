@@ -7,8 +7,10 @@ import pytest
 
 from pytest_helm_charts.clusters import Cluster
 from pytest_helm_charts.fixtures import logger
-from pytest_helm_charts.k8s.namespace import ensure_namespace_exists
-from pytest_helm_charts.utils import delete_and_wait_for_objects
+from pytest_helm_charts.k8s.namespace import ensure_namespace_exists, make_namespace_object
+from pytest_helm_charts.parallel import SharedResourceRegistry, is_parallel_run, worker_unique_name
+from pytest_helm_charts.timing import timed
+from pytest_helm_charts.utils import delete_and_wait_for_objects, release_and_delete_shared_objects, shared_object_key
 
 
 class NamespaceFactoryFunc(Protocol):
@@ -18,19 +20,30 @@ class NamespaceFactoryFunc(Protocol):
 
 
 @pytest.fixture(scope="function")
-def namespace_factory_function_scope(kube_cluster: Cluster) -> Iterable[NamespaceFactoryFunc]:
+def namespace_factory_function_scope(
+    kube_cluster: Cluster, shared_resource_registry: SharedResourceRegistry
+) -> Iterable[NamespaceFactoryFunc]:
     """Return a new namespace that is deleted once the fixture is disposed. Fixture's scope is 'function'."""
-    yield from _namespace_factory_impl(kube_cluster)
+    yield from _namespace_factory_impl(kube_cluster, shared_resource_registry)
 
 
 @pytest.fixture(scope="module")
-def namespace_factory(kube_cluster: Cluster) -> Iterable[NamespaceFactoryFunc]:
+def namespace_factory(
+    kube_cluster: Cluster, shared_resource_registry: SharedResourceRegistry
+) -> Iterable[NamespaceFactoryFunc]:
     """Return a new namespace that is deleted once the fixture is disposed. Fixture's scope is 'module'."""
-    yield from _namespace_factory_impl(kube_cluster)
+    yield from _namespace_factory_impl(kube_cluster, shared_resource_registry)
 
 
-def _namespace_factory_impl(kube_cluster: Cluster) -> Iterable[NamespaceFactoryFunc]:
-    """Return a new namespace that is deleted once the fixture is disposed."""
+def _namespace_factory_impl(
+    kube_cluster: Cluster, shared_resource_registry: Optional[SharedResourceRegistry] = None
+) -> Iterable[NamespaceFactoryFunc]:
+    """Return a new namespace that is deleted once the fixture is disposed. When tests are run in parallel,
+    namespaces are shared by all the pytest-xdist workers and deleted by the last worker using them."""
+    if is_parallel_run() and shared_resource_registry is not None:
+        yield from _shared_namespace_factory_impl(kube_cluster, shared_resource_registry)
+        return
+
     created_namespaces: List[pykube.Namespace] = []
 
     def _namespace_factory(
@@ -42,7 +55,8 @@ def _namespace_factory_impl(kube_cluster: Cluster) -> Iterable[NamespaceFactoryF
             if namespace.metadata["name"] == name:
                 return namespace
 
-        ns, created = ensure_namespace_exists(kube_cluster.kube_client, name, extra_metadata, extra_spec)
+        with timed("create", "Namespace", None, name):
+            ns, created = ensure_namespace_exists(kube_cluster.kube_client, name, extra_metadata, extra_spec)
         logger.debug(f"Ensured the namespace '{name}'.")
         if created:
             created_namespaces.append(ns)
@@ -53,8 +67,46 @@ def _namespace_factory_impl(kube_cluster: Cluster) -> Iterable[NamespaceFactoryF
     delete_and_wait_for_objects(kube_cluster.kube_client, pykube.Namespace, created_namespaces)
 
 
+def _shared_namespace_factory_impl(
+    kube_cluster: Cluster, registry: SharedResourceRegistry
+) -> Iterable[NamespaceFactoryFunc]:
+    used_namespaces: List[pykube.Namespace] = []
+
+    def _namespace_factory(
+        name: str,
+        extra_metadata: Optional[dict] = None,
+        extra_spec: Optional[dict] = None,
+    ) -> pykube.Namespace:
+        for namespace in used_namespaces:
+            if namespace.metadata["name"] == name:
+                return namespace
+
+        ns = make_namespace_object(kube_cluster.kube_client, name, extra_metadata, extra_spec)
+        fetched = False
+
+        def _ensure() -> bool:
+            nonlocal ns, fetched
+            ns, created = ensure_namespace_exists(kube_cluster.kube_client, name, extra_metadata, extra_spec)
+            fetched = True
+            return created
+
+        with timed("create", "Namespace", None, name):
+            registry.acquire(shared_object_key(ns), _ensure)
+            if not fetched:
+                # ensured by another worker, so only the local object was made here
+                ns.reload()
+        logger.debug(f"Ensured the shared namespace '{name}'.")
+        used_namespaces.append(ns)
+        return ns
+
+    yield _namespace_factory
+
+    release_and_delete_shared_objects(kube_cluster.kube_client, pykube.Namespace, used_namespaces, registry)
+
+
 def _random_ns_name() -> str:
-    return f"pytest-{''.join(random.choices(string.ascii_lowercase, k=5))}"  # nosec B311 - non-cryptographic use
+    name = f"pytest-{''.join(random.choices(string.ascii_lowercase, k=5))}"  # nosec B311 - non-cryptographic use
+    return worker_unique_name(name)
 
 
 @pytest.fixture(scope="function")
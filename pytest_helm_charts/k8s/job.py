@@ -3,10 +3,12 @@ from typing import List, Optional
 import pykube
 from pykube import Job, HTTPClient
 
-from pytest_helm_charts.utils import wait_for_objects_condition, inject_extra
+from pytest_helm_charts.failures import failure_condition_for, register_failure_condition
+from pytest_helm_charts.utils import find_condition, wait_for_objects_condition, inject_extra
 
 
-def _job_complete(job: Job) -> bool:
+def job_complete(job: Job) -> bool:
+    """Return `True` if the Job `job` has completed."""
     complete = (
         "status" in job.obj
         and "conditions" in job.obj["status"]
@@ -16,8 +18,21 @@ def _job_complete(job: Job) -> bool:
     return complete
 
 
+def _job_failed(job: Job) -> bool:
+    failed = find_condition(job, "Failed")
+    return failed is not None and failed.get("status") == "True"
+
+
+register_failure_condition(Job.kind, _job_failed)
+
+
 def wait_for_jobs_to_complete(
-    kube_client: HTTPClient, job_names: List[str], jobs_namespace: str, timeout_sec: int, missing_ok: bool = True
+    kube_client: HTTPClient,
+    job_names: List[str],
+    jobs_namespace: str,
+    timeout_sec: int,
+    missing_ok: bool = True,
+    fail_fast: Optional[bool] = None,
 ) -> List[Job]:
     """
     Block until all the Jobs are complete or timeout is reached.
@@ -30,6 +45,9 @@ def wait_for_jobs_to_complete(
         missing_ok: when `True`, the function ignores that some of the objects listed in the `job_names`
             don't exist in k8s API and waits for them to show up; when `False`, an
             [ObjectNotFound](pykube.exceptions.ObjectDoesNotExist) exception is raised.
+        fail_fast: when `True`, the function fails as soon as any of the Jobs has the `Failed` condition
+            (its back-off limit or deadline was reached); when `None`, the session's default is used (see
+            [failures](pytest_helm_charts.failures))
 
     Returns:
         The list of Job resources with all the objects listed in `job_names` included.
@@ -38,10 +56,18 @@ def wait_for_jobs_to_complete(
         TimeoutError: when timeout is reached.
         pykube.exceptions.ObjectDoesNotExist: when `missing_ok == False` and one of the objects
             listed in `job_names` can't be found in k8s API
+        ObjectStatusError: when failing fast and one of the Jobs failed.
 
     """
     result = wait_for_objects_condition(
-        kube_client, Job, job_names, jobs_namespace, _job_complete, timeout_sec, missing_ok
+        kube_client,
+        Job,
+        job_names,
+        jobs_namespace,
+        job_complete,
+        timeout_sec,
+        missing_ok,
+        failure_condition_for(Job.kind, fail_fast),
     )
     return result
 
@@ -107,6 +133,7 @@ def create_job_and_run_to_completion(
     job: pykube.Job,
     timeout_sec: int = 60,
     missing_ok: bool = False,
+    fail_fast: Optional[bool] = None,
 ) -> pykube.Job:
     """
     Creates Job object in k8s and blocks until it is completed.
@@ -119,6 +146,7 @@ def create_job_and_run_to_completion(
         missing_ok: when `True`, the function ignores that the Job doesn't yet exist in k8s API
             and waits for it to show up;
             when `False`, an [ObjectNotFound](pykube.exceptions.ObjectDoesNotExist) exception is raised.
+        fail_fast: same as in [wait_for_jobs_to_complete](wait_for_jobs_to_complete)
 
     Returns:
         The Job object with refreshed state.
@@ -126,6 +154,7 @@ def create_job_and_run_to_completion(
     Raises:
         TimeoutError: when timeout is reached.
         pykube.exceptions.ObjectDoesNotExist: when `missing_ok == False` and the `job` can't be found in k8s API
+        ObjectStatusError: when failing fast and the Job failed.
 
     """
     job.create()
@@ -136,6 +165,7 @@ def create_job_and_run_to_completion(
         namespace,
         timeout_sec,
         missing_ok=missing_ok,
+        fail_fast=fail_fast,
     )
 
     return job
@@ -0,0 +1,143 @@
+"""This module detects Pods of workloads that failed in a way they won't recover from, like containers
+in `CrashLoopBackOff` or images that can't be pulled."""
+
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Set
+
+import pykube
+from pykube import HTTPClient
+from pykube.objects import NamespacedAPIObject
+
+from pytest_helm_charts.errors import PodFailureError
+from pytest_helm_charts.utils import YamlDict
+
+# reasons of the `waiting` state of a container that won't change without fixing the Pod spec or image;
+# `ErrImagePull` is not one of them, as the first failed pull may be transient and a pull that keeps failing
+# turns into `ImagePullBackOff`, and neither is `CreateContainerConfigError`, as it's reported until
+# a Secret or ConfigMap the container uses (often created by the same chart) appears
+POD_TERMINAL_WAITING_REASONS = {
+    "CrashLoopBackOff",
+    "ImagePullBackOff",
+    "InvalidImageName",
+}
+OOM_KILLED_REASON = "OOMKilled"
+
+
+@dataclass
+class PodFailure:
+    """Class that describes why a container of a Pod failed."""
+
+    namespace: str
+    pod_name: str
+    container_name: str
+    reason: str
+    message: Optional[str] = None
+    restart_count: int = 0
+    last_termination: Optional[YamlDict] = None
+
+    def describe(self) -> str:
+        description = f"Pod '{self.namespace}/{self.pod_name}', container '{self.container_name}': {self.reason}"
+        if self.message:
+            description += f" ({self.message})"
+        if self.restart_count:
+            description += f", restarted {self.restart_count} times"
+        if self.last_termination:
+            t = self.last_termination
+            description += f"; last termination: exit code {t.get('exitCode')}, reason {t.get('reason')}"
+            if t.get("message"):
+                description += f", message: {t['message'].strip()}"
+        return description
+
+
+def find_pod_failure(pod: pykube.Pod) -> Optional[PodFailure]:
+    """
+    Check if any of the containers of the `pod` failed in a way it won't recover from.
+
+    A container failed if it's waiting for one of [POD_TERMINAL_WAITING_REASONS](POD_TERMINAL_WAITING_REASONS)
+    or it was terminated, because it ran out of memory, and is not running again. `CrashLoopBackOff` caused
+    by running out of memory is reported as `OOMKilled`.
+
+    Returns:
+        [PodFailure](PodFailure) describing the first failed container or `None` if no container failed.
+    """
+    status = pod.obj.get("status", {})
+    for container in status.get("initContainerStatuses", []) + status.get("containerStatuses", []):
+        state = container.get("state", {})
+        last_termination = container.get("lastState", {}).get("terminated")
+        reason: Optional[str] = None
+        message: Optional[str] = None
+        if state.get("waiting", {}).get("reason") in POD_TERMINAL_WAITING_REASONS:
+            reason, message = state["waiting"]["reason"], state["waiting"].get("message")
+            if reason == "CrashLoopBackOff" and (last_termination or {}).get("reason") == OOM_KILLED_REASON:
+                reason = OOM_KILLED_REASON
+        elif state.get("terminated", {}).get("reason") == OOM_KILLED_REASON:
+            reason, last_termination = OOM_KILLED_REASON, state["terminated"]
+        if reason is not None:
+            return PodFailure(
+                pod.namespace,
+                pod.name,
+                container.get("name", ""),
+                reason,
+                message,
+                int(container.get("restartCount", 0)),
+                last_termination,
+            )
+    return None
+
+
+def _owner_uids(obj: NamespacedAPIObject) -> Set[str]:
+    return {o["uid"] for o in obj.obj["metadata"].get("ownerReferences", []) if "uid" in o}
+
+
+def find_workload_pods(kube_client: HTTPClient, workload: NamespacedAPIObject) -> List[pykube.Pod]:
+    """
+    Find the Pods owned by a Deployment (through its ReplicaSets), StatefulSet or DaemonSet.
+
+    Pods are listed with the `matchLabels` of the workload's selector and then filtered by their
+    `ownerReferences`, so Pods of other workloads with the same labels are skipped.
+
+    Returns:
+        The list of Pods of the `workload`.
+    """
+    selector = workload.obj.get("spec", {}).get("selector", {}).get("matchLabels")
+    owners = {workload.obj["metadata"].get("uid")}
+    if workload.kind == pykube.Deployment.kind:
+        replica_sets = pykube.ReplicaSet.objects(kube_client).filter(namespace=workload.namespace, selector=selector)
+        owners = {rs.obj["metadata"].get("uid") for rs in replica_sets if _owner_uids(rs) & owners}
+    pods = pykube.Pod.objects(kube_client).filter(namespace=workload.namespace, selector=selector)
+    return [p for p in pods if _owner_uids(p) & owners]
+
+
+def pod_failure_condition(
+    kube_client: HTTPClient,
+    ready_func: Callable[..., bool],
+    failure_func: Optional[Callable[..., bool]] = None,
+) -> Callable[..., bool]:
+    """
+    Return a failure condition for [wait_for_objects_condition](pytest_helm_charts.utils.wait_for_objects_condition)
+    that checks Pods of workloads that are not ready yet (see [find_workload_pods](find_workload_pods)).
+
+    Args:
+        kube_client: client to use to connect to the k8s cluster
+        ready_func: function checking if a workload is ready; Pods of ready workloads are not checked
+        failure_func: optional failure condition of the workload itself, checked first
+
+    Returns:
+        The failure condition function. It raises [PodFailureError](pytest_helm_charts.errors.PodFailureError)
+        when a Pod of the workload failed.
+    """
+
+    def _workload_failed(workload: NamespacedAPIObject) -> bool:
+        if failure_func is not None and failure_func(workload):
+            return True
+        if "status" in workload.obj and ready_func(workload):
+            return False
+        for pod in find_workload_pods(kube_client, workload):
+            failure = find_pod_failure(pod)
+            if failure is not None:
+                raise PodFailureError(
+                    f"{workload.kind} '{workload.namespace}/{workload.name}' failed: {failure.describe()}.", failure
+                )
+        return False
+
+    return _workload_failed
@@ -1,22 +1,42 @@
-from typing import List
+from typing import List, Optional
 
 import pykube
 from pykube import HTTPClient
 
+from pytest_helm_charts.failures import failure_condition_for, register_failure_condition
+from pytest_helm_charts.k8s.pod import pod_failure_condition
 from pytest_helm_charts.utils import wait_for_objects_condition
 
 
-def _stateful_set_ready(sts: pykube.StatefulSet) -> bool:
+def stateful_set_ready(sts: pykube.StatefulSet) -> bool:
+    """Return `True` if all the replicas of the StatefulSet `sts` are ready."""
     complete = "readyReplicas" in sts.obj["status"] and sts.replicas == int(sts.obj["status"]["readyReplicas"])
     return complete
 
 
+def _stateful_set_failed(sts: pykube.StatefulSet) -> bool:
+    # with the `OnDelete` strategy pods are replaced only when deleted, so a stuck revision never changes
+    status = sts.obj.get("status", {})
+    return (
+        sts.obj.get("spec", {}).get("updateStrategy", {}).get("type") == "OnDelete"
+        and int(status.get("observedGeneration", 0)) >= int(sts.obj["metadata"].get("generation", 0))
+        and status.get("updateRevision", "") != status.get("currentRevision", "")
+        and int(status.get("updatedReplicas", 0)) < sts.replicas
+        and int(status.get("readyReplicas", 0)) < sts.replicas
+    )
+
+
+register_failure_condition(pykube.StatefulSet.kind, _stateful_set_failed)
+
+
 def wait_for_stateful_sets_to_run(
     kube_client: HTTPClient,
     stateful_set_names: List[str],
     stateful_sets_namespace: str,
     timeout_sec: int,
     missing_ok: bool = False,
+    fail_fast: Optional[bool] = None,
+    watch_pods: bool = False,
 ) -> List[pykube.StatefulSet]:
     """
     Block until all the StatefulSets are running or timeout is reached.
@@ -29,6 +49,12 @@ def wait_for_stateful_sets_to_run(
         missing_ok: when `True`, the function ignores that some of the objects listed in the `stateful_set_names`
             don't exist in k8s API and waits for them to show up; when `False`, an
             [ObjectNotFound](pykube.exceptions.ObjectDoesNotExist) exception is raised.
+        fail_fast: when `True`, the function fails as soon as any of the StatefulSets is not ready and its new
+            revision can't be rolled out without manual action (`OnDelete` update strategy); when `None`,
+            the session's default is used (see [failures](pytest_helm_charts.failures))
+        watch_pods: when `True`, Pods of StatefulSets that are not ready are checked too and the function fails
+            as soon as any of them fails in a way it won't recover from (see
+            [find_pod_failure](pytest_helm_charts.k8s.pod.find_pod_failure))
 
     Returns:
         The list of StatefulSet resources with all the objects listed in `stateful_set_names` included.
@@ -37,15 +63,22 @@ def wait_for_stateful_sets_to_run(
         TimeoutError: when timeout is reached.
         pykube.exceptions.ObjectDoesNotExist: when `missing_ok == False` and one of the objects
             listed in `stateful_set_names` can't be found in k8s API
+        ObjectStatusError: when failing fast and one of the StatefulSets failed.
+        PodFailureError: when `watch_pods` is set and a Pod of one of the StatefulSets failed; the error's
+            `failure` attribute is the [PodFailure](pytest_helm_charts.k8s.pod.PodFailure).
 
     """
+    failure_func = failure_condition_for(pykube.StatefulSet.kind, fail_fast)
+    if watch_pods:
+        failure_func = pod_failure_condition(kube_client, stateful_set_ready, failure_func)
     result = wait_for_objects_condition(
         kube_client,
         pykube.StatefulSet,
         stateful_set_names,
         stateful_sets_namespace,
-        _stateful_set_ready,
+        stateful_set_ready,
         timeout_sec,
         missing_ok=missing_ok,
+        failure_condition_func=failure_func,
     )
     return result
@@ -0,0 +1,59 @@
+from typing import Callable, Dict, List, Type
+
+import pykube
+from pykube import HTTPClient
+from pykube.objects import NamespacedAPIObject
+
+from pytest_helm_charts.failures import failure_condition_for
+from pytest_helm_charts.k8s.daemon_set import daemon_set_ready
+from pytest_helm_charts.k8s.deployment import deployment_running
+from pytest_helm_charts.k8s.stateful_set import stateful_set_ready
+
+HELM_MANAGED_BY_LABEL = "app.kubernetes.io/managed-by"
+HELM_MANAGED_BY_VALUE = "Helm"
+HELM_RELEASE_NAME_ANNOTATION = "meta.helm.sh/release-name"
+
+# workload types created by Helm charts and functions checking if a workload of the type is ready
+WORKLOAD_READY_FUNCS: Dict[Type[NamespacedAPIObject], Callable[..., bool]] = {
+    pykube.Deployment: deployment_running,
+    pykube.StatefulSet: stateful_set_ready,
+    pykube.DaemonSet: daemon_set_ready,
+}
+
+
+def find_helm_release_workloads(
+    kube_client: HTTPClient, release_name: str, namespace: str
+) -> List[NamespacedAPIObject]:
+    """
+    Find all the Deployments, StatefulSets and DaemonSets created by a Helm release.
+
+    Objects are selected by the `app.kubernetes.io/managed-by=Helm` label and the `meta.helm.sh/release-name`
+    annotation, which Helm sets on all the objects it manages.
+
+    Args:
+        kube_client: client to use to connect to the k8s cluster
+        release_name: name of the Helm release
+        namespace: namespace the release is deployed to
+
+    Returns:
+        The list of workloads of the release (empty, if the release has no workloads).
+    """
+    workloads: List[NamespacedAPIObject] = []
+    for workload_type in WORKLOAD_READY_FUNCS:
+        query = workload_type.objects(kube_client).filter(
+            namespace=namespace, selector={HELM_MANAGED_BY_LABEL: HELM_MANAGED_BY_VALUE}
+        )
+        workloads.extend(w for w in query if w.annotations.get(HELM_RELEASE_NAME_ANNOTATION) == release_name)
+    return workloads
+
+
+def workload_ready(workload: NamespacedAPIObject) -> bool:
+    """Return `True` if the Deployment, StatefulSet or DaemonSet `workload` is ready."""
+    return "status" in workload.obj and WORKLOAD_READY_FUNCS[type(workload)](workload)
+
+
+def workload_failed(workload: NamespacedAPIObject) -> bool:
+    """Return `True` if fail fast is enabled for the session and the `workload` failed (see
+    [failures](pytest_helm_charts.failures))."""
+    failed = failure_condition_for(workload.kind)
+    return failed is not None and failed(workload)
@@ -0,0 +1,108 @@
+"""This module runs HTTP servers in threads of the test process, so the cluster under test can fetch
+artifacts (like Helm charts and Git repositories) from the test host without publishing them anywhere."""
+
+import hashlib
+import logging
+import os
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+TServer = TypeVar("TServer", bound="LocalHTTPServer")
+# directories that are never part of served artifacts, like chart packages
+CHART_IGNORED_DIRS = {".git", ".hg", ".svn", "__pycache__"}
+
+
+# called with a path relative to the listed directory (with `/` separators) and whether it's a directory
+IgnoreFunc = Callable[[str, bool], bool]
+
+
+def directory_files(directory: Path, ignore: Optional[IgnoreFunc] = None) -> List[Path]:
+    """Return all the files in `directory`, sorted by their relative paths and skipping
+    [CHART_IGNORED_DIRS](CHART_IGNORED_DIRS) and the files and directories `ignore` returns `True` for."""
+    files: List[Path] = []
+    for root, dirs, names in os.walk(directory):
+        rel_root = Path(root).relative_to(directory).as_posix()
+        prefix = "" if rel_root == "." else f"{rel_root}/"
+        dirs[:] = sorted(
+            d for d in dirs if d not in CHART_IGNORED_DIRS and not (ignore and ignore(f"{prefix}{d}", True))
+        )
+        files.extend(Path(root) / n for n in sorted(names) if not (ignore and ignore(f"{prefix}{n}", False)))
+    return sorted(files, key=lambda f: f.relative_to(directory).as_posix())
+
+
+def directory_content_hash(directory: Path, ignore: Optional[IgnoreFunc] = None) -> str:
+    """Return a hash of the paths and contents of all the files in `directory`, skipping
+    [CHART_IGNORED_DIRS](CHART_IGNORED_DIRS) and the files and directories `ignore` returns `True` for."""
+    content_hash = hashlib.sha256()
+    for file in directory_files(directory, ignore):
+        content_hash.update(file.relative_to(directory).as_posix().encode() + b"\0")
+        content_hash.update(file.read_bytes() + b"\0")
+    return content_hash.hexdigest()
+
+
+def detect_host_address() -> str:
+    """Return the address of the interface used for the default route, falling back to the loopback one."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        try:
+            # connecting a UDP socket doesn't send anything, it only picks the interface to use
+            s.connect(("10.255.255.255", 1))
+            return s.getsockname()[0]
+        except OSError:
+            return "127.0.0.1"
+
+
+class LocalHTTPServer:
+    """
+    HTTP server running in a thread of the test process. Use it as a context manager or call
+    `start()` and `stop()`.
+
+    Args:
+        name: name of the server, used in logs and as the name of its thread
+        handler: factory of request handlers
+        host: address the server is advertised with, which needs to be reachable from the cluster;
+            detected with [detect_host_address](detect_host_address) if `None`
+        bind_address: address to listen on
+        port: port to listen on; a free one is picked if 0
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[..., BaseHTTPRequestHandler],
+        host: Optional[str] = None,
+        bind_address: str = "0.0.0.0",
+        port: int = 0,
+    ) -> None:
+        self.name = name
+        self.host = host or detect_host_address()
+        self._server = ThreadingHTTPServer((bind_address, port), handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server."""
+        return f"http://{self.host}:{self._server.server_address[1]}"
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._server.serve_forever, name=self.name, daemon=True)
+        self._thread.start()
+        logger.info(f"Started {self.name} at '{self.url}'.")
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self: TServer) -> TServer:
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
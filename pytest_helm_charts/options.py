@@ -0,0 +1,31 @@
+"""This module defines names of command line options and environment variables used to configure the plugin."""
+
+ENV_VAR_CHART_PATH = "ATS_CHART_PATH"
+ENV_VAR_CHART_VERSION = "ATS_CHART_VERSION"
+ENV_VAR_CLUSTER_TYPE = "ATS_CLUSTER_TYPE"
+ENV_VAR_CLUSTER_VERSION = "ATS_CLUSTER_VERSION"
+ENV_VAR_APP_CONFIG_PATH = "ATS_APP_CONFIG_FILE_PATH"
+ENV_VAR_KUBE_CONFIG = "KUBECONFIG"
+ENV_VAR_ATS_EXTRA_PREFIX = "ATS_EXTRA_"
+CMD_VAR_TEST_EXTRA_INFO = "test_extra_info"
+CMD_OPT_TIMING_REPORT = "helm-charts-timing-report"
+CMD_OPT_TIMING_TOP = "helm-charts-timing-top"
+CMD_OPT_OTEL_FILE = "helm-charts-otel-file"
+CMD_OPT_REUSE_APPS = "helm-charts-reuse-apps"
+CMD_OPT_CATALOG_INDEX_TTL = "helm-charts-catalog-index-ttl"
+CMD_OPT_SHARED_VALUES = "helm-charts-shared-values"
+CMD_OPT_NO_FAIL_FAST = "helm-charts-no-fail-fast"
+CMD_OPT_DIAGNOSTICS_DIR = "helm-charts-diagnostics-dir"
+CMD_OPT_APP_TIMELINE = "helm-charts-app-timeline"
+CMD_OPT_CHART_REPOSITORY_HOST = "helm-charts-chart-repository-host"
+CMD_OPT_GIT_REPOSITORY_DIR = "helm-charts-git-repository-dir"
+REUSE_APPS_OFF = "off"
+REUSE_APPS_SESSION = "session"
+REUSE_APPS_KEEP = "keep"
+
+
+def get_cmd_line_option_name_from_env_var(env_var_name: str) -> str:
+    cmd_name = env_var_name.lower()
+    if cmd_name.startswith("ats_"):
+        cmd_name = cmd_name[4:]
+    return cmd_name
@@ -0,0 +1,91 @@
+"""This module implements an OpenTelemetry span exporter writing spans to a local file in the OTLP/JSON format,
+so traces can be collected without running an OpenTelemetry collector.
+
+It requires the `opentelemetry-sdk` package (install `pytest-helm-charts[otel]`).
+"""
+
+import json
+import threading
+from typing import Any, Dict, List, Sequence
+
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from opentelemetry.util.types import Attributes
+
+
+def _encode_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # 64-bit integers are encoded as strings in OTLP/JSON
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_encode_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def _encode_attributes(attributes: Attributes) -> List[Dict[str, Any]]:
+    return [{"key": k, "value": _encode_value(v)} for k, v in (attributes or {}).items()]
+
+
+def encode_span(span: ReadableSpan) -> Dict[str, Any]:
+    """Encode a finished span as an OTLP/JSON `Span` message."""
+    assert span.context is not None
+    encoded: Dict[str, Any] = {
+        "traceId": format(span.context.trace_id, "032x"),
+        "spanId": format(span.context.span_id, "016x"),
+        "name": span.name,
+        # OTLP reserves 0 for SPAN_KIND_UNSPECIFIED, so all the SDK values are shifted by one
+        "kind": span.kind.value + 1,
+        "startTimeUnixNano": str(span.start_time),
+        "endTimeUnixNano": str(span.end_time),
+        "attributes": _encode_attributes(span.attributes),
+        "events": [
+            {"timeUnixNano": str(e.timestamp), "name": e.name, "attributes": _encode_attributes(e.attributes)}
+            for e in span.events
+        ],
+        "status": {"code": span.status.status_code.value},
+    }
+    if span.parent is not None:
+        encoded["parentSpanId"] = format(span.parent.span_id, "016x")
+    if span.status.description:
+        encoded["status"]["message"] = span.status.description
+    return encoded
+
+
+def encode_spans(spans: Sequence[ReadableSpan]) -> Dict[str, Any]:
+    """Encode spans as an OTLP/JSON `TracesData` message, grouping them by resource and instrumentation scope."""
+    resources: Dict[int, Dict[str, Any]] = {}
+    scopes: Dict[tuple, Dict[str, Any]] = {}
+    for span in spans:
+        resource_spans = resources.setdefault(
+            id(span.resource),
+            {"resource": {"attributes": _encode_attributes(span.resource.attributes)}, "scopeSpans": []},
+        )
+        scope = span.instrumentation_scope
+        scope_key = (id(span.resource), scope.name if scope else "", scope.version if scope else "")
+        if scope_key not in scopes:
+            scopes[scope_key] = {"scope": {"name": scope_key[1], "version": scope_key[2] or ""}, "spans": []}
+            resource_spans["scopeSpans"].append(scopes[scope_key])
+        scopes[scope_key]["spans"].append(encode_span(span))
+    return {"resourceSpans": list(resources.values())}
+
+
+class OtlpJsonFileExporter(SpanExporter):
+    """Span exporter that appends every exported batch of spans to a file as one line of OTLP/JSON
+    (the format used by the OpenTelemetry collector's file exporter)."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        line = json.dumps(encode_spans(spans))
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
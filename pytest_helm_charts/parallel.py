@@ -0,0 +1,162 @@
+"""This module includes tools needed to safely run tests in parallel with
+[pytest-xdist](https://pytest-xdist.readthedocs.io/)."""
+
+import fcntl
+import json
+import logging
+import os
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Protocol, Tuple
+
+import pytest
+from _pytest.tmpdir import TempPathFactory
+
+logger = logging.getLogger(__name__)
+
+ENV_VAR_XDIST_WORKER = "PYTEST_XDIST_WORKER"
+DEFAULT_WORKER_ID = "master"
+SHARED_STATE_DIR_NAME = "pytest-helm-charts-shared"
+K8S_NAME_MAX_LENGTH = 63
+
+
+def get_worker_id() -> str:
+    """Return the ID of the pytest-xdist worker running the current process (like 'gw0') or 'master'
+    if tests are not run in parallel."""
+    return os.environ.get(ENV_VAR_XDIST_WORKER, DEFAULT_WORKER_ID)
+
+
+def is_parallel_run() -> bool:
+    """Return `True` if the current process is a pytest-xdist worker."""
+    return ENV_VAR_XDIST_WORKER in os.environ
+
+
+def worker_unique_name(name: str, max_length: int = K8S_NAME_MAX_LENGTH) -> str:
+    """
+    Make a k8s object name unique for the current pytest-xdist worker.
+
+    Args:
+        name: the base name of the object
+        max_length: maximum length of the resulting name; `name` is truncated if needed to fit the worker suffix
+
+    Returns:
+        The `name` itself if tests are not run in parallel, `name` suffixed with the worker ID otherwise
+        (like 'default-gw0').
+    """
+    if not is_parallel_run():
+        return name
+    suffix = f"-{get_worker_id()}"
+    return name[: max_length - len(suffix)] + suffix
+
+
+class SharedResourceRegistry:
+    """Reference counting registry of resources shared by all the pytest-xdist workers.
+
+    The first worker that acquires a resource creates it, the last one that releases it destroys it. State
+    is kept in JSON files (one per resource key) in a directory shared by all the workers and every operation
+    is guarded by an exclusive file lock, so the registry is safe to use across processes.
+    """
+
+    def __init__(self, state_dir: Path) -> None:
+        self.state_dir = state_dir
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+
+    def _state_path(self, key: str) -> Path:
+        return self.state_dir / (re.sub(r"[^A-Za-z0-9_.-]", "_", key) + ".json")
+
+    @contextmanager
+    def _locked(self, key: str) -> Iterator[Path]:
+        state_path = self._state_path(key)
+        with open(state_path.with_suffix(".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield state_path
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def acquire(self, key: str, create_func: Callable[[], Any]) -> Any:
+        """
+        Take a reference to the resource identified by `key`, creating it first if nobody holds it yet.
+
+        Args:
+            key: unique identifier of the resource
+            create_func: function called to create the resource; its return value has to be JSON serializable
+                and is passed to every worker acquiring the same resource
+
+        Returns:
+            The value returned by `create_func` when the resource was created.
+        """
+        with self._locked(key) as state_path:
+            if state_path.exists():
+                state = json.loads(state_path.read_text())
+            else:
+                state = {"refs": 0, "data": create_func()}
+                logger.debug(f"Created shared resource '{key}' by worker '{get_worker_id()}'.")
+            state["refs"] += 1
+            state_path.write_text(json.dumps(state))
+            return state["data"]
+
+    def release(self, key: str, destroy_func: Callable[[Any], None]) -> bool:
+        """
+        Drop a reference to the resource identified by `key` and destroy it if it was the last one.
+
+        Args:
+            key: unique identifier of the resource
+            destroy_func: function called with the data returned by `create_func` to destroy the resource
+
+        Returns:
+            `True` if the resource was destroyed by this call, `False` otherwise.
+        """
+        with self._locked(key) as state_path:
+            if not state_path.exists():
+                return False
+            state = json.loads(state_path.read_text())
+            state["refs"] -= 1
+            if state["refs"] > 0:
+                state_path.write_text(json.dumps(state))
+                return False
+            try:
+                destroy_func(state["data"])
+                logger.debug(f"Destroyed shared resource '{key}' by worker '{get_worker_id()}'.")
+            finally:
+                state_path.unlink()
+            return True
+
+
+class SharedResourceFactoryFunc(Protocol):
+    def __call__(self, key: str, create_func: Callable[[], Any], destroy_func: Callable[[Any], None]) -> Any: ...
+
+
+@pytest.fixture(scope="session")
+def shared_resource_registry(tmp_path_factory: TempPathFactory) -> SharedResourceRegistry:
+    """Return the [SharedResourceRegistry](SharedResourceRegistry) common for all the pytest-xdist workers
+    of the current test session. Fixture's scope is 'session'."""
+    base_dir = tmp_path_factory.getbasetemp()
+    # all the xdist workers share the parent of their own base temp directories
+    if is_parallel_run():
+        base_dir = base_dir.parent
+    return SharedResourceRegistry(base_dir / SHARED_STATE_DIR_NAME)
+
+
+@pytest.fixture(scope="session")
+def shared_resource_factory(shared_resource_registry: SharedResourceRegistry) -> Iterable[SharedResourceFactoryFunc]:
+    """Return a factory function which creates a resource once for all the pytest-xdist workers and destroys it
+    when the last worker finishes its session. Fixture's scope is 'session'.
+
+    Examples:
+        Share one expensive object between all the workers:
+
+        >>> data = shared_resource_factory("my-catalog", create_catalog, lambda d: delete_catalog(d["name"]))
+    """
+    acquired: List[Tuple[str, Callable[[Any], None]]] = []
+
+    def _shared_resource_factory(key: str, create_func: Callable[[], Any], destroy_func: Callable[[Any], None]) -> Any:
+        data = shared_resource_registry.acquire(key, create_func)
+        acquired.append((key, destroy_func))
+        return data
+
+    yield _shared_resource_factory
+
+    for key, destroy_func in reversed(acquired):
+        shared_resource_registry.release(key, destroy_func)
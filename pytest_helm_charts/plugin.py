@@ -1,13 +1,33 @@
+"""This module is the entry point of the pytest plugin.
+
+Fixtures provided by the plugin are registered lazily: modules defining them (and their heavy dependencies,
+like `pykube`) are imported only when a test actually requests one of the fixtures. Because of that, this module
+must import only lightweight modules.
+"""
+
+import importlib
+import inspect
+from pathlib import Path
+from typing import Any, Callable, Dict, Generator, Iterable, Literal, Optional, Tuple
+
+import pytest
+from _pytest.config import Config
 from _pytest.config.argparsing import Parser
+from _pytest.main import Session
+from _pytest.nodes import Item
+from _pytest.reports import TestReport
+from _pytest.runner import CallInfo
+from _pytest.stash import StashKey
+from _pytest.terminal import TerminalReporter
 
-from pytest_helm_charts.fixtures import (  # noqa: F401
-    chart_path,
-    chart_version,
-    test_extra_info,
-    cluster_type,
-    kube_cluster,
-    kube_config,
-    values_file_path,
+# the modules below are imported when pytest starts, even in sessions that don't use any of the fixtures,
+# so they (and everything they import) must not import anything heavy, like `pykube`, `requests` or `yaml`;
+# `tests/test_plugin.py` checks that
+from pytest_helm_charts.app_timeline import recorder as app_timeline_recorder
+from pytest_helm_charts.api_calls import API_BUDGET_MARKER, counter as api_call_counter
+from pytest_helm_charts.diagnostics import collect_diagnostics, disable_diagnostics, enable_diagnostics, used_namespaces
+from pytest_helm_charts.failures import set_fail_fast_enabled
+from pytest_helm_charts.options import (
     get_cmd_line_option_name_from_env_var,
     CMD_VAR_TEST_EXTRA_INFO,
     ENV_VAR_CHART_PATH,
@@ -16,35 +36,159 @@ from pytest_helm_charts.fixtures import (  # noqa: F401
     ENV_VAR_CLUSTER_VERSION,
     ENV_VAR_KUBE_CONFIG,
     ENV_VAR_APP_CONFIG_PATH,
+    CMD_OPT_TIMING_REPORT,
+    CMD_OPT_TIMING_TOP,
+    CMD_OPT_OTEL_FILE,
+    CMD_OPT_REUSE_APPS,
+    CMD_OPT_CATALOG_INDEX_TTL,
+    CMD_OPT_SHARED_VALUES,
+    CMD_OPT_NO_FAIL_FAST,
+    CMD_OPT_DIAGNOSTICS_DIR,
+    CMD_OPT_APP_TIMELINE,
+    CMD_OPT_CHART_REPOSITORY_HOST,
+    CMD_OPT_GIT_REPOSITORY_DIR,
+    REUSE_APPS_OFF,
+    REUSE_APPS_SESSION,
+    REUSE_APPS_KEEP,
 )
-from pytest_helm_charts.flux.fixtures import (  # noqa: F401
-    flux_deployments,
-    kustomization_factory,
-    kustomization_factory_function_scope,
-    git_repository_factory,
-    git_repository_factory_function_scope,
-    helm_repository_factory,
-    helm_repository_factory_function_scope,
-    helm_release_factory,
-    helm_release_factory_function_scope,
-)
-from pytest_helm_charts.giantswarm_app_platform.apps.http_testing import (  # noqa: F401
-    gatling_app_factory,
-    stormforger_load_app_factory,
-)
-from pytest_helm_charts.giantswarm_app_platform.fixtures import (  # noqa: F401
-    app_catalog_factory,
-    app_factory,
-    app_factory_function_scope,
-    catalog_factory,
-    catalog_factory_function_scope,
-)
-from pytest_helm_charts.k8s.fixtures import (  # noqa: F401
-    namespace_factory,
-    namespace_factory_function_scope,
-    random_namespace,
-    random_namespace_function_scope,
-)
+from pytest_helm_charts.parallel import get_worker_id, is_parallel_run
+from pytest_helm_charts.timing import recorder as timing_recorder
+from pytest_helm_charts.tracing import disable_tracing, enable_tracing, set_current_span_error, traced
+
+_FIXTURES_MODULE = "pytest_helm_charts.fixtures"
+_FLUX_MODULE = "pytest_helm_charts.flux.fixtures"
+_HTTP_TESTING_MODULE = "pytest_helm_charts.giantswarm_app_platform.apps.http_testing"
+_APP_PLATFORM_MODULE = "pytest_helm_charts.giantswarm_app_platform.fixtures"
+_K8S_MODULE = "pytest_helm_charts.k8s.fixtures"
+_PARALLEL_MODULE = "pytest_helm_charts.parallel"
+
+API_CALLS_PROPERTY = "k8s_api_calls"
+_api_calls_start_key = StashKey[int]()
+
+FixtureScope = Literal["session", "module", "function"]
+
+# fixture name: (module defining the fixture, fixture's scope, names of fixtures it requests)
+LAZY_FIXTURES: Dict[str, Tuple[str, FixtureScope, Tuple[str, ...]]] = {
+    "chart_path": (_FIXTURES_MODULE, "module", ("pytestconfig",)),
+    "chart_version": (_FIXTURES_MODULE, "module", ("pytestconfig",)),
+    "chart_repository": (_FIXTURES_MODULE, "session", ("pytestconfig", "tmp_path_factory")),
+    "git_server": (_FIXTURES_MODULE, "session", ("pytestconfig", "tmp_path_factory")),
+    "cluster_type": (_FIXTURES_MODULE, "module", ("pytestconfig",)),
+    "cluster_version": (_FIXTURES_MODULE, "module", ("pytestconfig",)),
+    "values_file_path": (_FIXTURES_MODULE, "module", ("pytestconfig",)),
+    "kube_config": (_FIXTURES_MODULE, "module", ("pytestconfig",)),
+    "test_extra_info": (_FIXTURES_MODULE, "module", ("pytestconfig",)),
+    "kube_cluster": (_FIXTURES_MODULE, "module", ("kube_config",)),
+    "flux_discovery_cache": (_FLUX_MODULE, "session", ()),
+    "flux_installation": (_FLUX_MODULE, "module", ("kube_cluster", "flux_discovery_cache")),
+    "flux_deployments": (_FLUX_MODULE, "module", ("flux_installation",)),
+    "kustomization_factory": (_FLUX_MODULE, "module", ("kube_cluster", "namespace_factory")),
+    "kustomization_factory_function_scope": (_FLUX_MODULE, "function", ("kube_cluster", "namespace_factory")),
+    "git_repository_factory": (_FLUX_MODULE, "module", ("kube_cluster", "namespace_factory")),
+    "git_repository_factory_function_scope": (_FLUX_MODULE, "function", ("kube_cluster", "namespace_factory")),
+    "helm_repository_factory": (_FLUX_MODULE, "module", ("kube_cluster", "namespace_factory")),
+    "helm_repository_factory_function_scope": (_FLUX_MODULE, "function", ("kube_cluster", "namespace_factory")),
+    "chart_helm_repository": (_FLUX_MODULE, "module", ("helm_repository_factory", "chart_repository")),
+    "local_git_repository": (_FLUX_MODULE, "module", ("git_repository_factory", "git_server")),
+    "helm_release_factory": (_FLUX_MODULE, "module", ("kube_cluster", "namespace_factory")),
+    "helm_release_factory_function_scope": (_FLUX_MODULE, "function", ("kube_cluster", "namespace_factory")),
+    "helm_release_graph_factory": (_FLUX_MODULE, "module", ("kube_cluster", "namespace_factory")),
+    "helm_release_graph_factory_function_scope": (_FLUX_MODULE, "function", ("kube_cluster", "namespace_factory")),
+    "flux_suspender": (_FLUX_MODULE, "module", ("kube_cluster",)),
+    "flux_suspender_function_scope": (_FLUX_MODULE, "function", ("kube_cluster",)),
+    "gatling_app_factory": (_HTTP_TESTING_MODULE, "module", ("kube_cluster", "app_factory", "namespace_factory")),
+    "stormforger_load_app_factory": (_HTTP_TESTING_MODULE, "module", ("app_factory",)),
+    "app_catalog_factory": (_APP_PLATFORM_MODULE, "module", ("kube_cluster",)),
+    "catalog_index_cache": (_APP_PLATFORM_MODULE, "session", ("pytestconfig", "tmp_path_factory")),
+    "chart_catalog": (_APP_PLATFORM_MODULE, "module", ("catalog_factory", "chart_repository")),
+    "catalog_factory": (
+        _APP_PLATFORM_MODULE,
+        "module",
+        ("kube_cluster", "namespace_factory", "shared_resource_registry", "catalog_index_cache"),
+    ),
+    "catalog_factory_function_scope": (
+        _APP_PLATFORM_MODULE,
+        "function",
+        ("kube_cluster", "namespace_factory", "shared_resource_registry", "catalog_index_cache"),
+    ),
+    "reusable_app_registry": (_APP_PLATFORM_MODULE, "session", ("pytestconfig",)),
+    "values_config_map_store": (_APP_PLATFORM_MODULE, "session", ("pytestconfig",)),
+    "app_factory": (
+        _APP_PLATFORM_MODULE,
+        "module",
+        (
+            "kube_cluster",
+            "catalog_factory",
+            "namespace_factory",
+            "reusable_app_registry",
+            "catalog_index_cache",
+            "values_config_map_store",
+        ),
+    ),
+    "app_factory_function_scope": (
+        _APP_PLATFORM_MODULE,
+        "function",
+        (
+            "kube_cluster",
+            "catalog_factory",
+            "namespace_factory",
+            "reusable_app_registry",
+            "catalog_index_cache",
+            "values_config_map_store",
+        ),
+    ),
+    "batch_app_factory": (
+        _APP_PLATFORM_MODULE,
+        "module",
+        ("kube_cluster", "catalog_factory", "namespace_factory", "catalog_index_cache", "values_config_map_store"),
+    ),
+    "batch_app_factory_function_scope": (
+        _APP_PLATFORM_MODULE,
+        "function",
+        ("kube_cluster", "catalog_factory", "namespace_factory", "catalog_index_cache", "values_config_map_store"),
+    ),
+    "namespace_factory": (_K8S_MODULE, "module", ("kube_cluster", "shared_resource_registry")),
+    "namespace_factory_function_scope": (_K8S_MODULE, "function", ("kube_cluster", "shared_resource_registry")),
+    "random_namespace": (_K8S_MODULE, "module", ("namespace_factory",)),
+    "random_namespace_function_scope": (_K8S_MODULE, "function", ("namespace_factory",)),
+    "shared_resource_registry": (_PARALLEL_MODULE, "session", ("tmp_path_factory",)),
+    "shared_resource_factory": (_PARALLEL_MODULE, "session", ("shared_resource_registry",)),
+}
+
+
+def load_fixture_function(fixture_name: str) -> Callable[..., Any]:
+    """Import the module defining the fixture `fixture_name` and return the plain function implementing it."""
+    module_name = LAZY_FIXTURES[fixture_name][0]
+    return inspect.unwrap(getattr(importlib.import_module(module_name), fixture_name))
+
+
+_lazy_fixture_functions: Dict[str, Callable[..., Any]] = {}
+
+
+def _make_lazy_fixture(fixture_name: str) -> Any:
+    module_name, scope, arg_names = LAZY_FIXTURES[fixture_name]
+
+    def _lazy_fixture(**kwargs: Any) -> Iterable[Any]:
+        result = load_fixture_function(fixture_name)(**kwargs)
+        if inspect.isgenerator(result):
+            yield from result
+        else:
+            yield result
+
+    _lazy_fixture.__name__ = fixture_name
+    _lazy_fixture.__doc__ = f"See [{fixture_name}]({module_name}.{fixture_name})."
+    # pytest finds out which fixtures to pass to the function by checking its signature
+    setattr(
+        _lazy_fixture,
+        "__signature__",
+        inspect.Signature([inspect.Parameter(n, inspect.Parameter.KEYWORD_ONLY) for n in arg_names]),
+    )
+    _lazy_fixture_functions[fixture_name] = _lazy_fixture
+    return pytest.fixture(scope=scope, name=fixture_name)(_lazy_fixture)
+
+
+for _fixture_name in LAZY_FIXTURES:
+    globals()[_fixture_name] = _make_lazy_fixture(_fixture_name)
 
 
 def _get_cmd_line_option_full_name(env_var_name: str) -> str:
@@ -88,3 +232,207 @@ def pytest_addoption(parser: Parser) -> None:
         action="store",
         help="Pass any additional info about the test in the 'key1=val1,key2=val2' format",
     )
+    group.addoption(
+        "--" + CMD_OPT_TIMING_REPORT,
+        action="store",
+        metavar="PATH",
+        help="Write timings of all the create, wait and delete operations to a JSON lines file.",
+    )
+    group.addoption(
+        "--" + CMD_OPT_TIMING_TOP,
+        action="store",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Show N slowest create, wait and delete operations in the terminal summary (disabled by default).",
+    )
+    group.addoption(
+        "--" + CMD_OPT_OTEL_FILE,
+        action="store",
+        metavar="PATH",
+        help="Write OpenTelemetry spans of tests, operations on objects and API requests to an OTLP/JSON file. "
+        "Requires the 'otel' extra.",
+    )
+    group.addoption(
+        "--" + CMD_OPT_REUSE_APPS,
+        action="store",
+        choices=[REUSE_APPS_OFF, REUSE_APPS_SESSION, REUSE_APPS_KEEP],
+        default=REUSE_APPS_OFF,
+        help="Reuse apps deployed with the same configuration by 'app_factory' in many test modules: "
+        f"'{REUSE_APPS_SESSION}' deletes them at the end of the session, '{REUSE_APPS_KEEP}' leaves them "
+        "deployed, so the next test runs can reuse them too.",
+    )
+    group.addoption(
+        "--" + CMD_OPT_CATALOG_INDEX_TTL,
+        action="store",
+        type=int,
+        default=0,
+        metavar="SEC",
+        help="Validate app versions against catalog 'index.yaml' files before apps are created and cache "
+        "the files for SEC seconds before revalidating them (disabled by default).",
+    )
+    group.addoption(
+        "--" + CMD_OPT_SHARED_VALUES,
+        action="store_true",
+        default=False,
+        help="Store values of apps created by 'app_factory' and 'batch_app_factory' in ConfigMaps named by "
+        "a hash of the values, shared by all the apps in a namespace configured with the same values.",
+    )
+    group.addoption(
+        "--" + CMD_OPT_NO_FAIL_FAST,
+        action="store_true",
+        default=False,
+        help="Don't fail waiting for objects as soon as they fail in a way they can't recover from (like "
+        "Deployments exceeding their progress deadline or failed Jobs); wait until the timeout instead.",
+    )
+    group.addoption(
+        "--" + CMD_OPT_DIAGNOSTICS_DIR,
+        action="store",
+        default=None,
+        help="Collect Events, Pod statuses and logs and App and Flux CR statuses of namespaces used by failed "
+        "tests and waits into a directory per test under this path.",
+    )
+    group.addoption(
+        "--" + CMD_OPT_APP_TIMELINE,
+        action="store",
+        default=None,
+        help="Watch namespaces of all the App CRs created in the session and write their statuses, with the time "
+        "they were first reported, and percentiles of the latencies between them to this JSON file and show "
+        "the percentiles in the summary.",
+    )
+    group.addoption(
+        "--" + CMD_OPT_CHART_REPOSITORY_HOST,
+        action="store",
+        default=None,
+        metavar="HOST",
+        help="Address advertised by the Helm repository serving the chart under test from the test process. "
+        "It needs to be reachable from the cluster (by default, the address of the default route's interface).",
+    )
+    group.addoption(
+        "--" + CMD_OPT_GIT_REPOSITORY_DIR,
+        action="store",
+        default=None,
+        metavar="PATH",
+        help="Directory served as a Git repository from the test process by the 'git_server' fixture "
+        "(by default, the chart under test). The advertised address is the same as of the chart repository.",
+    )
+
+
+def pytest_configure(config: Config) -> None:
+    config.addinivalue_line(
+        "markers",
+        f"{API_BUDGET_MARKER}(max_requests): fail the test if it sends more than 'max_requests' requests to "
+        "the Kubernetes API server during its setup and call",
+    )
+    # show full docs of the fixtures when they are listed, even if it means importing all of them
+    if config.getoption("showfixtures", False) or config.getoption("show_fixtures_per_test", False):
+        for fixture_name, lazy_fixture in _lazy_fixture_functions.items():
+            lazy_fixture.__doc__ = load_fixture_function(fixture_name).__doc__
+    set_fail_fast_enabled(not config.getoption(CMD_OPT_NO_FAIL_FAST.replace("-", "_"), False))
+    diagnostics_dir = config.getoption(CMD_OPT_DIAGNOSTICS_DIR.replace("-", "_"), None)
+    if diagnostics_dir:
+        enable_diagnostics(Path(diagnostics_dir))
+    if config.getoption(CMD_OPT_APP_TIMELINE.replace("-", "_"), None):
+        app_timeline_recorder.start_watching()
+    otel_path = config.getoption(CMD_OPT_OTEL_FILE.replace("-", "_"), None)
+    if otel_path:
+        if is_parallel_run():
+            otel_path = f"{otel_path}.{get_worker_id()}"
+        try:
+            enable_tracing(otel_path)
+        except ImportError as e:
+            raise pytest.UsageError(
+                f"Option '--{CMD_OPT_OTEL_FILE}' requires OpenTelemetry SDK: pip install 'pytest-helm-charts[otel]' "
+                f"({e})."
+            )
+
+
+def pytest_unconfigure(config: Config) -> None:
+    disable_tracing()
+    disable_diagnostics()
+    set_fail_fast_enabled(True)
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_protocol(item: Item, nextitem: Optional[Item]) -> Generator[None, object, object]:
+    timing_recorder.current_node_id = item.nodeid
+    item.stash[_api_calls_start_key] = len(api_call_counter.calls)
+    try:
+        with traced(item.nodeid, {"test.node_id": item.nodeid, "test.name": item.name}):
+            return (yield)
+    finally:
+        timing_recorder.current_node_id = None
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item: Item) -> Generator[None, object, object]:
+    result = yield
+    marker = item.get_closest_marker(API_BUDGET_MARKER)
+    if marker is not None:
+        max_requests = marker.kwargs.get("max_requests", marker.args[0] if marker.args else None)
+        if max_requests is None:
+            raise pytest.UsageError(f"Marker '{API_BUDGET_MARKER}' requires the 'max_requests' argument.")
+        used = api_call_counter.count_since(item.stash[_api_calls_start_key])
+        if used > max_requests:
+            pytest.fail(f"Test sent {used} requests to the Kubernetes API server, its budget is {max_requests}.")
+    return result
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_makereport(item: Item, call: CallInfo[None]) -> Generator[None, TestReport, TestReport]:
+    # user properties are copied into the report, so they have to be set before it's created
+    if call.when == "teardown" and _api_calls_start_key in item.stash:
+        summary = api_call_counter.summary(item.stash[_api_calls_start_key])
+        if summary["total"] > 0:
+            item.user_properties.append((API_CALLS_PROPERTY, summary))
+    report = yield
+    if report.failed:
+        set_current_span_error(f"test failed in {report.when}")
+        # collected before teardown, which deletes the objects
+        kube_cluster = getattr(item, "funcargs", {}).get("kube_cluster")
+        if report.when != "teardown" and kube_cluster is not None and kube_cluster.kube_client is not None:
+            collect_diagnostics(kube_cluster.kube_client, used_namespaces(item.nodeid), f"test failed in {report.when}")
+    return report
+
+
+def pytest_sessionfinish(session: Session, exitstatus: int) -> None:
+    report_path = session.config.getoption(CMD_OPT_TIMING_REPORT.replace("-", "_"))
+    if report_path and timing_recorder.spans:
+        if is_parallel_run():
+            report_path = f"{report_path}.{get_worker_id()}"
+        timing_recorder.write_jsonl(report_path)
+    timeline_path = session.config.getoption(CMD_OPT_APP_TIMELINE.replace("-", "_"), None)
+    app_timeline_recorder.stop_watching()
+    if timeline_path and app_timeline_recorder.timelines:
+        if is_parallel_run():
+            timeline_path = f"{timeline_path}.{get_worker_id()}"
+        app_timeline_recorder.write_json(timeline_path)
+
+
+def pytest_terminal_summary(terminalreporter: TerminalReporter) -> None:
+    timeline_path = terminalreporter.config.getoption(CMD_OPT_APP_TIMELINE.replace("-", "_"), None)
+    if timeline_path and app_timeline_recorder.timelines:
+        _write_app_timeline_summary(terminalreporter)
+    top = terminalreporter.config.getoption(CMD_OPT_TIMING_TOP.replace("-", "_"))
+    if top <= 0 or not timing_recorder.spans:
+        return
+    terminalreporter.write_sep("=", f"pytest-helm-charts: {top} slowest operations")
+    for span in timing_recorder.slowest(top):
+        obj_name = f"{span.namespace}/{span.name}" if span.namespace else span.name
+        status = f" [{span.error}]" if span.error else ""
+        slowest_objects = span.details.get("slowest_objects")
+        if slowest_objects:
+            status += f" slowest object: {slowest_objects[0]['name']}"
+        terminalreporter.write_line(
+            f"{span.duration_sec:8.2f}s {span.operation:<7} {span.kind} {obj_name}{status} ({span.node_id or '-'})"
+        )
+
+
+def _write_app_timeline_summary(terminalreporter: TerminalReporter) -> None:
+    summary = app_timeline_recorder.summary()
+    terminalreporter.write_sep(
+        "=", f"pytest-helm-charts: App status latencies ({len(app_timeline_recorder.timelines)} apps)"
+    )
+    for transition, stats in summary.items():
+        percentiles = " ".join(f"{k}={v:.1f}s" for k, v in stats.items() if k != "count")
+        terminalreporter.write_line(f"{transition:<40} n={int(stats['count']):<4} {percentiles}")
@@ -0,0 +1,83 @@
+"""This module records how long operations on Kubernetes objects (creating, waiting and deleting) take,
+so the slowest ones can be shown in the terminal summary and all of them saved to a JSON lines report."""
+
+import json
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, field
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
+
+from pytest_helm_charts.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TimingSpan:
+    """Class that represents a single timed operation on one or more Kubernetes objects."""
+
+    operation: str
+    kind: str
+    namespace: Optional[str]
+    name: str
+    node_id: Optional[str]
+    start: float
+    duration_sec: float = 0.0
+    error: Optional[str] = None
+    # operation specific data, like the slowest objects of a wait
+    details: Dict[str, Any] = field(default_factory=dict)
+
+
+class TimingRecorder:
+    """Collects [TimingSpan](TimingSpan) objects for all the operations executed in the current process."""
+
+    def __init__(self) -> None:
+        self.spans: List[TimingSpan] = []
+        self.current_node_id: Optional[str] = None
+
+    @contextmanager
+    def span(self, operation: str, kind: str, namespace: Optional[str], name: str) -> Iterator[TimingSpan]:
+        """
+        Time the operation executed in the `with` block.
+
+        Args:
+            operation: type of the operation, like 'create', 'wait' or 'delete'
+            kind: kind of the Kubernetes objects the operation is executed on
+            namespace: namespace of the objects or `None` for cluster scope objects
+            name: name of the object (or comma separated names, if there's more of them)
+
+        Returns:
+            The [TimingSpan](TimingSpan) that will be recorded when the block ends.
+        """
+        span = TimingSpan(operation, kind, namespace, name, self.current_node_id, time.time())
+        start = time.perf_counter()
+        attributes = {"k8s.operation": operation, "k8s.kind": kind, "k8s.namespace.name": namespace, "k8s.name": name}
+        try:
+            with traced(f"{operation} {kind}", attributes):
+                yield span
+        except Exception as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            span.duration_sec = time.perf_counter() - start
+            self.spans.append(span)
+            logger.debug(f"Operation '{operation}' on {kind} '{namespace}/{name}' took {span.duration_sec:.2f} s.")
+
+    def slowest(self, count: int) -> List[TimingSpan]:
+        """Return `count` of the slowest recorded spans, the slowest first."""
+        return sorted(self.spans, key=lambda s: s.duration_sec, reverse=True)[:count]
+
+    def write_jsonl(self, path: str) -> None:
+        """Write all the recorded spans to the file in `path`, one JSON object per line."""
+        with open(path, "w") as f:
+            for span in self.spans:
+                f.write(json.dumps(asdict(span)) + "\n")
+
+
+recorder = TimingRecorder()
+
+
+def timed(operation: str, kind: str, namespace: Optional[str], name: str) -> ContextManager[TimingSpan]:
+    """Shortcut for [TimingRecorder.span](TimingRecorder.span) of the global recorder."""
+    return recorder.span(operation, kind, namespace, name)
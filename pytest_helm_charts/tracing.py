@@ -0,0 +1,101 @@
+"""This module emits optional OpenTelemetry spans for tests, operations on Kubernetes objects and requests sent
+to the Kubernetes API server.
+
+Tracing is disabled unless [enable_tracing](enable_tracing) is called (the plugin does that when the
+`--helm-charts-otel-file` option is used). This module is imported when pytest starts, so `opentelemetry`
+itself is imported only when tracing is enabled.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+SERVICE_NAME = "pytest-helm-charts"
+_TRACER_NAME = "pytest_helm_charts"
+
+_provider: Optional[Any] = None
+_tracer: Optional[Any] = None
+
+
+def enable_tracing(path: str) -> None:
+    """
+    Start exporting spans to a local file in the OTLP/JSON format.
+
+    Args:
+        path: path of the file to write spans to; it's truncated if it already exists
+
+    Raises:
+        ImportError: if the `opentelemetry-sdk` package is not installed.
+    """
+    global _provider, _tracer
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    from pytest_helm_charts.otlp_json import OtlpJsonFileExporter
+
+    open(path, "w").close()
+    # a private provider is used, so a global one configured by the tests themselves is left untouched
+    _provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+    _provider.add_span_processor(BatchSpanProcessor(OtlpJsonFileExporter(path)))
+    _tracer = _provider.get_tracer(_TRACER_NAME)
+
+
+def disable_tracing() -> None:
+    """Flush all the pending spans and stop tracing."""
+    global _provider, _tracer
+    if _provider is not None:
+        _provider.shutdown()
+    _provider = None
+    _tracer = None
+
+
+def is_tracing_enabled() -> bool:
+    return _tracer is not None
+
+
+@contextmanager
+def traced(name: str, attributes: Dict[str, Any]) -> Iterator[None]:
+    """Trace the code executed in the `with` block as a span called `name`; does nothing if tracing is disabled.
+
+    Attributes with `None` values are skipped.
+    """
+    if _tracer is None:
+        yield
+        return
+    with _tracer.start_as_current_span(name, attributes={k: v for k, v in attributes.items() if v is not None}):
+        yield
+
+
+def set_current_span_error(description: str) -> None:
+    """Mark the currently active span as failed; does nothing if tracing is disabled."""
+    if _tracer is None:
+        return
+    from opentelemetry.trace import Status, StatusCode, get_current_span
+
+    get_current_span().set_status(Status(StatusCode.ERROR, description))
+
+
+def record_http_request(
+    method: str, url: str, status_code: int, latency_sec: float, attributes: Dict[str, Any]
+) -> None:
+    """Record a span of an HTTP request that has just finished; does nothing if tracing is disabled."""
+    if _tracer is None:
+        return
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+
+    end_time = time.time_ns()
+    span = _tracer.start_span(
+        f"HTTP {method}",
+        kind=SpanKind.CLIENT,
+        start_time=end_time - int(latency_sec * 1e9),
+        attributes={
+            "http.request.method": method,
+            "url.full": url,
+            "http.response.status_code": status_code,
+            **{k: v for k, v in attributes.items() if v is not None},
+        },
+    )
+    if status_code >= 400:
+        span.set_status(Status(StatusCode.ERROR))
+    span.end(end_time=end_time)
@@ -1,16 +1,26 @@
 """Different utilities required over the whole testing lib."""
 
+import json
 import logging
 import time
-from typing import Dict, Any, List, TypeVar, Callable, Type, Optional, Iterable
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, TypeVar, Callable, Type, Optional, Iterable, Tuple
 
 import pykube.exceptions
 from pykube import HTTPClient
 
 from pytest_helm_charts.clusters import Cluster
+from pytest_helm_charts.diagnostics import collect_diagnostics
 from pytest_helm_charts.errors import WaitTimeoutError, ObjectStatusError
+from pytest_helm_charts.parallel import SharedResourceRegistry
+from pytest_helm_charts.timing import timed
 
 DEFAULT_DELETE_TIMEOUT_SEC = 120
+# Ask the API server for metadata only; servers that don't support it fall back to the full JSON object.
+PARTIAL_OBJECT_METADATA_ACCEPT = "application/json;as=PartialObjectMetadata;g=meta.k8s.io;v=v1,application/json"
+
+WAIT_SLOWEST_OBJECTS_COUNT = 3
+WAIT_STATUS_MAX_LENGTH = 200
 
 YamlDict = Dict[str, Any]
 
@@ -22,7 +32,52 @@ FactoryFunc = Callable[..., T]
 MetaFactoryFunc = Callable[[pykube.HTTPClient, List[T]], FactoryFunc]
 
 
-def wait_for_objects_condition(  # noqa: C901
+@dataclass
+class ObjectWaitStats:
+    """Class that represents what was observed about a single object while waiting for its condition.
+
+    Times are in seconds since the wait started; they are `None` if the object was never seen or never
+    passed the condition (or stopped passing it before the wait ended).
+    """
+
+    name: str
+    first_seen_sec: Optional[float] = None
+    ready_sec: Optional[float] = None
+    last_status: Optional[YamlDict] = None
+
+    def describe(self) -> str:
+        if self.first_seen_sec is None:
+            return f"'{self.name}' (never found)"
+        if self.ready_sec is None:
+            status = json.dumps(self.last_status, default=str)
+            if len(status) > WAIT_STATUS_MAX_LENGTH:
+                status = status[:WAIT_STATUS_MAX_LENGTH] + "..."
+            return f"'{self.name}' (not ready, found after {self.first_seen_sec:.1f} s, last status: {status})"
+        return f"'{self.name}' (ready after {self.ready_sec:.1f} s)"
+
+
+@dataclass
+class WaitStats:
+    """Class that represents the result of waiting for a condition of many objects of the same kind."""
+
+    kind: str
+    namespace: Optional[str]
+    duration_sec: float = 0.0
+    objects: List[ObjectWaitStats] = field(default_factory=list)
+
+    def slowest(self, count: int) -> List[ObjectWaitStats]:
+        """Return `count` objects that took longest to become ready, objects that never got ready first."""
+        return sorted(
+            self.objects,
+            key=lambda o: (o.ready_sec is None, o.ready_sec or 0.0, o.first_seen_sec is None),
+            reverse=True,
+        )[:count]
+
+    def describe(self, count: int = 3) -> str:
+        return "slowest objects: " + ", ".join(o.describe() for o in self.slowest(count))
+
+
+def wait_for_objects_condition(
     kube_client: HTTPClient,
     obj_type: Type[T],
     obj_names: List[str],
@@ -60,16 +115,86 @@ def wait_for_objects_condition(  # noqa: C901
         The list of object resources with all the objects listed in `obj_names` included in the list.
 
     Raises:
-        TimeoutError: when timeout is reached.
+        TimeoutError: when timeout is reached. The message lists the slowest objects and the exception's
+            `wait_stats` attribute holds [WaitStats](WaitStats) of the wait.
         pykube.exceptions.ObjectDoesNotExist: when `missing_ok == False` and one of the objects
             listed in `obj_names` can't be found in k8s API
         ObjectStatusError: when `failure_condition_func` is not None and any of the objects in `obj_names`
             returned `True` from this function.
 
     """
+    objects, _ = wait_for_objects_condition_with_stats(
+        kube_client,
+        obj_type,
+        obj_names,
+        objs_namespace,
+        obj_condition_func,
+        timeout_sec,
+        missing_ok,
+        failure_condition_func,
+    )
+    return objects
+
+
+def wait_for_objects_condition_with_stats(
+    kube_client: HTTPClient,
+    obj_type: Type[T],
+    obj_names: List[str],
+    objs_namespace: Optional[str],
+    obj_condition_func: Callable[[T], bool],
+    timeout_sec: int,
+    missing_ok: bool,
+    failure_condition_func: Optional[Callable[[T], bool]] = None,
+) -> Tuple[List[T], WaitStats]:
+    """
+    Same as [wait_for_objects_condition](wait_for_objects_condition), but also returns what was observed
+    about each of the objects: when it was first found, when it passed the condition and its last status.
+
+    Returns:
+        A tuple of the list of object resources and [WaitStats](WaitStats) of the wait.
+    """
     if len(obj_names) == 0:
         raise ValueError("'obj_names' list can't be empty.")
 
+    stats = WaitStats(obj_type.kind, objs_namespace, objects=[ObjectWaitStats(name) for name in obj_names])
+    start = time.monotonic()
+    with timed("wait", obj_type.kind, objs_namespace, ",".join(obj_names)) as span:
+        try:
+            objects = _poll_objects_condition(
+                kube_client,
+                obj_type,
+                objs_namespace,
+                obj_condition_func,
+                timeout_sec,
+                missing_ok,
+                failure_condition_func,
+                stats,
+                start,
+            )
+        except (TimeoutError, WaitTimeoutError, ObjectStatusError) as e:
+            if objs_namespace is not None:
+                collect_diagnostics(kube_client, [objs_namespace], f"waiting for {obj_type.kind} failed: {e}")
+            raise
+        finally:
+            stats.duration_sec = time.monotonic() - start
+            span.details["slowest_objects"] = [
+                {"name": o.name, "first_seen_sec": o.first_seen_sec, "ready_sec": o.ready_sec}
+                for o in stats.slowest(WAIT_SLOWEST_OBJECTS_COUNT)
+            ]
+        return objects, stats
+
+
+def _poll_objects_condition(
+    kube_client: HTTPClient,
+    obj_type: Type[T],
+    objs_namespace: Optional[str],
+    obj_condition_func: Callable[[T], bool],
+    timeout_sec: int,
+    missing_ok: bool,
+    failure_condition_func: Optional[Callable[[T], bool]],
+    stats: WaitStats,
+    start: float,
+) -> List[T]:
     retries = 0
     all_ready = False
     matching_objs: List[T] = []
@@ -79,33 +204,53 @@ def wait_for_objects_condition(  # noqa: C901
             response = response.filter(namespace=objs_namespace)
         retries += 1
         matching_objs = []
-        for name in obj_names:
+        for obj_stats in stats.objects:
             try:
-                obj = response.get_by_name(name)
-                failed = failure_condition_func and failure_condition_func(obj)
-                if failed:
-                    raise ObjectStatusError(
-                        f"Object's '{obj.namespace}/{obj.name}' status shows failure when waiting "
-                        f"for the object's condition to pass."
-                    )
-                matching_objs.append(obj)
+                obj = response.get_by_name(obj_stats.name)
             except pykube.exceptions.ObjectDoesNotExist:
                 if missing_ok:
-                    pass
-                else:
-                    raise
+                    continue
+                raise
+            _check_wait_object(obj, obj_stats, obj_condition_func, failure_condition_func, time.monotonic() - start)
+            matching_objs.append(obj)
 
-        all_ready = len(matching_objs) == len(obj_names) and all(obj_condition_func(obj) for obj in matching_objs)
+        all_ready = len(matching_objs) == len(stats.objects) and all(o.ready_sec is not None for o in stats.objects)
         if all_ready:
             break
         time.sleep(1)
 
     if not all_ready:
-        raise TimeoutError(f"Error waiting for object of type {obj_type} to match the condition.")
+        error = TimeoutError(f"Error waiting for object of type {obj_type} to match the condition; {stats.describe()}.")
+        # the exact exception type is kept for backward compatibility, so stats are attached as an attribute
+        setattr(error, "wait_stats", stats)
+        raise error
 
     return matching_objs
 
 
+def _check_wait_object(
+    obj: T,
+    obj_stats: ObjectWaitStats,
+    obj_condition_func: Callable[[T], bool],
+    failure_condition_func: Optional[Callable[[T], bool]],
+    now: float,
+) -> None:
+    """Update `obj_stats` with the latest state of `obj`; raise if the object reports a failure."""
+    if obj_stats.first_seen_sec is None:
+        obj_stats.first_seen_sec = now
+    raw_obj = getattr(obj, "obj", None)
+    obj_stats.last_status = raw_obj.get("status") if isinstance(raw_obj, dict) else None
+    if failure_condition_func and failure_condition_func(obj):
+        raise ObjectStatusError(
+            f"Object's '{obj.namespace}/{obj.name}' status shows failure when waiting "
+            f"for the object's condition to pass."
+        )
+    if not obj_condition_func(obj):
+        obj_stats.ready_sec = None
+    elif obj_stats.ready_sec is None:
+        obj_stats.ready_sec = now
+
+
 def inject_extra(
     cr_dict: YamlDict,
     extra_metadata: Optional[YamlDict] = None,
@@ -139,29 +284,98 @@ def delete_and_wait_for_objects(
     Returns: None
 
     """
-    for kube_object in objects_to_del:
-        kube_object.delete()
-        obj_name = f"{kube_object.namespace}/{kube_object.name}" if kube_object.namespace else kube_object.name
-        logger.debug(f"Deleted object of kind '{obj_type}' named '{obj_name}'.")
-
-    any_exists = True
-    times = 0
-    while any_exists:
-        if times >= timeout_sec:
-            raise WaitTimeoutError(f"timeout of {timeout_sec} s exceeded while waiting for objects to be deleted")
-        any_exists = False
-        for o in objects_to_del:
-            objects_method = getattr(obj_type, "objects")
-            objects_res = (
-                objects_method(kube_client, namespace=o.namespace)
-                if "namespace" in o.metadata
-                else objects_method(kube_client)
-            )
-            if objects_res.get_or_none(name=o.name):
-                any_exists = True
-                time.sleep(1)
-                times += 1
-                break
+    objects_to_del = list(objects_to_del)
+    if len(objects_to_del) == 0:
+        return
+    namespaces = sorted({str(o.namespace) for o in objects_to_del if o.namespace})
+    names = ",".join(str(o.name) for o in objects_to_del)
+    with timed("delete", obj_type.kind, ",".join(namespaces) or None, names):
+        for kube_object in objects_to_del:
+            kube_object.delete()
+            obj_name = f"{kube_object.namespace}/{kube_object.name}" if kube_object.namespace else kube_object.name
+            logger.debug(f"Deleted object of kind '{obj_type}' named '{obj_name}'.")
+
+        any_exists = True
+        times = 0
+        while any_exists:
+            if times >= timeout_sec:
+                raise WaitTimeoutError(f"timeout of {timeout_sec} s exceeded while waiting for objects to be deleted")
+            any_exists = False
+            for o in objects_to_del:
+                if object_exists(o):
+                    any_exists = True
+                    time.sleep(1)
+                    times += 1
+                    break
+
+
+def find_condition(kube_object: pykube.objects.APIObject, condition_type: str) -> Optional[YamlDict]:
+    """Return the status condition of the `condition_type` of the object or `None` if it has no such condition."""
+    for condition in kube_object.obj.get("status", {}).get("conditions") or []:
+        if condition.get("type") == condition_type:
+            return condition
+    return None
+
+
+def object_exists(kube_object: pykube.objects.APIObject) -> bool:
+    """
+    Check if the object is still present in the k8s API server.
+
+    Only the object's metadata is requested (as `PartialObjectMetadata`), so the check costs a few hundred bytes
+    no matter how big the object itself is.
+
+    Args:
+        kube_object: the [APIObject](pykube.objects.APIObject) to check.
+
+    Returns:
+        `True` if the API server still has the object (it might be terminating), `False` otherwise.
+
+    """
+    r = kube_object.api.get(**kube_object.api_kwargs(headers={"Accept": PARTIAL_OBJECT_METADATA_ACCEPT}))
+    if r.status_code == 404:
+        return False
+    kube_object.api.raise_for_status(r)
+    return True
+
+
+def shared_object_key(kube_object: pykube.objects.APIObject) -> str:
+    """Return the key identifying `kube_object` in the [SharedResourceRegistry](
+    pytest_helm_charts.parallel.SharedResourceRegistry)."""
+    if kube_object.namespace:
+        return f"{kube_object.kind}/{kube_object.namespace}/{kube_object.name}"
+    return f"{kube_object.kind}/{kube_object.name}"
+
+
+def release_and_delete_shared_objects(
+    kube_client: HTTPClient,
+    obj_type: Type[T],
+    objects_to_release: Iterable[T],
+    registry: SharedResourceRegistry,
+    timeout_sec: int = DEFAULT_DELETE_TIMEOUT_SEC,
+) -> None:
+    """
+    Release objects shared between pytest-xdist workers. Objects released by the last worker using them are
+    deleted with [delete_and_wait_for_objects](delete_and_wait_for_objects), but only if the value stored
+    for them in the `registry` is `True` (meaning the objects were created by the test suite).
+
+    Args:
+        kube_client: client to use to connect to the k8s cluster
+        obj_type: type of the objects to release
+        objects_to_release: iterable of objects acquired earlier from the `registry` using keys returned by
+            [shared_object_key](shared_object_key)
+        registry: the registry tracking references to the shared objects
+        timeout_sec: timeout for a single object to be gone from API server.
+
+    Returns: None
+
+    """
+    for kube_object in objects_to_release:
+
+        def _destroy(created: bool, obj: T = kube_object) -> None:
+            if created:
+                delete_and_wait_for_objects(kube_client, obj_type, [obj], timeout_sec)
+
+        registry.release(shared_object_key(kube_object), _destroy)
 
 
 def object_factory_helper(
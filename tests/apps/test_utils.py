@@ -11,11 +11,15 @@ from pytest_helm_charts.giantswarm_app_platform import (
 )
 from pytest_helm_charts.giantswarm_app_platform.app import (
     wait_for_apps_to_run,
+    wait_for_apps_and_workloads_to_run,
     wait_for_app_to_be_deleted,
     delete_app,
+    upgrade_app,
+    reconfigure_app,
     ConfiguredApp,
     AppCR,
 )
+from pytest_helm_charts.k8s.workloads import HELM_RELEASE_NAME_ANNOTATION, find_helm_release_workloads, workload_ready
 from tests.test_utils import get_ready_objects_filter_mock
 
 
@@ -78,3 +82,125 @@ def test_wait_for_app_to_be_deleted(
     except TimeoutError:
         del_result = False
     assert del_result == expected_del_result
+
+
+class MockDeployedAppCR:
+    def __init__(self, version: str, last_deployed: str):
+        self.obj = {
+            "metadata": {"generation": 2},
+            "status": {
+                "release": {"status": "deployed", "lastDeployed": last_deployed},
+                "appVersion": "v1",
+                "version": version,
+            },
+        }
+
+
+def test_upgrade_app(mocker: MockFixture) -> None:
+    app_cr = mocker.MagicMock(spec=AppCR)
+    app_cr.name = "test_app"
+    app_cr.namespace = "test_ns"
+    app_cr.obj = MockDeployedAppCR("1.0.0", "2026-01-01T00:00:00Z").obj
+    cm = mocker.MagicMock(spec=ConfigMap)
+    configured_app = ConfiguredApp(app=app_cr, app_cm=cm)
+    upgraded_app = MockDeployedAppCR("1.1.0", "2026-01-01T00:05:00Z")
+    objects_mock = get_ready_objects_filter_mock(
+        mocker, [MockDeployedAppCR("1.0.0", "2026-01-01T00:00:00Z"), upgraded_app]
+    )
+    mocker.patch("pytest_helm_charts.giantswarm_app_platform.app.AppCR")
+    cast(unittest.mock.Mock, giantswarm_app_platform_app.AppCR).objects.return_value = objects_mock
+    mocker.patch("pytest_helm_charts.utils.time.sleep")
+
+    result = upgrade_app(cast(HTTPClient, None), configured_app, "1.1.0", {"replicas": 2}, timeout_sec=5)
+
+    assert result.app is upgraded_app
+    assert result.latency_sec >= 0
+    app_cr.reload.assert_called_once_with()
+    app_cr.patch.assert_called_once_with({"spec": {"version": "1.1.0"}})
+    cm.patch.assert_called_once_with({"data": {"values": "replicas: 2\n"}})
+
+
+def test_reconfigure_app_without_config_map(mocker: MockFixture) -> None:
+    configured_app = ConfiguredApp(app=mocker.MagicMock(spec=AppCR), app_cm=None)
+
+    with pytest.raises(ValueError):
+        reconfigure_app(cast(HTTPClient, None), configured_app, {"replicas": 2})
+
+
+def _make_deployed_app(name: str, status: str = "deployed") -> AppCR:
+    return AppCR(
+        cast(HTTPClient, None),
+        {
+            "metadata": {"name": name, "namespace": "test_ns"},
+            "spec": {"namespace": "deploy_ns"},
+            "status": {"release": {"status": status}, "appVersion": "v1"},
+        },
+    )
+
+
+def _make_deployment(name: str, ready: bool) -> pykube.Deployment:
+    return pykube.Deployment(
+        cast(HTTPClient, None),
+        {
+            "metadata": {"name": name, "namespace": "deploy_ns", "generation": 1},
+            "spec": {"replicas": 1},
+            "status": {
+                "observedGeneration": 1,
+                "updatedReplicas": 1,
+                "availableReplicas": 1 if ready else 0,
+            },
+        },
+    )
+
+
+def test_wait_for_apps_and_workloads_to_run(mocker: MockFixture) -> None:
+    app = _make_deployed_app("test_app")
+    apps_query = mocker.MagicMock(name="apps query")
+    apps_query.get_or_none.side_effect = [_make_deployed_app("test_app", "pending"), app, app]
+    mocker.patch.object(AppCR, "objects").return_value.filter.return_value = apps_query
+    find_mock = mocker.patch(
+        "pytest_helm_charts.giantswarm_app_platform.app.find_helm_release_workloads",
+        side_effect=[[_make_deployment("test_app", False)], [_make_deployment("test_app", True)]],
+    )
+    sleep_mock = mocker.patch("pytest_helm_charts.giantswarm_app_platform.app.time.sleep")
+
+    result = wait_for_apps_and_workloads_to_run(cast(HTTPClient, None), ["test_app"], "test_ns", 10)
+
+    assert result == [app]
+    assert sleep_mock.call_count == 2
+    find_mock.assert_called_with(None, "test_app", "deploy_ns")
+
+
+def test_wait_for_apps_and_workloads_to_run_timeout(mocker: MockFixture) -> None:
+    mocker.patch.object(
+        AppCR, "objects"
+    ).return_value.filter.return_value.get_or_none.return_value = _make_deployed_app("test_app")
+    mocker.patch(
+        "pytest_helm_charts.giantswarm_app_platform.app.find_helm_release_workloads",
+        return_value=[_make_deployment("test_app", False)],
+    )
+    mocker.patch("pytest_helm_charts.giantswarm_app_platform.app.time.sleep")
+
+    with pytest.raises(TimeoutError, match="Deployment deploy_ns/test_app"):
+        wait_for_apps_and_workloads_to_run(cast(HTTPClient, None), ["test_app"], "test_ns", 2)
+
+
+def test_find_helm_release_workloads(mocker: MockFixture) -> None:
+    release_deployment = _make_deployment("release", True)
+    release_deployment.obj["metadata"]["annotations"] = {HELM_RELEASE_NAME_ANNOTATION: "test_app"}
+    other_deployment = _make_deployment("other", True)
+    other_deployment.obj["metadata"]["annotations"] = {HELM_RELEASE_NAME_ANNOTATION: "other_app"}
+    for workload_type in [pykube.Deployment, pykube.StatefulSet, pykube.DaemonSet]:
+        objects_mock = mocker.patch.object(workload_type, "objects")
+        objects_mock.return_value.filter.return_value = (
+            [release_deployment, other_deployment] if workload_type is pykube.Deployment else []
+        )
+
+    workloads = find_helm_release_workloads(cast(HTTPClient, None), "test_app", "deploy_ns")
+
+    assert workloads == [release_deployment]
+    cast(unittest.mock.Mock, pykube.Deployment.objects).return_value.filter.assert_called_once_with(
+        namespace="deploy_ns", selector={"app.kubernetes.io/managed-by": "Helm"}
+    )
+    assert workload_ready(release_deployment)
+    assert not workload_ready(pykube.StatefulSet(cast(HTTPClient, None), {"metadata": {"name": "no-status"}}))
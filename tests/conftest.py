@@ -1,3 +1,7 @@
+import json
+from typing import Any
+from unittest.mock import MagicMock
+
 import pytest
 from pykube import HTTPClient
 from pytest_mock import MockFixture
@@ -16,9 +20,18 @@ class MockCluster(Cluster):
 
     def create(self) -> HTTPClient:
         mock_client = self.__mocker.MagicMock(name="MockHTTPClient")
+        # there's no API server behind the mock: created objects are echoed back as they were sent
+        # and every object is reported as already gone when checked for existence
+        mock_client.post.side_effect = self._echo_response
+        mock_client.get.return_value.status_code = 404
         self._kube_client = mock_client
         return self._kube_client
 
+    def _echo_response(self, **kwargs: Any) -> MagicMock:
+        response = self.__mocker.MagicMock(name="MockResponse")
+        response.json.return_value = json.loads(kwargs["data"])
+        return response
+
     def destroy(self) -> None:
         if self._kube_client is None:
             return
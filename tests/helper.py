@@ -7,7 +7,9 @@ from pytest_mock import MockFixture
 
 
 def run_pytest(pytester: Pytester, mocker: MockFixture, *args: Any) -> RunResult:
-    mocker.patch("pytest_helm_charts.fixtures.ExistingCluster", autospec=True)
+    cluster_mock = mocker.patch("pytest_helm_charts.fixtures.ExistingCluster", autospec=True)
+    # there's no API server behind the mock, so every object is reported as already gone
+    cluster_mock.return_value.kube_client.get.return_value.status_code = 404
     mocker.patch.dict(
         os.environ,
         {
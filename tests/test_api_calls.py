@@ -0,0 +1,89 @@
+import datetime
+from typing import Optional
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+from pytest import Pytester
+
+from pytest_helm_charts import api_calls
+from pytest_helm_charts.api_calls import ApiCallCounter, install_api_call_counter, parse_api_path
+
+
+@pytest.mark.parametrize(
+    "url,expected_resource,expected_namespace",
+    [
+        ("https://k8s:6443/api/v1/namespaces", "namespaces", None),
+        ("https://k8s:6443/api/v1/namespaces/test", "namespaces", "test"),
+        ("https://k8s:6443/api/v1/namespaces/test/pods", "pods", "test"),
+        ("https://k8s:6443/api/v1/namespaces/test/pods/pod-1/log", "pods/log", "test"),
+        ("https://k8s:6443/apis/application.giantswarm.io/v1alpha1/namespaces/default/apps/hello", "apps", "default"),
+        ("https://k8s:6443/apis/application.giantswarm.io/v1alpha1/catalogs?watch=true", "catalogs", None),
+        ("https://k8s:6443/api/v1/nodes/node-1", "nodes", None),
+        ("https://k8s:6443/version", "version", None),
+    ],
+)
+def test_parse_api_path(url: str, expected_resource: str, expected_namespace: Optional[str]) -> None:
+    assert parse_api_path(url) == (expected_resource, expected_namespace)
+
+
+def test_counter_summary() -> None:
+    counter = ApiCallCounter()
+    counter.record("get", "https://k8s/api/v1/namespaces/test/pods/pod-1", 200, 0.02)
+    counter.record("post", "https://k8s/api/v1/namespaces/test/pods", 201, 0.3)
+    counter.record("get", "https://k8s/api/v1/namespaces/test/pods/pod-1", 404, 20.0)
+
+    summary = counter.summary(start=1)
+    assert summary["total"] == 2
+    assert summary["by_verb"] == {"POST": 1, "GET": 1}
+    assert summary["by_resource"] == {"pods": 2}
+    assert summary["by_namespace"] == {"test": 2}
+    assert summary["by_status_code"] == {"201": 1, "404": 1}
+    assert summary["latency_histogram"]["0.5"] == 1
+    assert summary["latency_histogram"]["+Inf"] == 1
+    assert counter.count_since(1) == 2
+
+
+def test_install_api_call_counter_records_responses(monkeypatch: pytest.MonkeyPatch) -> None:
+    counter = ApiCallCounter()
+    monkeypatch.setattr(api_calls, "counter", counter)
+    kube_client = MagicMock(name="HTTPClient")
+    kube_client.session = requests.Session()
+    install_api_call_counter(kube_client)
+    install_api_call_counter(kube_client)
+
+    response = requests.Response()
+    response.status_code = 200
+    response.elapsed = datetime.timedelta(milliseconds=30)
+    response.request = requests.Request("GET", "https://k8s/api/v1/namespaces/test/configmaps/cm").prepare()
+    requests.hooks.dispatch_hook("response", kube_client.session.hooks, response)
+
+    assert len(counter.calls) == 1
+    assert counter.calls[0].resource == "configmaps"
+    assert counter.calls[0].latency_sec == pytest.approx(0.03)
+
+
+def test_api_budget_marker(pytester: Pytester) -> None:
+    pytester.makepyfile(
+        """
+        import pytest
+        from pytest_helm_charts.api_calls import counter
+
+        def _send(count):
+            for _ in range(count):
+                counter.record("GET", "https://k8s/api/v1/namespaces/test/pods", 200, 0.01)
+
+        @pytest.mark.k8s_api_budget(max_requests=3)
+        def test_within_budget():
+            _send(3)
+
+        @pytest.mark.k8s_api_budget(max_requests=3)
+        def test_over_budget():
+            _send(4)
+        """
+    )
+    result = pytester.runpytest("--junitxml=report.xml")
+
+    result.assert_outcomes(passed=1, failed=1)
+    result.stdout.fnmatch_lines(["*Test sent 4 requests to the Kubernetes API server, its budget is 3.*"])
+    assert 'name="k8s_api_calls"' in (pytester.path / "report.xml").read_text()
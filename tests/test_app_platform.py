@@ -1,10 +1,13 @@
 import logging
 import unittest.mock
-from typing import cast, Type
+from copy import deepcopy
+from functools import partial
+from typing import cast, Type, Any, Dict, List, Optional, Tuple
 
 import pykube
 import pytest
 from pykube import ConfigMap, Namespace
+from pytest import Pytester
 from pytest_mock import MockerFixture
 
 import pytest_helm_charts
@@ -14,9 +17,23 @@ import pytest_helm_charts.fixtures
 import pytest_helm_charts.giantswarm_app_platform.app
 import pytest_helm_charts.giantswarm_app_platform.fixtures
 from pytest_helm_charts.clusters import Cluster
-from pytest_helm_charts.giantswarm_app_platform.app import AppFactoryFunc, ConfiguredApp
-from pytest_helm_charts.giantswarm_app_platform.catalog import CatalogFactoryFunc
+from pytest_helm_charts.giantswarm_app_platform.app import (
+    APP_SPEC_HASH_ANNOTATION,
+    AppCR,
+    AppFactoryFunc,
+    ReusableAppRegistry,
+    app_spec_hash,
+    make_app_object,
+    AppSpec,
+    ConfiguredApp,
+    app_dependency_layers,
+    batch_app_factory_func,
+    upgrade_app,
+    wait_for_apps_in_namespaces_to_run,
+)
+from pytest_helm_charts.giantswarm_app_platform.catalog import CatalogCR, CatalogFactoryFunc
 from pytest_helm_charts.utils import YamlDict, T
+from tests.helper import run_pytest
 
 logger = logging.getLogger(__name__)
 
@@ -53,12 +70,17 @@ def test_app_factory_working(kube_cluster: Cluster, app_factory: AppFactoryFunc,
     config_values: YamlDict = {"key1": {"key2": "my-val"}}
     mock_final_configured_app_cleanup(mocker)
     mocker.patch("pytest_helm_charts.giantswarm_app_platform.catalog.CatalogCR.create")
-    mocker.patch("pytest_helm_charts.giantswarm_app_platform.app.AppCR")
-    mocker.patch("pytest_helm_charts.giantswarm_app_platform.app.ConfigMap")
+    app_cr_mock = mocker.patch("pytest_helm_charts.giantswarm_app_platform.app.AppCR")
+    cm_mock = mocker.patch("pytest_helm_charts.giantswarm_app_platform.app.ConfigMap")
+    # make the mocked objects look deleted when the fixture cleans them up
+    app_cr_mock.return_value.api.get.return_value.status_code = 404
+    cm_mock.return_value.api.get.return_value.status_code = 404
     mocker.patch("pytest_helm_charts.giantswarm_app_platform.app.wait_for_apps_to_run")
     mocker.patch("pytest_helm_charts.k8s.fixtures.ensure_namespace_exists")
+    ns_mock = mocker.MagicMock()
+    ns_mock.api.get.return_value.status_code = 404
     cast(unittest.mock.Mock, pytest_helm_charts.k8s.fixtures.ensure_namespace_exists).return_value = (
-        mocker.MagicMock(),
+        ns_mock,
         True,
     )
     test_configured_app: ConfiguredApp = app_factory(
@@ -189,3 +211,276 @@ def test_create_the_same_catalog_name_diff_url(catalog_factory: CatalogFactoryFu
     # ask the factory the create the same catalog once again, but with changed URL; this should raise an error
     with pytest.raises(ValueError):
         catalog_factory(CATALOG_NAME, CATALOG_NAMESPACE, CATALOG_URL + "change")
+
+
+def _app_spec(name: str, depends_on: Optional[List[str]] = None, namespace: str = "default") -> AppSpec:
+    return AppSpec(name, "1.0.0", CATALOG_NAME, CATALOG_NAMESPACE, CATALOG_URL, namespace, depends_on=depends_on or [])
+
+
+def test_app_dependency_layers() -> None:
+    specs = [
+        _app_spec("ingress", ["cert-manager"]),
+        _app_spec("cert-manager"),
+        _app_spec("monitoring"),
+        _app_spec("app", ["ingress", "monitoring"]),
+    ]
+
+    layers = app_dependency_layers(specs)
+
+    assert [[s.app_name for s in layer] for layer in layers] == [["cert-manager", "monitoring"], ["ingress"], ["app"]]
+
+
+def test_app_dependency_layers_across_namespaces() -> None:
+    specs = [_app_spec("app", ["cert-manager", "kube-system/cert-manager"]), _app_spec("cert-manager")]
+    specs.append(_app_spec("cert-manager", namespace="kube-system"))
+
+    layers = app_dependency_layers(specs)
+
+    assert [[(s.namespace, s.app_name) for s in layer] for layer in layers] == [
+        [("default", "cert-manager"), ("kube-system", "cert-manager")],
+        [("default", "app")],
+    ]
+
+
+def test_wait_for_apps_in_namespaces_to_run(mocker: MockerFixture) -> None:
+    def _app(namespace: str, status: str) -> AppCR:
+        return AppCR(
+            None,
+            {
+                "metadata": {"name": "hello", "namespace": namespace},
+                "status": {"appVersion": "1.0.0", "release": {"status": status}},
+            },
+        )
+
+    rounds = {"default": ["pending-install", "deployed"], "other": ["pending-install", "deployed"]}
+    filter_mock = mocker.patch.object(AppCR, "objects").return_value.filter
+    filter_mock.side_effect = lambda namespace: [_app(namespace, rounds[namespace].pop(0))]
+    sleep_mock = mocker.patch("pytest_helm_charts.giantswarm_app_platform.app.time.sleep")
+
+    apps = wait_for_apps_in_namespaces_to_run(
+        cast(pykube.HTTPClient, None), [("hello", "other"), ("hello", "default")], 5
+    )
+
+    assert [a.namespace for a in apps] == ["other", "default"]
+    # both namespaces are checked in each round, so they share a single timeout
+    assert sleep_mock.call_count == 1
+    filter_mock.side_effect = lambda namespace: [_app(namespace, "pending-install")]
+    with pytest.raises(TimeoutError, match="default/hello"):
+        wait_for_apps_in_namespaces_to_run(cast(pykube.HTTPClient, None), [("hello", "other"), ("hello", "default")], 3)
+    assert filter_mock.call_count == 4 + 3 * 2
+
+
+@pytest.mark.parametrize(
+    "specs",
+    [
+        [_app_spec("a"), _app_spec("a")],
+        [_app_spec("a", ["missing"])],
+        [_app_spec("a", ["b"]), _app_spec("b", namespace="other")],
+        [_app_spec("a", ["b"]), _app_spec("b", ["a"])],
+    ],
+    ids=["duplicated app", "unknown dependency", "dependency in another namespace", "cycle"],
+)
+def test_app_dependency_layers_invalid(specs: List[AppSpec]) -> None:
+    with pytest.raises(ValueError):
+        app_dependency_layers(specs)
+
+
+def test_batch_app_factory_deploys_layers(mocker: MockerFixture) -> None:
+    events: List[str] = []
+
+    def _create(_: Any, name: str, *args: Any) -> ConfiguredApp:
+        events.append(f"create {name}")
+        return ConfiguredApp(mocker.MagicMock(name=name), None)
+
+    def _wait(_: Any, apps: List[Tuple[str, str]], *args: Any) -> List[Any]:
+        events.append(f"wait {sorted(f'{ns}/{name}' for name, ns in apps)}")
+        return [mocker.MagicMock(name=name) for name, _ in apps]
+
+    mocker.patch("pytest_helm_charts.giantswarm_app_platform.app.create_app", side_effect=_create)
+    mocker.patch("pytest_helm_charts.giantswarm_app_platform.app.wait_for_apps_in_namespaces_to_run", side_effect=_wait)
+    catalog_factory = mocker.MagicMock(name="catalog_factory")
+    namespace_factory = mocker.MagicMock(name="namespace_factory")
+    created_apps: List[ConfiguredApp] = []
+    batch_factory = batch_app_factory_func(
+        cast(pykube.HTTPClient, None), catalog_factory, namespace_factory, created_apps
+    )
+
+    apps = batch_factory(
+        [_app_spec("app", ["dep-1", "other/dep-2"]), _app_spec("dep-1"), _app_spec("dep-2", namespace="other")]
+    )
+
+    assert len(apps) == 3
+    assert len(created_apps) == 3
+    assert sorted(events[:2]) == ["create dep-1", "create dep-2"]
+    assert events[2:] == ["wait ['default/dep-1', 'other/dep-2']", "create app", "wait ['default/app']"]
+    namespace_factory.assert_any_call("other")
+    catalog_factory.assert_called_with(CATALOG_NAME, CATALOG_NAMESPACE, CATALOG_URL)
+
+
+def test_batch_app_factory_keeps_created_apps_on_error(mocker: MockerFixture) -> None:
+    def _create(_: Any, name: str, *args: Any) -> ConfiguredApp:
+        if name == "broken":
+            raise pykube.exceptions.HTTPError(409, "conflict")
+        return ConfiguredApp(mocker.MagicMock(name=name), None)
+
+    mocker.patch("pytest_helm_charts.giantswarm_app_platform.app.create_app", side_effect=_create)
+    wait_mock = mocker.patch("pytest_helm_charts.giantswarm_app_platform.app.wait_for_apps_to_run")
+    created_apps: List[ConfiguredApp] = []
+    batch_factory = batch_app_factory_func(
+        cast(pykube.HTTPClient, None), mocker.MagicMock(), mocker.MagicMock(), created_apps
+    )
+
+    with pytest.raises(pykube.exceptions.HTTPError):
+        batch_factory([_app_spec("ok"), _app_spec("broken")])
+
+    assert len(created_apps) == 1
+    wait_mock.assert_not_called()
+
+
+def _make_reusable_app(config_values: Optional[YamlDict] = None, version: str = "1.0.0") -> ConfiguredApp:
+    return make_app_object(
+        cast(pykube.HTTPClient, unittest.mock.MagicMock(name="HTTPClient")),
+        "reused-app",
+        version,
+        CATALOG_NAME,
+        CATALOG_NAMESPACE,
+        "default",
+        "default",
+        config_values,
+    )
+
+
+def _mock_existing_app(mocker: MockerFixture, existing: Optional[AppCR]) -> None:
+    objects_mock = mocker.patch.object(AppCR, "objects")
+    objects_mock.return_value.filter.return_value.get_or_none.return_value = existing
+
+
+def test_app_spec_hash() -> None:
+    configured_app = _make_reusable_app({"replicas": 1})
+    spec_hash = app_spec_hash(configured_app)
+    configured_app.app.obj["metadata"]["annotations"] = {APP_SPEC_HASH_ANNOTATION: "stale"}
+
+    assert app_spec_hash(configured_app) == spec_hash
+    assert app_spec_hash(_make_reusable_app({"replicas": 1})) == spec_hash
+    assert app_spec_hash(_make_reusable_app({"replicas": 2})) != spec_hash
+
+
+def test_reusable_app_registry_adopts_matching_app(mocker: MockerFixture) -> None:
+    configured_app = _make_reusable_app({"replicas": 1})
+    existing = AppCR(configured_app.app.api, deepcopy(configured_app.app.obj))
+    existing.obj["metadata"]["annotations"] = {APP_SPEC_HASH_ANNOTATION: app_spec_hash(configured_app)}
+    _mock_existing_app(mocker, existing)
+    create_mock = mocker.patch("pytest_helm_charts.giantswarm_app_platform.app._create_app_objects")
+    registry = ReusableAppRegistry()
+
+    reused_app = registry.adopt_or_create(configured_app.app.api, configured_app)
+
+    assert reused_app.app is existing
+    assert registry.apps == {("default", "reused-app"): reused_app}
+    create_mock.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "existing_annotations",
+    [None, {APP_SPEC_HASH_ANNOTATION: "different"}, {}],
+    ids=["no existing app", "stale app", "app not deployed by the registry"],
+)
+def test_reusable_app_registry_creates_app(
+    mocker: MockerFixture, existing_annotations: Optional[Dict[str, str]]
+) -> None:
+    configured_app = _make_reusable_app({"replicas": 1})
+    existing = None
+    if existing_annotations is not None:
+        existing = AppCR(configured_app.app.api, deepcopy(configured_app.app.obj))
+        existing.obj["metadata"]["annotations"] = existing_annotations
+    _mock_existing_app(mocker, existing)
+    mocker.patch.object(ConfigMap, "objects").return_value.filter.return_value.get_or_none.return_value = None
+    delete_mock = mocker.patch("pytest_helm_charts.giantswarm_app_platform.app.delete_and_wait_for_objects")
+    create_mock = mocker.patch("pytest_helm_charts.giantswarm_app_platform.app._create_app_objects")
+    registry = ReusableAppRegistry()
+
+    created_app = registry.adopt_or_create(configured_app.app.api, configured_app)
+
+    assert created_app is configured_app
+    assert created_app.app.annotations[APP_SPEC_HASH_ANNOTATION] == app_spec_hash(configured_app)
+    create_mock.assert_called_once_with(configured_app)
+    if existing is not None:
+        delete_mock.assert_any_call(configured_app.app.api, AppCR, [existing])
+    else:
+        assert all(c.args[1] is not AppCR for c in delete_mock.call_args_list)
+
+
+def test_reusable_app_registry_replaces_upgraded_app(mocker: MockerFixture) -> None:
+    configured_app = _make_reusable_app({"replicas": 1})
+    _mock_existing_app(mocker, None)
+    mocker.patch.object(ConfigMap, "objects").return_value.filter.return_value.get_or_none.return_value = None
+    delete_mock = mocker.patch("pytest_helm_charts.giantswarm_app_platform.app.delete_and_wait_for_objects")
+    mocker.patch("pytest_helm_charts.giantswarm_app_platform.app._create_app_objects")
+    registry = ReusableAppRegistry()
+    deployed = registry.adopt_or_create(configured_app.app.api, configured_app)
+    assert deployed.app_cm is not None
+
+    def _merge(obj: YamlDict, patch: YamlDict) -> None:
+        for k, v in patch.items():
+            if isinstance(v, dict):
+                _merge(obj.setdefault(k, {}), v)
+            else:
+                obj[k] = v
+
+    for obj in (deployed.app, deployed.app_cm):
+        mocker.patch.object(obj, "reload")
+        mocker.patch.object(obj, "patch", side_effect=partial(_merge, obj.obj))
+    mocker.patch(
+        "pytest_helm_charts.giantswarm_app_platform.app.wait_for_objects_condition", return_value=[deployed.app]
+    )
+    upgrade_app(deployed.app.api, deployed, "1.1.0", {"replicas": 2})
+
+    # the upgraded App matches the upgraded configuration, but not the original one anymore
+    _mock_existing_app(mocker, deployed.app)
+    upgraded = _make_reusable_app({"replicas": 2}, "1.1.0")
+    assert registry.adopt_or_create(upgraded.app.api, upgraded).app is deployed.app
+    assert all(c.args[1] is not AppCR for c in delete_mock.call_args_list)
+    original = _make_reusable_app({"replicas": 1})
+    assert registry.adopt_or_create(original.app.api, original) is original
+    delete_mock.assert_any_call(original.app.api, AppCR, [deployed.app])
+
+
+def test_reused_app_survives_module_teardown(pytester: Pytester, mocker: MockerFixture) -> None:
+    test_module = """
+        def test_app(app_factory):
+            app_factory("reused-app", "1.0.0", "reused-catalog", "catalogs", "http://invalid.host:1234", "apps")
+    """
+    pytester.makepyfile(test_first_module=test_module, test_second_module=test_module)
+    deployed_apps: Dict[str, AppCR] = {}
+
+    def _create(configured_app: ConfiguredApp, values_store: Any = None) -> None:
+        deployed_apps[configured_app.app.name] = configured_app.app
+
+    create_mock = mocker.patch(
+        "pytest_helm_charts.giantswarm_app_platform.app._create_app_objects", side_effect=_create
+    )
+    mocker.patch.object(AppCR, "objects").return_value.filter.return_value.get_or_none.side_effect = lambda name: (
+        deployed_apps.get(name)
+    )
+    mocker.patch.object(CatalogCR, "objects").return_value.filter.return_value.get_or_none.return_value = None
+    mocker.patch.object(CatalogCR, "create")
+    mocker.patch(
+        "pytest_helm_charts.giantswarm_app_platform.app.ensure_namespace_exists",
+        side_effect=lambda kube_client, name: (Namespace(kube_client, {"metadata": {"name": name}}), True),
+    )
+    mocker.patch("pytest_helm_charts.giantswarm_app_platform.app.wait_for_apps_to_run")
+    # the mocked client can't be copied
+    mocker.patch("pytest_helm_charts.giantswarm_app_platform.app.deepcopy", side_effect=lambda o: o)
+    deleted_objects: List[Any] = []
+    for module in ("giantswarm_app_platform.app", "giantswarm_app_platform.fixtures", "k8s.fixtures"):
+        mocker.patch(
+            f"pytest_helm_charts.{module}.delete_and_wait_for_objects",
+            side_effect=lambda kube_client, obj_type, objects, *args, **kwargs: deleted_objects.extend(objects),
+        )
+
+    result = run_pytest(pytester, mocker, "--helm-charts-reuse-apps", "keep")
+
+    result.assert_outcomes(passed=2)
+    # the second module adopts the App created by the first one, which is left deployed
+    create_mock.assert_called_once()
+    assert deleted_objects == []
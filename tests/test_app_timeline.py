@@ -0,0 +1,154 @@
+import json
+import threading
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List
+
+import pytest
+from pytest import Pytester
+from pytest_mock import MockerFixture
+
+from pytest_helm_charts.app_timeline import AppStatusEvent, AppTimelineRecorder, percentile
+from pytest_helm_charts.giantswarm_app_platform.app import (
+    APP_WATCH_TIMEOUT_SEC,
+    AppCR,
+    ConfiguredApp,
+    _create_app_objects,
+)
+
+
+def test_percentile() -> None:
+    values = [float(v) for v in range(1, 11)]
+
+    assert percentile(values, 50) == 5.0
+    assert percentile(values, 90) == 9.0
+    assert percentile(values, 99) == 10.0
+    assert percentile([3.0], 50) == 3.0
+    with pytest.raises(ValueError):
+        percentile([], 50)
+
+
+def test_recorder_records_transitions(mocker: MockerFixture) -> None:
+    monotonic = mocker.patch("pytest_helm_charts.app_timeline.time.monotonic")
+    recorder = AppTimelineRecorder()
+    monotonic.return_value = 100.0
+    recorder.app_created("default", "hello", "test.py::test_a")
+    recorder.app_created("default", "world")
+    for now, phase in [(101.0, None), (102.0, "pending-install"), (103.0, "pending-install"), (105.0, "deployed")]:
+        monotonic.return_value = now
+        recorder.observe("default", "hello", phase)
+        recorder.observe("default", "not-tracked", phase)
+    recorder.observe("default", "world", "deployed")
+
+    assert [(p.phase, p.sec) for p in recorder.timelines[0].phases] == [("pending-install", 2.0), ("deployed", 5.0)]
+    assert recorder.timelines[0].latencies() == {
+        "created -> pending-install": [2.0],
+        "pending-install -> deployed": [3.0],
+        "created -> deployed": [5.0],
+    }
+    summary = recorder.summary()
+    assert summary["created -> deployed"] == {"count": 2, "p50": 5.0, "p90": 5.0, "p99": 5.0, "max": 5.0}
+    assert summary["pending-install -> deployed"]["count"] == 1
+
+
+def test_repeated_transitions_are_all_counted(mocker: MockerFixture) -> None:
+    monotonic = mocker.patch("pytest_helm_charts.app_timeline.time.monotonic")
+    recorder = AppTimelineRecorder()
+    monotonic.return_value = 100.0
+    recorder.app_created("default", "hello")
+    # the app is upgraded twice
+    for now, phase in [(101.0, "deployed"), (102.0, "pending-upgrade"), (104.0, "deployed")]:
+        monotonic.return_value = now
+        recorder.observe("default", "hello", phase)
+    for now, phase in [(105.0, "pending-upgrade"), (108.0, "deployed")]:
+        monotonic.return_value = now
+        recorder.observe("default", "hello", phase)
+
+    assert recorder.timelines[0].latencies() == {
+        "created -> deployed": [1.0],
+        "deployed -> pending-upgrade": [1.0, 1.0],
+        "created -> pending-upgrade": [2.0],
+        "pending-upgrade -> deployed": [2.0, 3.0],
+    }
+    summary = recorder.summary()
+    assert summary["pending-upgrade -> deployed"] == {"count": 2, "p50": 2.0, "p90": 3.0, "p99": 3.0, "max": 3.0}
+
+
+def test_recorder_watches_app_statuses(mocker: MockerFixture) -> None:
+    mocker.patch("pytest_helm_charts.app_timeline.APP_WATCH_RETRY_SEC", 0)
+    recorder = AppTimelineRecorder()
+    recorder.app_created("default", "hello")
+    streamed, done = threading.Event(), threading.Event()
+    calls: List[int] = []
+
+    def _events() -> Iterator[AppStatusEvent]:
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionError("connection reset")
+        yield from [("default", "hello", ""), ("default", "hello", "pending-install"), ("default", "hello", "deployed")]
+        streamed.set()
+        done.wait(5)
+
+    recorder.watch("default", _events)
+    assert calls == []
+    recorder.start_watching()
+    recorder.watch("default", _events)
+    recorder.watch("default", _events)
+    thread = recorder._watches["default"]
+    assert streamed.wait(5)
+    recorder.stop_watching()
+    done.set()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert len(calls) == 2
+    assert [p.phase for p in recorder.timelines[0].phases] == ["pending-install", "deployed"]
+
+
+def test_creating_app_watches_its_namespace(mocker: MockerFixture) -> None:
+    recorder = AppTimelineRecorder()
+    recorder.start_watching()
+    mocker.patch("pytest_helm_charts.giantswarm_app_platform.app.app_timeline_recorder", recorder)
+    streamed, done = threading.Event(), threading.Event()
+
+    def _app(release_status: str) -> AppCR:
+        status = {"appVersion": "1.0.0", "release": {"status": release_status}}
+        return AppCR(None, {"metadata": {"name": "hello", "namespace": "default"}, "status": status})
+
+    def _watch(params: Dict[str, Any]) -> Iterator[SimpleNamespace]:
+        yield SimpleNamespace(type="ADDED", object=_app("PENDING-INSTALL"))
+        yield SimpleNamespace(type="MODIFIED", object=_app("DEPLOYED"))
+        yield SimpleNamespace(type="DELETED", object=_app("DELETED"))
+        streamed.set()
+        done.wait(5)
+
+    watch_mock = mocker.patch.object(AppCR, "objects").return_value.filter.return_value.watch
+    watch_mock.side_effect = _watch
+    app = AppCR(mocker.MagicMock(url="https://cluster"), {"metadata": {"name": "hello", "namespace": "default"}})
+    mocker.patch.object(app, "create")
+
+    _create_app_objects(ConfiguredApp(app, None))
+    assert streamed.wait(5)
+    recorder.stop_watching()
+    done.set()
+
+    assert [p.phase for p in recorder.timelines[0].phases] == ["pending-install", "deployed"]
+    watch_mock.assert_called_with(params={"timeoutSeconds": APP_WATCH_TIMEOUT_SEC})
+
+
+def test_app_timeline_report_and_summary(pytester: Pytester) -> None:
+    pytester.makepyfile(
+        """
+        from pytest_helm_charts.app_timeline import recorder
+
+        def test_app():
+            recorder.app_created("default", "hello")
+            recorder.observe("default", "hello", "deployed")
+        """
+    )
+    result = pytester.runpytest_subprocess("--helm-charts-app-timeline", "timeline.json")
+
+    result.stdout.fnmatch_lines(["*App status latencies (1 apps)*", "created -> deployed * n=1 *p50=0.0s*"])
+    report = json.loads((pytester.path / "timeline.json").read_text())
+    assert report["apps"][0]["name"] == "hello"
+    assert [p["phase"] for p in report["apps"][0]["phases"]] == ["deployed"]
+    assert report["summary"]["created -> deployed"]["count"] == 1
@@ -0,0 +1,159 @@
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+import pytest
+import requests
+from pytest_mock import MockerFixture
+
+from pytest_helm_charts.errors import AppVersionNotFoundError
+from pytest_helm_charts.giantswarm_app_platform.app import AppSpec, app_factory_func, batch_app_factory_func
+from pytest_helm_charts.giantswarm_app_platform.catalog_index import CatalogIndexCache
+
+INDEX = """
+apiVersion: v1
+entries:
+  hello-world:
+  - version: 0.1.0
+  - version: v0.2.0
+  other-app:
+  - version: 1.0.0
+"""
+
+
+@pytest.fixture
+def catalog_url(tmp_path: Path) -> str:
+    catalog_dir = tmp_path / "catalog"
+    catalog_dir.mkdir()
+    (catalog_dir / "index.yaml").write_text(INDEX)
+    return catalog_dir.as_uri()
+
+
+def test_index_versions(catalog_url: str) -> None:
+    cache = CatalogIndexCache()
+
+    index = cache.get(catalog_url)
+
+    assert index.has_version("hello-world", "0.1.0")
+    assert index.has_version("hello-world", "v0.1.0")
+    assert index.has_version("hello-world", "0.2.0")
+    assert not index.has_version("hello-world", "1.0.0")
+    assert not index.has_version("missing-app", "0.1.0")
+
+
+def test_check_app_version(catalog_url: str) -> None:
+    cache = CatalogIndexCache()
+
+    cache.check_app_version(catalog_url, "other-app", "1.0.0")
+    with pytest.raises(AppVersionNotFoundError, match="Available versions: \\['0.1.0', '0.2.0'\\]"):
+        cache.check_app_version(catalog_url, "hello-world", "0.3.0")
+
+
+def test_index_revalidated_after_ttl(catalog_url: str, tmp_path: Path) -> None:
+    index_path = tmp_path / "catalog" / "index.yaml"
+    cache = CatalogIndexCache(ttl_sec=0)
+    first = cache.get(catalog_url)
+
+    # unchanged file is not parsed again
+    assert cache.get(catalog_url) is first
+
+    index_path.write_text(INDEX.replace("1.0.0", "1.1.0"))
+    os.utime(index_path, ns=(0, 0))
+    assert cache.get(catalog_url).has_version("other-app", "1.1.0")
+
+
+def test_index_cached_in_memory_within_ttl(catalog_url: str, tmp_path: Path) -> None:
+    cache = CatalogIndexCache()
+    cache.get(catalog_url)
+    (tmp_path / "catalog" / "index.yaml").unlink()
+
+    assert cache.get(catalog_url).has_version("hello-world", "0.1.0")
+
+
+def test_index_shared_through_cache_dir(catalog_url: str, tmp_path: Path) -> None:
+    cache_dir = tmp_path / "cache"
+    CatalogIndexCache(cache_dir).get(catalog_url)
+    (tmp_path / "catalog" / "index.yaml").unlink()
+
+    assert CatalogIndexCache(cache_dir).get(catalog_url).has_version("other-app", "1.0.0")
+    assert sorted(p.suffix for p in cache_dir.iterdir()) == [".json", ".yaml"]
+
+
+def test_corrupted_cache_dir_only_warns(catalog_url: str, tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    cache_dir = tmp_path / "cache"
+    CatalogIndexCache(cache_dir).get(catalog_url)
+    for meta_path in cache_dir.glob("*.json"):
+        meta_path.write_text('{"etag": ')
+
+    with caplog.at_level(logging.WARNING):
+        assert CatalogIndexCache(cache_dir).try_get(catalog_url) is None
+
+    assert "app versions won't be validated" in caplog.text
+
+
+def test_http_index_revalidated_with_etag(mocker: MockerFixture) -> None:
+    response = mocker.MagicMock(status_code=200, text=INDEX, headers={"ETag": '"abc"'})
+    get_mock = mocker.patch("pytest_helm_charts.giantswarm_app_platform.catalog_index.requests.get")
+    get_mock.return_value = response
+    cache = CatalogIndexCache(ttl_sec=0)
+    first = cache.get("https://example.com/catalog/")
+
+    response.status_code = 304
+    assert cache.get("https://example.com/catalog/") is first
+    get_mock.assert_called_with(
+        "https://example.com/catalog/index.yaml", headers={"If-None-Match": '"abc"'}, timeout=mocker.ANY
+    )
+
+
+def test_unreachable_catalog_only_warns(mocker: MockerFixture, caplog: pytest.LogCaptureFixture) -> None:
+    get_mock = mocker.patch("pytest_helm_charts.giantswarm_app_platform.catalog_index.requests.get")
+    get_mock.side_effect = requests.ConnectionError("no route to host")
+    cache = CatalogIndexCache()
+
+    with caplog.at_level(logging.WARNING):
+        cache.check_app_version("https://example.com/catalog/", "hello-world", "9.9.9")
+        cache.check_app_version("https://example.com/catalog/", "hello-world", "9.9.9")
+
+    assert "no route to host" in caplog.text
+    # the failure is remembered, so the catalog is not asked again
+    assert get_mock.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "app_version,extra_spec",
+    [("0.3.0", None), ("0.1.0", {"version": "0.3.0"}), ("0.1.0", {"name": "other-app"})],
+    ids=["missing version", "version overridden in spec", "name overridden in spec"],
+)
+def test_app_factory_validates_version_before_create(
+    catalog_url: str, mocker: MockerFixture, app_version: str, extra_spec: Optional[dict]
+) -> None:
+    catalog_factory = mocker.MagicMock(name="catalog_factory")
+    catalog_factory.return_value.obj = {"spec": {"storage": {"URL": catalog_url}}}
+    create_mock = mocker.patch("pytest_helm_charts.giantswarm_app_platform.app._create_app_objects")
+    app_factory = app_factory_func(
+        mocker.MagicMock(), catalog_factory, mocker.MagicMock(), [], catalog_index_cache=CatalogIndexCache()
+    )
+
+    with pytest.raises(AppVersionNotFoundError):
+        app_factory("hello-world", app_version, "test", "default", catalog_url, extra_spec=extra_spec)
+
+    create_mock.assert_not_called()
+
+
+def test_batch_app_factory_validates_rendered_versions(catalog_url: str, mocker: MockerFixture) -> None:
+    catalog_factory = mocker.MagicMock(name="catalog_factory")
+    catalog_factory.return_value.obj = {"spec": {"storage": {"URL": catalog_url}}}
+    create_mock = mocker.patch("pytest_helm_charts.giantswarm_app_platform.app.create_app")
+    batch_app_factory = batch_app_factory_func(
+        mocker.MagicMock(), catalog_factory, mocker.MagicMock(), [], catalog_index_cache=CatalogIndexCache()
+    )
+    app_specs = [
+        AppSpec("hello-world", "0.1.0", "test", "default", catalog_url),
+        AppSpec("other-app", "1.0.0", "test", "default", catalog_url, extra_spec={"version": "2.0.0"}),
+    ]
+
+    with pytest.raises(AppVersionNotFoundError, match="Version '2.0.0' of app 'other-app'"):
+        batch_app_factory(app_specs)
+
+    create_mock.assert_not_called()
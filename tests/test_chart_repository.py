@@ -0,0 +1,110 @@
+import hashlib
+import tarfile
+from pathlib import Path
+from urllib.request import urlopen
+
+import pytest
+import yaml
+
+from pytest_helm_charts.chart_repository import ChartRepositoryServer, load_helmignore, package_chart
+from pytest_helm_charts.local_server import directory_content_hash
+
+
+def _make_chart(chart_dir: Path, version: str = "1.0.0") -> Path:
+    (chart_dir / "templates").mkdir(parents=True)
+    (chart_dir / ".git").mkdir()
+    (chart_dir / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+    (chart_dir / "Chart.yaml").write_text(f"apiVersion: v2\nname: hello\nversion: {version}\nappVersion: 0.1.0\n")
+    (chart_dir / "values.yaml").write_text("replicas: 1\n")
+    (chart_dir / "templates" / "deployment.yaml").write_text("kind: Deployment\n")
+    return chart_dir
+
+
+def test_package_chart_is_cached_by_content(tmp_path: Path) -> None:
+    chart_dir = _make_chart(tmp_path / "chart")
+    cache_dir = tmp_path / "cache"
+
+    package = package_chart(chart_dir, cache_dir)
+
+    assert package.name == "hello" and package.version == "1.0.0"
+    assert package.path.name == "hello-1.0.0.tgz"
+    assert package.digest == hashlib.sha256(package.path.read_bytes()).hexdigest()
+    with tarfile.open(package.path) as tar:
+        assert tar.getnames() == ["hello/Chart.yaml", "hello/templates/deployment.yaml", "hello/values.yaml"]
+    mtime = package.path.stat().st_mtime_ns
+    assert package_chart(chart_dir, cache_dir).path.stat().st_mtime_ns == mtime
+
+    # the same content packaged from another directory gives the same bytes
+    other = package_chart(_make_chart(tmp_path / "other"), tmp_path / "other-cache")
+    assert other.digest == package.digest
+
+    content_hash = directory_content_hash(chart_dir)
+    (chart_dir / "values.yaml").write_text("replicas: 2\n")
+    assert directory_content_hash(chart_dir) != content_hash
+    assert package_chart(chart_dir, cache_dir).path != package.path
+
+
+def test_package_chart_applies_helmignore(tmp_path: Path) -> None:
+    chart_dir = _make_chart(tmp_path / "chart")
+    (chart_dir / ".helmignore").write_text("# comment\n\n*.swp\nci/\n/README.md\ntemplates/tests/*.yaml\n")
+    for name in ["ci/values.yaml", "README.md", "docs/README.md", "templates/tests/test.yaml", "templates/.hidden"]:
+        (chart_dir / name).parent.mkdir(parents=True, exist_ok=True)
+        (chart_dir / name).write_text("ignored: true\n")
+    (chart_dir / "values.yaml.swp").write_text("swap\n")
+    (chart_dir / "templates" / "tests" / "test.tpl").write_text("{{/* kept */}}\n")
+    cache_dir = tmp_path / "cache"
+
+    package = package_chart(chart_dir, cache_dir)
+
+    with tarfile.open(package.path) as tar:
+        assert tar.getnames() == [
+            "hello/.helmignore",
+            "hello/Chart.yaml",
+            "hello/docs/README.md",
+            "hello/templates/deployment.yaml",
+            "hello/templates/tests/test.tpl",
+            "hello/values.yaml",
+        ]
+    # changes of ignored files don't change the package
+    (chart_dir / "ci" / "values.yaml").write_text("ignored: false\n")
+    assert package_chart(chart_dir, cache_dir).path == package.path
+
+
+def test_helmignore_rules(tmp_path: Path) -> None:
+    (tmp_path / ".helmignore").write_text("secret-[^a]*\n!keep.txt\n")
+    ignored = load_helmignore(tmp_path)
+
+    assert ignored("templates/secret-b.yaml", False)
+    # like in Helm, a negated pattern ignores everything it doesn't match
+    assert ignored("templates/secret-a.yaml", False)
+    assert not ignored("keep.txt", False)
+    (tmp_path / ".helmignore").write_text("templates/**\n")
+    with pytest.raises(ValueError):
+        load_helmignore(tmp_path)
+
+
+def test_package_chart_overrides_version(tmp_path: Path) -> None:
+    package = package_chart(_make_chart(tmp_path / "chart"), tmp_path / "cache", "1.1.0-abc")
+
+    assert package.path.name == "hello-1.1.0-abc.tgz"
+    with tarfile.open(package.path) as tar:
+        chart_yaml = tar.extractfile("hello/Chart.yaml")
+        assert chart_yaml is not None
+        assert yaml.safe_load(chart_yaml)["version"] == "1.1.0-abc"
+
+
+def test_chart_repository_server_serves_index_and_packages(tmp_path: Path) -> None:
+    package = package_chart(_make_chart(tmp_path / "chart"), tmp_path / "cache")
+    (tmp_path / "repo").mkdir()
+
+    with ChartRepositoryServer(tmp_path / "repo", "127.0.0.1", bind_address="127.0.0.1") as server:
+        server.add_chart(package)
+        with urlopen(f"{server.url}/index.yaml", timeout=5) as response:
+            index = yaml.safe_load(response.read())
+        entry = index["entries"]["hello"][0]
+        assert entry["version"] == "1.0.0"
+        assert entry["appVersion"] == "0.1.0"
+        assert entry["digest"] == package.digest
+        assert entry["urls"] == [f"{server.url}/hello-1.0.0.tgz"]
+        with urlopen(entry["urls"][0], timeout=5) as response:
+            assert hashlib.sha256(response.read()).hexdigest() == package.digest
@@ -0,0 +1,146 @@
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pykube
+import pytest
+from pytest_mock import MockerFixture
+
+from pytest_helm_charts import diagnostics
+from pytest_helm_charts.diagnostics import (
+    DiagnosticsCollector,
+    disable_diagnostics,
+    enable_diagnostics,
+    used_namespaces,
+)
+from pytest_helm_charts.flux.git_repository import GitRepositoryCR
+from pytest_helm_charts.flux.helm_release import HelmReleaseCR
+from pytest_helm_charts.flux.helm_repository import HelmRepositoryCR
+from pytest_helm_charts.flux.kustomization import KustomizationCR
+from pytest_helm_charts.giantswarm_app_platform.app import AppCR
+from pytest_helm_charts.k8s.deployment import wait_for_deployments_to_run
+from pytest_helm_charts.timing import TimingRecorder
+
+NODE_ID = "tests/test_app.py::test_app[param]"
+
+
+@pytest.fixture(autouse=True)
+def diagnostics_disabled() -> Iterator[None]:
+    yield
+    disable_diagnostics()
+
+
+def _mock_objects(mocker: MockerFixture, kind_type: Any, result: Any) -> Any:
+    objects_mock = mocker.patch.object(kind_type, "objects")
+    objects_mock.return_value.filter.return_value = result
+    return objects_mock
+
+
+def _mock_namespace(mocker: MockerFixture) -> pykube.Pod:
+    events = [
+        pykube.Event(
+            None,
+            {
+                "metadata": {"name": f"e{i}"},
+                "lastTimestamp": f"2024-01-01T00:00:0{i}Z",
+                "type": "Warning",
+                "reason": "BackOff",
+                "involvedObject": {"kind": "Pod", "name": "hello-1"},
+                "message": f"back-off {i}",
+            },
+        )
+        for i in (2, 1)
+    ]
+    _mock_objects(mocker, pykube.Event, events)
+    pod = pykube.Pod(
+        None,
+        {
+            "metadata": {"name": "hello-1", "namespace": "test", "labels": {"app": "hello"}},
+            "status": {"containerStatuses": [{"name": "app", "restartCount": 2}]},
+        },
+    )
+    mocker.patch.object(pod, "logs", side_effect=lambda **kwargs: "previous\n" if kwargs.get("previous") else "now\n")
+    _mock_objects(mocker, pykube.Pod, [pod])
+    for cr_type in (HelmReleaseCR, KustomizationCR, GitRepositoryCR, HelmRepositoryCR):
+        _mock_objects(mocker, cr_type, [])
+    _mock_objects(mocker, AppCR, [AppCR(None, {"metadata": {"name": "hello"}, "status": {"release": {}}})])
+    return pod
+
+
+def test_collect_namespace(mocker: MockerFixture, tmp_path: Path) -> None:
+    pod = _mock_namespace(mocker)
+    mocker.patch.object(KustomizationCR, "objects", side_effect=pykube.exceptions.HTTPError(404, "not found"))
+
+    test_dir = DiagnosticsCollector(tmp_path).collect(mocker.MagicMock(), ["test"], "timed out", NODE_ID)
+
+    assert test_dir == tmp_path / "tests_test_app.py_test_app_param"
+    ns_dir = test_dir / "test"
+    assert (test_dir / "reason.txt").read_text() == "timed out (namespaces: test)\n"
+    assert (ns_dir / "events.txt").read_text().splitlines() == [
+        "2024-01-01T00:00:01Z Warning BackOff Pod/hello-1 (x1): back-off 1",
+        "2024-01-01T00:00:02Z Warning BackOff Pod/hello-1 (x1): back-off 2",
+    ]
+    assert '"hello-1"' in (ns_dir / "pods.json").read_text()
+    assert (ns_dir / "logs" / "hello-1.app.log").read_text() == "now\n"
+    assert (ns_dir / "logs" / "hello-1.app.previous.log").read_text() == "previous\n"
+    assert '"hello"' in (ns_dir / "App.json").read_text()
+    assert "KustomizationCR: HTTPError" in (ns_dir / "errors.txt").read_text()
+    pod.logs.assert_any_call(
+        container="app",
+        tail_lines=diagnostics.DIAGNOSTICS_LOG_TAIL_LINES,
+        limit_bytes=diagnostics.DIAGNOSTICS_LOG_MAX_BYTES,
+    )
+
+
+def test_namespace_collected_once_per_test(mocker: MockerFixture, tmp_path: Path) -> None:
+    _mock_namespace(mocker)
+    collector = DiagnosticsCollector(tmp_path, max_file_bytes=10)
+
+    assert collector.collect(mocker.MagicMock(), ["test"], "wait failed", NODE_ID) is not None
+    assert collector.collect(mocker.MagicMock(), ["test", ""], "test failed", NODE_ID) is None
+    assert (tmp_path / "tests_test_app.py_test_app_param" / "test" / "logs" / "hello-1.app.log").exists()
+    assert (
+        (tmp_path / "tests_test_app.py_test_app_param" / "test" / "pods.json")
+        .read_text()
+        .endswith("... truncated ...\n")
+    )
+
+
+def test_failed_wait_collects_diagnostics(mocker: MockerFixture, tmp_path: Path) -> None:
+    _mock_namespace(mocker)
+    deployment = pykube.Deployment(
+        None,
+        {
+            "metadata": {"name": "hello", "namespace": "test", "generation": 1},
+            "spec": {"replicas": 1},
+            "status": {"observedGeneration": 1, "replicas": 1, "readyReplicas": 0},
+        },
+    )
+    _mock_objects(
+        mocker, pykube.Deployment, mocker.MagicMock()
+    ).return_value.filter.return_value.get_by_name.return_value = deployment
+    mocker.patch("pytest_helm_charts.utils.time.sleep")
+    mocker.patch.object(diagnostics.timing_recorder, "current_node_id", NODE_ID)
+    enable_diagnostics(tmp_path)
+
+    with pytest.raises(TimeoutError):
+        wait_for_deployments_to_run(mocker.MagicMock(), ["hello"], "test", 2)
+
+    reason = (tmp_path / "tests_test_app.py_test_app_param" / "reason.txt").read_text()
+    assert reason.startswith("waiting for Deployment failed")
+
+
+def test_used_namespaces(mocker: MockerFixture) -> None:
+    recorder = TimingRecorder()
+    mocker.patch.object(diagnostics, "timing_recorder", recorder)
+    spans_by_node: Dict[str, List[Tuple[str, str, Optional[str], str]]] = {
+        "tests/test_app.py::test_a": [("create", "Namespace", None, "created-only"), ("wait", "App", "a,b", "x,y")],
+        "tests/test_app.py::test_b": [("delete", "Namespace", None, "c,d"), ("create", "Catalog", "e", "catalog")],
+        "tests/test_other.py::test_a": [("create", "Namespace", None, "other")],
+    }
+    for node_id, spans in spans_by_node.items():
+        recorder.current_node_id = node_id
+        for span in spans:
+            with recorder.span(*span):
+                pass
+
+    assert used_namespaces("tests/test_app.py::test_c") == {"created-only", "a", "b", "c", "d", "e"}
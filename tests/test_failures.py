@@ -0,0 +1,196 @@
+from typing import Any, Dict, Iterator, List
+
+import pykube
+import pytest
+from pytest import Pytester
+from pytest_mock import MockerFixture
+
+from pytest_helm_charts import failures
+from pytest_helm_charts.errors import ObjectStatusError
+from pytest_helm_charts.failures import failure_condition_for, get_failure_condition, set_fail_fast_enabled
+from pytest_helm_charts.flux.helm_release import HelmReleaseCR
+from pytest_helm_charts.flux.kustomization import KustomizationCR
+from pytest_helm_charts.flux.utils import flux_cr_failed
+from pytest_helm_charts.k8s.deployment import wait_for_deployments_to_run
+
+# modules registering failure conditions of the kinds checked below
+import pytest_helm_charts.giantswarm_app_platform.app  # noqa: F401
+import pytest_helm_charts.k8s.daemon_set  # noqa: F401
+import pytest_helm_charts.k8s.job  # noqa: F401
+import pytest_helm_charts.k8s.stateful_set  # noqa: F401
+
+
+@pytest.fixture(autouse=True)
+def fail_fast_enabled() -> Iterator[None]:
+    yield
+    set_fail_fast_enabled(True)
+
+
+def _obj(kind_type: Any, spec: Dict[str, Any], status: Dict[str, Any], generation: int = 1) -> Any:
+    return kind_type(
+        None,
+        {"metadata": {"name": "test", "namespace": "test", "generation": generation}, "spec": spec, "status": status},
+    )
+
+
+def _conditions(*conditions: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    return {"conditions": list(conditions)}
+
+
+@pytest.mark.parametrize(
+    "obj,expected",
+    [
+        (
+            _obj(
+                pykube.Deployment,
+                {},
+                _conditions({"type": "Progressing", "status": "False", "reason": "ProgressDeadlineExceeded"}),
+            ),
+            True,
+        ),
+        (
+            _obj(
+                pykube.Deployment,
+                {},
+                _conditions({"type": "Progressing", "status": "True", "reason": "NewRSAvailable"}),
+            ),
+            False,
+        ),
+        (_obj(pykube.Deployment, {}, {}), False),
+        (
+            _obj(pykube.Job, {}, _conditions({"type": "Failed", "status": "True", "reason": "BackoffLimitExceeded"})),
+            True,
+        ),
+        (_obj(pykube.Job, {}, _conditions({"type": "Complete", "status": "True"})), False),
+        (
+            _obj(
+                pykube.StatefulSet,
+                {"replicas": 2, "updateStrategy": {"type": "OnDelete"}},
+                {
+                    "observedGeneration": 1,
+                    "currentRevision": "a",
+                    "updateRevision": "b",
+                    "updatedReplicas": 0,
+                    "readyReplicas": 1,
+                },
+            ),
+            True,
+        ),
+        (
+            _obj(
+                pykube.StatefulSet,
+                {"replicas": 2, "updateStrategy": {"type": "RollingUpdate"}},
+                {
+                    "observedGeneration": 1,
+                    "currentRevision": "a",
+                    "updateRevision": "b",
+                    "updatedReplicas": 0,
+                    "readyReplicas": 1,
+                },
+            ),
+            False,
+        ),
+    ],
+)
+def test_registered_failure_conditions(obj: Any, expected: bool) -> None:
+    failed = get_failure_condition(obj.kind)
+
+    assert failed is not None
+    assert failed(obj) is expected
+
+
+@pytest.mark.parametrize(
+    "number_ready,pod_generations,expected",
+    [
+        (2, ["1", "2", "2"], True),
+        (3, ["1", "2", "2"], False),
+        # initial rollout or a new node: all the pods were created from the current template
+        (2, ["2", "2"], False),
+        (0, [], False),
+    ],
+    ids=["pending update", "ready", "no outdated pods", "no pods"],
+)
+def test_daemon_set_failed(
+    mocker: MockerFixture, number_ready: int, pod_generations: List[str], expected: bool
+) -> None:
+    status = {
+        "observedGeneration": 2,
+        "desiredNumberScheduled": 3,
+        "updatedNumberScheduled": 1,
+        "numberReady": number_ready,
+    }
+    ds = _obj(pykube.DaemonSet, {"updateStrategy": {"type": "OnDelete"}}, status, generation=2)
+    pods = [pykube.Pod(None, {"metadata": {"labels": {"pod-template-generation": g}}}) for g in pod_generations]
+    mocker.patch("pytest_helm_charts.k8s.daemon_set.find_workload_pods", return_value=pods)
+    failed = get_failure_condition(pykube.DaemonSet.kind)
+
+    assert failed is not None
+    assert failed(ds) is expected
+
+
+@pytest.mark.parametrize(
+    "status,expected",
+    [
+        (_conditions({"type": "Stalled", "status": "True", "reason": "InvalidChartReference"}), True),
+        (_conditions({"type": "Ready", "status": "False", "reason": "InvalidURL"}), True),
+        (_conditions({"type": "Ready", "status": "False", "reason": "DependencyNotReady"}), False),
+        (_conditions({"type": "Ready", "status": "False", "reason": "BuildFailed"}), False),
+        (_conditions({"type": "Stalled", "status": "True", "reason": "BuildFailed"}), True),
+        (_conditions({"type": "Reconciling", "status": "True"}, {"type": "Ready", "status": "Unknown"}), False),
+        # stalled condition of an older generation of the object
+        (_conditions({"type": "Stalled", "status": "True", "reason": "BuildFailed", "observedGeneration": 1}), False),
+        ({}, False),
+    ],
+)
+def test_flux_cr_failed(status: Dict[str, Any], expected: bool) -> None:
+    assert flux_cr_failed(_obj(KustomizationCR, {}, status, generation=2)) is expected
+    assert get_failure_condition(HelmReleaseCR.kind) is flux_cr_failed
+
+
+def test_failure_condition_for() -> None:
+    job_failed = get_failure_condition(pykube.Job.kind)
+
+    assert failure_condition_for(pykube.Job.kind) is job_failed
+    assert failure_condition_for(pykube.Job.kind, fail_fast=False) is None
+    assert failure_condition_for("UnknownKind") is None
+
+    set_fail_fast_enabled(False)
+    assert not failures.is_fail_fast_enabled()
+    assert failure_condition_for(pykube.Job.kind) is None
+    assert failure_condition_for(pykube.Job.kind, fail_fast=True) is job_failed
+
+
+def _mock_deployments(mocker: MockerFixture, deployment: pykube.Deployment) -> None:
+    objects_mock = mocker.patch("pykube.Deployment.objects")
+    objects_mock.return_value.filter.return_value.get_by_name.return_value = deployment
+    mocker.patch("pytest_helm_charts.utils.time.sleep")
+
+
+def test_wait_for_deployments_fails_fast(mocker: MockerFixture) -> None:
+    deployment = _obj(
+        pykube.Deployment,
+        {"replicas": 1},
+        _conditions({"type": "Progressing", "status": "False", "reason": "ProgressDeadlineExceeded"}),
+    )
+    _mock_deployments(mocker, deployment)
+
+    with pytest.raises(ObjectStatusError):
+        wait_for_deployments_to_run(mocker.MagicMock(), ["test"], "test", 60)
+
+    with pytest.raises(TimeoutError):
+        wait_for_deployments_to_run(mocker.MagicMock(), ["test"], "test", 2, fail_fast=False)
+
+
+def test_no_fail_fast_option(pytester: Pytester) -> None:
+    pytester.makepyfile(
+        """
+        from pytest_helm_charts.failures import is_fail_fast_enabled
+
+        def test_disabled():
+            assert not is_fail_fast_enabled()
+        """
+    )
+
+    result = pytester.runpytest("--helm-charts-no-fail-fast")
+
+    result.assert_outcomes(passed=1)
@@ -0,0 +1,506 @@
+from typing import Any, Dict, List, Union
+
+import pykube
+import pytest
+from pytest_mock import MockerFixture
+
+from pytest_helm_charts.errors import ObjectStatusError
+from pytest_helm_charts.flux.discovery import (
+    FLUX_COMPONENT_LABEL,
+    FLUX_FALLBACK_NAMESPACE,
+    FLUX_PART_OF_LABEL,
+    FLUX_REQUIRED_CONTROLLERS,
+    FLUX_VERSION_LABEL,
+    FluxDiscoveryCache,
+    discover_flux,
+)
+from pytest_helm_charts.flux.git_repository import GitRepositoryCR
+from pytest_helm_charts.flux.helm_release import (
+    ChartTemplate,
+    CrossNamespaceObjectReference,
+    HelmReleaseCR,
+    HelmReleaseSpec,
+    helm_release_dependency_layers,
+    helm_release_graph_factory_func,
+)
+from pytest_helm_charts.flux.helm_repository import HelmRepositoryCR, make_helm_repository_obj
+from pytest_helm_charts.flux.kustomization import (
+    InventoryEntry,
+    KustomizationCR,
+    kustomization_factory_func,
+    kustomization_inventory,
+    wait_for_kustomization_inventory_to_be_healthy,
+)
+from pytest_helm_charts.flux.suspend import flux_objects_suspended, resume_flux_objects, suspend_flux_objects
+from pytest_helm_charts.flux.utils import (
+    FLUX_RECONCILE_REQUESTED_AT_ANNOTATION,
+    FLUX_STATUS_CURRENT,
+    FLUX_STATUS_FAILED,
+    FLUX_STATUS_IN_PROGRESS,
+    FLUX_STATUS_TERMINATING,
+    flux_cr_ready,
+    flux_cr_reconciled,
+    NamespacedFluxCR,
+    flux_cr_status,
+    reconcile_flux_objects,
+    request_flux_reconciliation,
+    wait_for_flux_objects_to_be_ready,
+)
+
+READY = {"conditions": [{"type": "Ready", "status": "True"}]}
+
+
+def _kustomization(status: Dict[str, Any]) -> KustomizationCR:
+    return KustomizationCR(None, {"metadata": {"name": "test", "namespace": "flux"}, "status": status})
+
+
+def _ready(status: str = "True", **kwargs: Any) -> Dict[str, Any]:
+    return dict({"type": "Ready", "status": status}, **kwargs)
+
+
+@pytest.mark.parametrize(
+    "metadata,status,expected",
+    [
+        ({"generation": 2}, {"observedGeneration": 2, "conditions": [_ready()]}, FLUX_STATUS_CURRENT),
+        # Ready isn't the first condition
+        (
+            {"generation": 2},
+            {"conditions": [{"type": "ArtifactInStorage", "status": "True"}, _ready(observedGeneration=2)]},
+            FLUX_STATUS_CURRENT,
+        ),
+        # spec was just updated, the status is still about the previous generation
+        ({"generation": 3}, {"observedGeneration": 2, "conditions": [_ready()]}, FLUX_STATUS_IN_PROGRESS),
+        ({"generation": 3}, {"conditions": [_ready(observedGeneration=2)]}, FLUX_STATUS_IN_PROGRESS),
+        (
+            {"generation": 2},
+            {"conditions": [_ready(), {"type": "Reconciling", "status": "True"}]},
+            FLUX_STATUS_IN_PROGRESS,
+        ),
+        (
+            {"generation": 2},
+            {"conditions": [_ready("False"), {"type": "Stalled", "status": "True", "observedGeneration": 2}]},
+            FLUX_STATUS_FAILED,
+        ),
+        ({"generation": 2}, {"conditions": [_ready("False")]}, FLUX_STATUS_IN_PROGRESS),
+        ({"generation": 2}, {}, FLUX_STATUS_IN_PROGRESS),
+        (
+            {"generation": 2, "deletionTimestamp": "2024-01-01T00:00:00Z"},
+            {"conditions": [_ready()]},
+            FLUX_STATUS_TERMINATING,
+        ),
+    ],
+)
+def test_flux_cr_status(metadata: Dict[str, Any], status: Dict[str, Any], expected: str) -> None:
+    kustomization = _kustomization(status)
+    kustomization.obj["metadata"].update(metadata)
+
+    assert flux_cr_status(kustomization) == expected
+    assert flux_cr_ready(kustomization) is (expected == FLUX_STATUS_CURRENT)
+
+
+def _mock_controller(mocker: MockerFixture, kustomization: KustomizationCR) -> Any:
+    """Make patching the object set its annotation and report it as handled, like the Flux controller does."""
+
+    def _patch(patch: Dict[str, Any]) -> None:
+        requested_at = patch["metadata"]["annotations"][FLUX_RECONCILE_REQUESTED_AT_ANNOTATION]
+        kustomization.obj["status"] = dict(READY, lastHandledReconcileAt=requested_at)
+
+    mocker.patch.object(kustomization, "patch", side_effect=_patch)
+    objects_mock = mocker.patch.object(KustomizationCR, "objects")
+    objects_mock.return_value.filter.return_value.get_by_name.return_value = kustomization
+    mocker.patch("pytest_helm_charts.utils.time.sleep")
+    return objects_mock
+
+
+def test_request_flux_reconciliation(mocker: MockerFixture) -> None:
+    kustomization = _kustomization(READY)
+    mocker.patch.object(kustomization, "patch")
+
+    requested_at = request_flux_reconciliation(kustomization)
+
+    kustomization.patch.assert_called_once_with(
+        {"metadata": {"annotations": {FLUX_RECONCILE_REQUESTED_AT_ANNOTATION: requested_at}}}
+    )
+    assert request_flux_reconciliation(kustomization, "now") == "now"
+
+
+@pytest.mark.parametrize(
+    "status,expected",
+    [
+        (dict(READY, lastHandledReconcileAt="now"), True),
+        (dict(READY, lastHandledReconcileAt="before"), False),
+        ({"lastHandledReconcileAt": "now", "conditions": [{"type": "Ready", "status": "False"}]}, False),
+        (READY, False),
+    ],
+)
+def test_flux_cr_reconciled(status: Dict[str, Any], expected: bool) -> None:
+    assert flux_cr_reconciled("now")(_kustomization(status)) is expected
+
+
+def test_reconcile_flux_objects(mocker: MockerFixture) -> None:
+    kustomization = _kustomization(dict(READY, lastHandledReconcileAt="before"))
+    _mock_controller(mocker, kustomization)
+
+    assert reconcile_flux_objects(mocker.MagicMock(), KustomizationCR, ["test"], "flux", 5) == [kustomization]
+    kustomization.patch.assert_called_once()
+    assert kustomization.obj["status"]["lastHandledReconcileAt"] != "before"
+
+
+def test_reconcile_flux_objects_times_out(mocker: MockerFixture) -> None:
+    kustomization = _kustomization(READY)
+    _mock_controller(mocker, kustomization).return_value.filter.return_value.get_by_name.side_effect = [
+        kustomization,
+        _kustomization(READY),
+        _kustomization(READY),
+    ]
+
+    with pytest.raises(TimeoutError):
+        reconcile_flux_objects(mocker.MagicMock(), KustomizationCR, ["test"], "flux", 2)
+
+
+def test_reconcile_flux_objects_ignores_previous_failure(mocker: MockerFixture) -> None:
+    stalled = {"conditions": [{"type": "Stalled", "status": "True", "reason": "ArtifactFailed"}]}
+    kustomization = _kustomization(dict(stalled, lastHandledReconcileAt="before"))
+    objects_mock = _mock_controller(mocker, kustomization)
+    objects_mock.return_value.filter.return_value.get_by_name.side_effect = [
+        kustomization,
+        _kustomization(dict(stalled, lastHandledReconcileAt="before")),
+        kustomization,
+    ]
+
+    assert reconcile_flux_objects(mocker.MagicMock(), KustomizationCR, ["test"], "flux", 5, fail_fast=True) == [
+        kustomization
+    ]
+
+
+def test_reconcile_flux_objects_fails_fast_after_handling_request(mocker: MockerFixture) -> None:
+    kustomization = _kustomization(READY)
+    objects_mock = _mock_controller(mocker, kustomization)
+    stalled = _kustomization({"conditions": [{"type": "Stalled", "status": "True", "reason": "ArtifactFailed"}]})
+    kustomization.patch.side_effect = lambda patch: stalled.obj["status"].update(
+        lastHandledReconcileAt=patch["metadata"]["annotations"][FLUX_RECONCILE_REQUESTED_AT_ANNOTATION]
+    )
+    objects_mock.return_value.filter.return_value.get_by_name.side_effect = [kustomization, stalled]
+
+    with pytest.raises(ObjectStatusError):
+        reconcile_flux_objects(mocker.MagicMock(), KustomizationCR, ["test"], "flux", 5, fail_fast=True)
+
+
+def test_factory_reconciles_already_created_objects(mocker: MockerFixture) -> None:
+    kustomization = _kustomization(READY)
+    kustomization.obj["metadata"]["name"] = "created"
+    reconcile_mock = mocker.patch("pytest_helm_charts.flux.kustomization.reconcile_flux_objects")
+    factory = kustomization_factory_func(mocker.MagicMock(), mocker.MagicMock(), [kustomization])
+
+    args = ("flux", True, "1m", "./", "repo", "1m")
+    assert factory("created", *args) is kustomization
+    reconcile_mock.assert_not_called()
+    assert factory("created", *args, reconcile=True) is kustomization
+    reconcile_mock.assert_called_once_with(mocker.ANY, KustomizationCR, ["created"], "flux", 30)
+
+
+def test_reconcile_flux_objects_requires_names(mocker: MockerFixture) -> None:
+    with pytest.raises(ValueError):
+        reconcile_flux_objects(mocker.MagicMock(), KustomizationCR, [], "flux")
+
+
+def _hr_spec(name: str, *depends_on: str, namespace: str = "apps") -> HelmReleaseSpec:
+    chart = ChartTemplate(name, CrossNamespaceObjectReference("HelmRepository", "repo", namespace="flux"))
+    refs = [
+        CrossNamespaceObjectReference("HelmRelease", d.split("/")[-1], namespace=d.split("/")[0] if "/" in d else None)
+        for d in depends_on
+    ]
+    return HelmReleaseSpec(name, namespace, chart, depends_on=refs)
+
+
+def test_helm_release_dependency_layers() -> None:
+    specs = [
+        _hr_spec("app", "database", "cache"),
+        _hr_spec("database", "other/operator"),
+        _hr_spec("cache", "external"),
+        _hr_spec("operator", namespace="other"),
+    ]
+    repository = make_helm_repository_obj(None, "repo", "flux", "https://charts.example.com", "1m")
+
+    layers = helm_release_dependency_layers(specs, [repository])
+
+    assert [[s.name for s in layer] for layer in layers] == [["cache", "operator"], ["database"], ["app"]]
+
+
+@pytest.mark.parametrize(
+    "specs,error",
+    [
+        ([_hr_spec("a", "b"), _hr_spec("b", "c"), _hr_spec("c", "a")], "form a cycle"),
+        ([_hr_spec("a"), _hr_spec("a")], "more than once"),
+    ],
+)
+def test_helm_release_dependency_layers_errors(specs: List[HelmReleaseSpec], error: str) -> None:
+    with pytest.raises(ValueError, match=error):
+        helm_release_dependency_layers(specs)
+
+
+def test_helm_release_graph_factory(mocker: MockerFixture) -> None:
+    mocker.patch.object(HelmRepositoryCR, "create")
+    mocker.patch.object(HelmReleaseCR, "create")
+    wait_mock = mocker.patch("pytest_helm_charts.flux.helm_release.wait_for_flux_objects_to_be_ready")
+    namespace_factory = mocker.MagicMock()
+    created_helm_releases: List[HelmReleaseCR] = []
+    created_sources: List[NamespacedFluxCR] = []
+    factory = helm_release_graph_factory_func(
+        mocker.MagicMock(), namespace_factory, created_helm_releases, created_sources
+    )
+    repository = make_helm_repository_obj(None, "repo", "flux", "https://charts.example.com", "1m")
+
+    helm_releases = factory([_hr_spec("app", "database"), _hr_spec("database")], [repository], timeout_sec=60)
+
+    assert [hr.name for hr in helm_releases] == ["app", "database"]
+    assert helm_releases[0].obj["spec"]["dependsOn"] == [
+        {"kind": "HelmRelease", "name": "database", "apiVersion": None, "namespace": None}
+    ]
+    assert created_helm_releases == helm_releases
+    assert created_sources == [repository]
+    assert [c.args[0] for c in namespace_factory.call_args_list] == ["flux", "apps"]
+    wait_mock.assert_called_once_with(mocker.ANY, [repository, *helm_releases], 60, None)
+
+
+def _flux_obj(obj_type: Any, name: str, namespace: str, ready: Dict[str, Any]) -> Any:
+    return obj_type(None, {"metadata": {"name": name, "namespace": namespace}, "status": {"conditions": [ready]}})
+
+
+def test_wait_for_flux_objects_to_be_ready(mocker: MockerFixture) -> None:
+    repository = _flux_obj(HelmRepositoryCR, "repo", "flux", _ready())
+    not_ready = _flux_obj(HelmReleaseCR, "app", "apps", _ready("False", message="dependency 'apps/db' is not ready"))
+    ready = _flux_obj(HelmReleaseCR, "app", "apps", _ready())
+    mocker.patch.object(HelmRepositoryCR, "objects").return_value.filter.return_value = [repository]
+    releases_mock = mocker.patch.object(HelmReleaseCR, "objects")
+    releases_mock.return_value.filter.side_effect = [[not_ready], [ready]]
+    mocker.patch("pytest_helm_charts.flux.utils.time.sleep")
+
+    assert wait_for_flux_objects_to_be_ready(mocker.MagicMock(), [ready, repository], 5) == [ready, repository]
+    assert releases_mock.return_value.filter.call_count == 2
+
+    releases_mock.return_value.filter.side_effect = None
+    releases_mock.return_value.filter.return_value = [not_ready]
+    with pytest.raises(TimeoutError, match="dependency 'apps/db' is not ready"):
+        wait_for_flux_objects_to_be_ready(mocker.MagicMock(), [ready, repository], 2)
+
+    releases_mock.return_value.filter.return_value = [
+        _flux_obj(HelmReleaseCR, "app", "apps", _ready("False", reason="InvalidChartReference"))
+    ]
+    with pytest.raises(ObjectStatusError):
+        wait_for_flux_objects_to_be_ready(mocker.MagicMock(), [ready, repository], 5)
+
+
+def _inventory_kustomization(*ids: str) -> KustomizationCR:
+    return _kustomization(dict(READY, inventory={"entries": [{"id": i, "v": "v1"} for i in ids]}))
+
+
+def test_kustomization_inventory() -> None:
+    kustomization = _inventory_kustomization(
+        "apps_web_apps_Deployment",
+        "_apps__Namespace",
+        "_system__auth-delegator_rbac.authorization.k8s.io_ClusterRoleBinding",
+        "apps_web__metrics__reader_rbac.authorization.k8s.io_Role",
+    )
+
+    assert kustomization_inventory(kustomization) == [
+        InventoryEntry("apps", "web", "apps", "Deployment", "v1"),
+        InventoryEntry("", "apps", "", "Namespace", "v1"),
+        InventoryEntry("", "system:auth-delegator", "rbac.authorization.k8s.io", "ClusterRoleBinding", "v1"),
+        InventoryEntry("apps", "web:metrics:reader", "rbac.authorization.k8s.io", "Role", "v1"),
+    ]
+    assert kustomization_inventory(_kustomization(READY)) == []
+    for entry_id in ["apps_web", "apps_web_extra_apps_Deployment"]:
+        with pytest.raises(ValueError):
+            InventoryEntry.from_id(entry_id)
+
+
+def _deployment(ready: bool) -> pykube.Deployment:
+    status = {"observedGeneration": 1, "updatedReplicas": 1, "availableReplicas": 1 if ready else 0}
+    metadata = {"name": "web", "namespace": "apps", "generation": 1}
+    return pykube.Deployment(None, {"metadata": metadata, "spec": {"replicas": 1}, "status": status})
+
+
+def test_wait_for_kustomization_inventory_to_be_healthy(mocker: MockerFixture) -> None:
+    kustomization = _inventory_kustomization(
+        "apps_web_apps_Deployment", "apps_web_core_Service", "apps_db_helm.toolkit.fluxcd.io_HelmRelease"
+    )
+    deployments_mock = mocker.patch.object(pykube.Deployment, "objects")
+    deployments_mock.return_value.filter.side_effect = [[_deployment(False)], [_deployment(True)]]
+    releases_mock = mocker.patch.object(HelmReleaseCR, "objects")
+    releases_mock.return_value.filter.return_value = [_flux_obj(HelmReleaseCR, "db", "apps", _ready())]
+    mocker.patch("pytest_helm_charts.flux.kustomization.time.sleep")
+
+    stats = wait_for_kustomization_inventory_to_be_healthy(mocker.MagicMock(), [kustomization], 5)
+
+    assert sorted(o.name for o in stats.objects) == ["Deployment apps/web", "HelmRelease apps/db"]
+    assert all(o.ready_sec is not None for o in stats.objects)
+    assert deployments_mock.return_value.filter.call_count == 2
+    assert releases_mock.return_value.filter.call_count == 2
+
+    deployments_mock.return_value.filter.side_effect = None
+    deployments_mock.return_value.filter.return_value = [_deployment(False)]
+    with pytest.raises(TimeoutError, match="Deployment apps/web"):
+        wait_for_kustomization_inventory_to_be_healthy(mocker.MagicMock(), [kustomization], 2)
+
+
+def _flux_deployment(name: str, running: bool = True, labeled: bool = True) -> pykube.Deployment:
+    deployment = _deployment(running)
+    deployment.obj["metadata"].update(name=name, namespace="flux-system")
+    if labeled:
+        deployment.obj["metadata"]["labels"] = {
+            FLUX_PART_OF_LABEL: "flux",
+            FLUX_COMPONENT_LABEL: name,
+            FLUX_VERSION_LABEL: "v2.3.0",
+        }
+    image = f"ghcr.io/fluxcd/{name}:v1.0.{len(name)}"
+    deployment.obj["spec"]["template"] = {"spec": {"containers": [{"name": "manager", "image": image}]}}
+    return deployment
+
+
+def _mock_flux_discovery(mocker: MockerFixture, *rounds: Union[List[pykube.Deployment], Exception]) -> Any:
+    deployments_mock = mocker.patch.object(pykube.Deployment, "objects")
+    deployments_mock.return_value.filter.side_effect = list(rounds)
+    crd = pykube.CustomResourceDefinition(
+        None,
+        {
+            "metadata": {"name": "helmreleases.helm.toolkit.fluxcd.io"},
+            "spec": {
+                "names": {"kind": "HelmRelease"},
+                "versions": [{"name": "v2beta2"}, {"name": "v2", "storage": True}],
+            },
+        },
+    )
+    mocker.patch.object(pykube.CustomResourceDefinition, "objects").return_value.filter.return_value = [crd]
+    mocker.patch("pytest_helm_charts.flux.discovery.time.sleep")
+    return deployments_mock
+
+
+def test_discover_flux(mocker: MockerFixture) -> None:
+    installed = [_flux_deployment(c) for c in FLUX_REQUIRED_CONTROLLERS]
+    deployments_mock = _mock_flux_discovery(
+        mocker, [_flux_deployment("helm-controller", running=False), *installed[1:]], installed
+    )
+    cache = FluxDiscoveryCache()
+
+    installation = cache.get(mocker.MagicMock(url="https://cluster"), 5)
+
+    assert installation.version == "v2.3.0"
+    assert sorted(installation.controllers) == sorted(FLUX_REQUIRED_CONTROLLERS)
+    assert installation.controllers["helm-controller"].version == "v1.0.15"
+    assert installation.crd_versions == {"HelmRelease": "v2"}
+    assert cache.get(mocker.MagicMock(url="https://cluster"), 5) is installation
+    assert deployments_mock.return_value.filter.call_count == 2
+    with pytest.raises(pytest.skip.Exception, match="image-automation-controller"):
+        installation.require_controllers("helm-controller", "image-automation-controller")
+
+
+def test_discover_flux_without_access_to_crds(mocker: MockerFixture) -> None:
+    _mock_flux_discovery(mocker, [_flux_deployment(c) for c in FLUX_REQUIRED_CONTROLLERS])
+    crds_mock = pykube.CustomResourceDefinition.objects.return_value.filter  # type: ignore[attr-defined]
+    crds_mock.side_effect = pykube.exceptions.HTTPError(403, "forbidden")
+
+    installation = discover_flux(mocker.MagicMock(), 5)
+
+    assert sorted(installation.controllers) == sorted(FLUX_REQUIRED_CONTROLLERS)
+    assert installation.crd_versions == {}
+
+
+def test_discover_flux_without_access_to_all_namespaces(mocker: MockerFixture) -> None:
+    unlabeled = [_flux_deployment(c, labeled=False) for c in FLUX_REQUIRED_CONTROLLERS]
+    deployments_mock = _mock_flux_discovery(mocker, pykube.exceptions.HTTPError(403, "forbidden"), unlabeled)
+
+    installation = discover_flux(mocker.MagicMock(), 5)
+
+    assert sorted(installation.controllers) == sorted(FLUX_REQUIRED_CONTROLLERS)
+    deployments_mock.return_value.filter.assert_called_with(namespace=FLUX_FALLBACK_NAMESPACE)
+
+
+def test_discover_flux_without_labels(mocker: MockerFixture) -> None:
+    unlabeled = [_flux_deployment(c, labeled=False) for c in FLUX_REQUIRED_CONTROLLERS]
+    _mock_flux_discovery(mocker, [], unlabeled + [_flux_deployment("other", labeled=False)])
+
+    installation = discover_flux(mocker.MagicMock(), 5)
+
+    assert sorted(installation.controllers) == sorted(FLUX_REQUIRED_CONTROLLERS)
+    assert installation.version is None
+
+
+def test_discover_flux_times_out_on_missing_controllers(mocker: MockerFixture) -> None:
+    _mock_flux_discovery(mocker, *[[_flux_deployment("helm-controller")]] * 2)
+
+    with pytest.raises(TimeoutError, match="source-controller"):
+        discover_flux(mocker.MagicMock(), 2)
+
+
+def test_flux_discovery_cache_keeps_errors(mocker: MockerFixture) -> None:
+    deployments_mock = _mock_flux_discovery(mocker, *[[_flux_deployment("helm-controller")]] * 2)
+    cache = FluxDiscoveryCache()
+
+    for _ in range(2):
+        with pytest.raises(TimeoutError, match="source-controller"):
+            cache.get(mocker.MagicMock(url="https://cluster"), 2)
+
+    assert deployments_mock.return_value.filter.call_count == 2
+
+
+def _mock_suspendable(mocker: MockerFixture, *objects: NamespacedFluxCR) -> None:
+    for obj in objects:
+        obj.obj.setdefault("spec", {})
+
+        def _patch(patch: Dict[str, Any], obj: NamespacedFluxCR = obj) -> None:
+            if obj.name == "broken" and patch["spec"]["suspend"]:
+                raise pykube.exceptions.HTTPError(500, "broken")
+            if obj.name == "deleted":
+                raise pykube.exceptions.HTTPError(404, "not found")
+            obj.obj["spec"].update(patch["spec"])
+
+        mocker.patch.object(obj, "patch", side_effect=_patch)
+    for obj_type in (KustomizationCR, HelmReleaseCR, GitRepositoryCR, HelmRepositoryCR):
+        mocker.patch.object(obj_type, "objects").return_value.filter.return_value = [
+            o for o in objects if isinstance(o, obj_type)
+        ]
+
+
+def test_flux_objects_suspended(mocker: MockerFixture) -> None:
+    app = _flux_obj(HelmReleaseCR, "app", "apps", _ready())
+    own = _flux_obj(HelmReleaseCR, "own", "apps", _ready())
+    repository = _flux_obj(HelmRepositoryCR, "repo", "flux", _ready())
+    suspended_by_others = _kustomization(READY)
+    suspended_by_others.obj["spec"] = {"suspend": True}
+    _mock_suspendable(mocker, app, own, repository, suspended_by_others)
+
+    with pytest.raises(RuntimeError):
+        with flux_objects_suspended(mocker.MagicMock(), exclude=[own]) as suspended:
+            assert suspended == [app, repository]
+            assert app.obj["spec"]["suspend"] is True and repository.obj["spec"]["suspend"] is True
+            raise RuntimeError("test failed")
+
+    assert app.obj["spec"]["suspend"] is False and repository.obj["spec"]["suspend"] is False
+    assert "suspend" not in own.obj["spec"]
+    assert suspended_by_others.obj["spec"]["suspend"] is True
+
+
+def test_suspend_flux_objects_resumes_on_error(mocker: MockerFixture) -> None:
+    app = _flux_obj(HelmReleaseCR, "app", "apps", _ready())
+    broken = _flux_obj(HelmReleaseCR, "broken", "apps", _ready())
+    _mock_suspendable(mocker, app, broken)
+
+    with pytest.raises(pykube.exceptions.HTTPError):
+        suspend_flux_objects(mocker.MagicMock(), [HelmReleaseCR], namespace="apps")
+
+    assert app.obj["spec"]["suspend"] is False
+    HelmReleaseCR.objects.return_value.filter.assert_called_once_with(namespace="apps", selector=None)
+
+
+def test_suspend_flux_objects_skips_deleted_objects(mocker: MockerFixture) -> None:
+    app = _flux_obj(HelmReleaseCR, "app", "apps", _ready())
+    deleted = _flux_obj(HelmReleaseCR, "deleted", "apps", _ready())
+    _mock_suspendable(mocker, app, deleted)
+
+    suspended = suspend_flux_objects(mocker.MagicMock(), [HelmReleaseCR])
+    assert suspended == [app, deleted]
+    resume_flux_objects(suspended)
+
+    assert app.obj["spec"]["suspend"] is False
+    assert "suspend" not in deleted.obj["spec"]
@@ -0,0 +1,69 @@
+import subprocess  # nosec
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from pytest_helm_charts.git_server import GitServer, commit_directory
+
+
+def _make_manifests(source_dir: Path) -> Path:
+    (source_dir / "apps").mkdir(parents=True)
+    (source_dir / "apps" / "kustomization.yaml").write_text("resources:\n  - deployment.yaml\n")
+    (source_dir / "apps" / "deployment.yaml").write_text("kind: Deployment\n")
+    (source_dir / ".gitignore").write_text("*.tmp\n")
+    (source_dir / "ignored.tmp").write_text("ignored\n")
+    return source_dir
+
+
+def test_commit_directory_is_cached_by_content(tmp_path: Path) -> None:
+    source_dir = _make_manifests(tmp_path / "manifests")
+    cache_dir = tmp_path / "cache"
+
+    snapshot = commit_directory(source_dir, cache_dir)
+
+    assert snapshot.branch == "master"
+    assert commit_directory(source_dir, cache_dir) == snapshot
+    # the same content committed from another directory gets the same commit
+    other = commit_directory(_make_manifests(tmp_path / "other"), tmp_path / "other-cache")
+    assert other.commit == snapshot.commit
+
+    (source_dir / "apps" / "deployment.yaml").write_text("kind: StatefulSet\n")
+    changed = commit_directory(source_dir, cache_dir)
+    assert changed.path != snapshot.path and changed.commit != snapshot.commit
+    assert sorted(p.name for p in cache_dir.iterdir()) == sorted([snapshot.path.name, changed.path.name])
+
+
+def test_git_server_serves_committed_directory(tmp_path: Path) -> None:
+    source_dir = _make_manifests(tmp_path / "manifests")
+
+    with GitServer(tmp_path / "repositories", "127.0.0.1", bind_address="127.0.0.1") as server:
+        snapshot = server.add_directory(source_dir)
+        clone_dir = tmp_path / "clone"
+        subprocess.run(  # nosec
+            ["git", "clone", "--quiet", "--branch", snapshot.branch, server.url_for(snapshot), str(clone_dir)],
+            check=True,
+            timeout=30,
+        )
+
+    assert (clone_dir / "apps" / "deployment.yaml").read_text() == "kind: Deployment\n"
+    assert not (clone_dir / "ignored.tmp").exists()
+    head = subprocess.run(  # nosec
+        ["git", "rev-parse", "HEAD"], cwd=clone_dir, check=True, capture_output=True, text=True
+    ).stdout.strip()
+    assert head == snapshot.commit
+
+
+def test_git_server_serves_only_added_repositories(tmp_path: Path) -> None:
+    root_dir = tmp_path / "repositories"
+    other = commit_directory(_make_manifests(tmp_path / "other"), root_dir, "other")
+
+    with GitServer(root_dir, "127.0.0.1", bind_address="127.0.0.1") as server:
+        snapshot = server.add_directory(_make_manifests(tmp_path / "manifests"))
+        with urlopen(f"{server.url_for(snapshot)}/info/refs?service=git-upload-pack", timeout=5) as response:
+            assert response.status == 200
+        for path in [f"{other.path.name}/info/refs", f"{snapshot.path.name}/../{other.path.name}/HEAD"]:
+            with pytest.raises(HTTPError) as e:
+                urlopen(f"{server.url}/{path}", timeout=5)
+            assert e.value.code == 404
@@ -0,0 +1,108 @@
+from copy import deepcopy
+from pathlib import Path
+from typing import Any, List
+
+import pykube
+import pytest
+from pytest_mock import MockerFixture
+
+from pytest_helm_charts.giantswarm_app_platform.catalog import CatalogCR, catalog_factory_func
+from pytest_helm_charts.k8s.fixtures import _namespace_factory_impl
+from pytest_helm_charts.k8s.namespace import make_namespace_object
+from pytest_helm_charts.parallel import ENV_VAR_XDIST_WORKER, SharedResourceRegistry, worker_unique_name
+from pytest_helm_charts.utils import release_and_delete_shared_objects
+
+
+def test_worker_unique_name_not_parallel(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv(ENV_VAR_XDIST_WORKER, raising=False)
+    assert worker_unique_name("gatling-simulation") == "gatling-simulation"
+
+
+def test_worker_unique_name_parallel(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv(ENV_VAR_XDIST_WORKER, "gw3")
+    assert worker_unique_name("gatling-simulation") == "gatling-simulation-gw3"
+    long_name = worker_unique_name("a" * 70)
+    assert len(long_name) == 63
+    assert long_name.endswith("-gw3")
+
+
+def test_shared_resource_created_once_and_destroyed_by_last_user(tmp_path: Path) -> None:
+    registry = SharedResourceRegistry(tmp_path)
+    other_worker_registry = SharedResourceRegistry(tmp_path)
+    created: List[int] = []
+    destroyed: List[Any] = []
+
+    def create() -> dict:
+        created.append(1)
+        return {"name": "shared"}
+
+    assert registry.acquire("Catalog/default/shared", create) == {"name": "shared"}
+    assert other_worker_registry.acquire("Catalog/default/shared", create) == {"name": "shared"}
+    assert len(created) == 1
+
+    assert not registry.release("Catalog/default/shared", destroyed.append)
+    assert destroyed == []
+    assert other_worker_registry.release("Catalog/default/shared", destroyed.append)
+    assert destroyed == [{"name": "shared"}]
+
+    # once destroyed, the resource is created again by the next user
+    registry.acquire("Catalog/default/shared", create)
+    assert len(created) == 2
+
+
+def test_shared_resource_release_unknown_key(tmp_path: Path) -> None:
+    registry = SharedResourceRegistry(tmp_path)
+    assert not registry.release("unknown", lambda _: None)
+
+
+def test_namespace_shared_between_workers(
+    monkeypatch: pytest.MonkeyPatch, mocker: MockerFixture, tmp_path: Path
+) -> None:
+    monkeypatch.setenv(ENV_VAR_XDIST_WORKER, "gw0")
+    ensure_mock = mocker.patch("pytest_helm_charts.k8s.fixtures.ensure_namespace_exists")
+    cluster = mocker.MagicMock(name="cluster")
+    ensure_mock.return_value = (make_namespace_object(cluster.kube_client, "shared-ns"), True)
+    delete_mock = mocker.patch("pytest_helm_charts.utils.delete_and_wait_for_objects")
+    registry = SharedResourceRegistry(tmp_path)
+
+    reload_mock = mocker.patch.object(pykube.Namespace, "reload")
+    registry = SharedResourceRegistry(tmp_path)
+
+    worker_0 = iter(_namespace_factory_impl(cluster, registry))
+    worker_1 = iter(_namespace_factory_impl(cluster, registry))
+    next(worker_0)("shared-ns")
+    reload_mock.assert_not_called()
+    next(worker_1)("shared-ns")
+    ensure_mock.assert_called_once()
+    # the namespace ensured by another worker is fetched, not only made locally
+    reload_mock.assert_called_once_with()
+
+    next(worker_0, None)
+    delete_mock.assert_not_called()
+    next(worker_1, None)
+    delete_mock.assert_called_once()
+
+
+def test_catalog_shared_between_workers_with_other_url(mocker: MockerFixture, tmp_path: Path) -> None:
+    mocker.patch.object(CatalogCR, "create")
+    delete_mock = mocker.patch("pytest_helm_charts.utils.delete_and_wait_for_objects")
+    registry = SharedResourceRegistry(tmp_path)
+    workers_catalogs: List[List[CatalogCR]] = [[], [], []]
+    worker_0, worker_1, worker_2 = [
+        catalog_factory_func(mocker.MagicMock(), c, mocker.MagicMock(), registry) for c in workers_catalogs
+    ]
+    catalog = worker_0("shared", "default", "https://one.example.com/")
+
+    def _reload(self: CatalogCR) -> None:
+        self.set_obj(deepcopy(catalog.obj))
+
+    mocker.patch.object(CatalogCR, "reload", _reload)
+    worker_1("shared", "default", "https://one.example.com/")
+    with pytest.raises(ValueError, match="another worker"):
+        worker_2("shared", "default", "https://two.example.com/")
+
+    assert workers_catalogs[2] == []
+    # the reference of the worker that got the error is released, so the catalog is deleted by the last user
+    for catalogs in workers_catalogs[:2]:
+        release_and_delete_shared_objects(mocker.MagicMock(), CatalogCR, catalogs, registry)
+    delete_mock.assert_called_once()
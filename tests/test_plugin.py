@@ -1,8 +1,14 @@
+import importlib
+import inspect
+import subprocess  # nosec
+import sys
 from typing import Dict, Mapping
 
 import pytest
+from pytest import Pytester
 
 from pytest_helm_charts.fixtures import _filter_extra_info_from_mapping, ENV_VAR_ATS_EXTRA_PREFIX
+from pytest_helm_charts.plugin import LAZY_FIXTURES, load_fixture_function
 
 
 @pytest.mark.parametrize(
@@ -17,3 +23,65 @@ from pytest_helm_charts.fixtures import _filter_extra_info_from_mapping, ENV_VAR
 )
 def test_test_extra_info(env: Mapping[str, str], expected: Dict[str, str]) -> None:
     assert _filter_extra_info_from_mapping(env) == expected
+
+
+FIXTURE_MODULES = sorted({module_name for module_name, _, _ in LAZY_FIXTURES.values()})
+# `parallel` holds the xdist helpers the plugin's hooks need, so it's the only fixture module that must stay light
+HEAVY_MODULES = [
+    "pykube",
+    "requests",
+    "yaml",
+    "deprecated",
+    "pytest_helm_charts.clusters",
+    *(m for m in FIXTURE_MODULES if m != "pytest_helm_charts.parallel"),
+]
+
+
+def test_plugin_import_is_lightweight() -> None:
+    """Startup benchmark: importing the plugin must not pull in any heavy dependencies."""
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import pytest_helm_charts.plugin\n"
+        "print(f'plugin import took {time.perf_counter() - start:.3f} s', file=sys.stderr)\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)  # nosec
+    assert result.stdout.strip() == ""
+
+
+def test_collect_only_does_not_load_fixture_modules(pytester: Pytester) -> None:
+    pytester.makeconftest(
+        f"""
+        import sys
+
+        def pytest_collection_finish(session):
+            loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]
+            print("loaded heavy modules: " + ",".join(loaded) + ";")
+        """
+    )
+    pytester.makepyfile("def test_unrelated():\n    assert True\n")
+    result = pytester.runpytest_subprocess("--collect-only", "-s")
+    result.stdout.fnmatch_lines(["loaded heavy modules: ;"])
+
+
+@pytest.mark.parametrize("fixture_name", list(LAZY_FIXTURES.keys()))
+def test_lazy_fixture_matches_definition(fixture_name: str) -> None:
+    module_name, scope, arg_names = LAZY_FIXTURES[fixture_name]
+    fixture_def = getattr(importlib.import_module(module_name), fixture_name)
+    marker = fixture_def._fixture_function_marker
+    assert marker.name in (None, fixture_name)
+    assert marker.scope == scope
+    assert tuple(inspect.signature(load_fixture_function(fixture_name)).parameters) == arg_names
+
+
+@pytest.mark.parametrize("module_name", FIXTURE_MODULES)
+def test_every_fixture_is_registered_lazily(module_name: str) -> None:
+    module = importlib.import_module(module_name)
+    defined = {
+        name
+        for name, obj in vars(module).items()
+        if hasattr(obj, "_fixture_function_marker") and inspect.unwrap(obj).__module__ == module_name
+    }
+    registered = {name for name, (lazy_module, _, _) in LAZY_FIXTURES.items() if lazy_module == module_name}
+    assert defined == registered
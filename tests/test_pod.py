@@ -0,0 +1,146 @@
+from typing import Any, Dict, List, Optional
+
+import pykube
+import pytest
+from pytest_mock import MockerFixture
+
+from pytest_helm_charts.errors import PodFailureError
+from pytest_helm_charts.k8s.deployment import wait_for_deployments_to_run
+from pytest_helm_charts.k8s.pod import find_pod_failure, find_workload_pods
+from pytest_helm_charts.k8s.stateful_set import wait_for_stateful_sets_to_run
+
+LABELS = {"app": "hello"}
+
+
+def _pod(name: str, owner_uid: str, container_statuses: List[Dict[str, Any]]) -> pykube.Pod:
+    return pykube.Pod(
+        None,
+        {
+            "metadata": {"name": name, "namespace": "test", "labels": LABELS, "ownerReferences": [{"uid": owner_uid}]},
+            "status": {"containerStatuses": container_statuses},
+        },
+    )
+
+
+def _container(state: Dict[str, Any], last_terminated: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    status: Dict[str, Any] = {"name": "app", "state": state, "restartCount": 3}
+    if last_terminated is not None:
+        status["lastState"] = {"terminated": last_terminated}
+    return status
+
+
+CRASH_LOOP = _container(
+    {"waiting": {"reason": "CrashLoopBackOff", "message": "back-off 40s restarting failed container"}},
+    {"exitCode": 1, "reason": "Error", "message": "panic: config missing\n"},
+)
+
+
+@pytest.mark.parametrize(
+    "container,expected_reason",
+    [
+        (CRASH_LOOP, "CrashLoopBackOff"),
+        (
+            _container({"waiting": {"reason": "ImagePullBackOff", "message": "Back-off pulling image"}}),
+            "ImagePullBackOff",
+        ),
+        (
+            _container({"waiting": {"reason": "CrashLoopBackOff"}}, {"exitCode": 137, "reason": "OOMKilled"}),
+            "OOMKilled",
+        ),
+        (_container({"terminated": {"exitCode": 137, "reason": "OOMKilled"}}), "OOMKilled"),
+        (_container({"waiting": {"reason": "ContainerCreating"}}), None),
+        (_container({"waiting": {"reason": "ErrImagePull", "message": "i/o timeout"}}), None),
+        (_container({"waiting": {"reason": "CreateContainerConfigError", "message": 'secret "db" not found'}}), None),
+        # restarted after running out of memory once and running again
+        (_container({"running": {}}, {"exitCode": 137, "reason": "OOMKilled"}), None),
+    ],
+)
+def test_find_pod_failure(container: Dict[str, Any], expected_reason: Optional[str]) -> None:
+    failure = find_pod_failure(_pod("hello-1", "uid", [container]))
+
+    if expected_reason is None:
+        assert failure is None
+    else:
+        assert failure is not None
+        assert failure.reason == expected_reason
+        assert failure.container_name == "app"
+
+
+def test_pod_failure_describes_last_termination() -> None:
+    failure = find_pod_failure(_pod("hello-1", "uid", [CRASH_LOOP]))
+
+    assert failure is not None
+    assert failure.describe() == (
+        "Pod 'test/hello-1', container 'app': CrashLoopBackOff (back-off 40s restarting failed container), "
+        "restarted 3 times; last termination: exit code 1, reason Error, message: panic: config missing"
+    )
+
+
+def _workload(kind_type: Any, uid: str, ready: bool) -> Any:
+    status = (
+        {"observedGeneration": 1, "replicas": 1, "updatedReplicas": 1, "availableReplicas": 1, "readyReplicas": 1}
+        if ready
+        else {"observedGeneration": 1, "replicas": 1, "readyReplicas": 0}
+    )
+    return kind_type(
+        None,
+        {
+            "metadata": {"name": "hello", "namespace": "test", "uid": uid, "generation": 1},
+            "spec": {"replicas": 1, "selector": {"matchLabels": LABELS}},
+            "status": status,
+        },
+    )
+
+
+def _mock_objects(mocker: MockerFixture, kind_type: Any, result: Any) -> Any:
+    objects_mock = mocker.patch.object(kind_type, "objects")
+    objects_mock.return_value.filter.return_value = result
+    return objects_mock
+
+
+def _mock_get_by_name(mocker: MockerFixture, kind_type: Any, result: Any) -> None:
+    _mock_objects(
+        mocker, kind_type, mocker.MagicMock()
+    ).return_value.filter.return_value.get_by_name.return_value = result
+
+
+def test_find_workload_pods_of_deployment(mocker: MockerFixture) -> None:
+    deployment = _workload(pykube.Deployment, "deploy-uid", ready=False)
+    replica_set = pykube.ReplicaSet(
+        None, {"metadata": {"name": "hello-abc", "uid": "rs-uid", "ownerReferences": [{"uid": "deploy-uid"}]}}
+    )
+    other_replica_set = pykube.ReplicaSet(
+        None, {"metadata": {"name": "other-abc", "uid": "other-uid", "ownerReferences": [{"uid": "other"}]}}
+    )
+    _mock_objects(mocker, pykube.ReplicaSet, [replica_set, other_replica_set])
+    own_pod, other_pod = _pod("hello-abc-1", "rs-uid", []), _pod("other-abc-1", "other-uid", [])
+    pod_objects = _mock_objects(mocker, pykube.Pod, [own_pod, other_pod])
+
+    assert find_workload_pods(mocker.MagicMock(), deployment) == [own_pod]
+    pod_objects.return_value.filter.assert_called_once_with(namespace="test", selector=LABELS)
+
+
+def test_wait_for_deployments_watches_pods(mocker: MockerFixture) -> None:
+    deployment = _workload(pykube.Deployment, "deploy-uid", ready=False)
+    _mock_get_by_name(mocker, pykube.Deployment, deployment)
+    replica_set = pykube.ReplicaSet(
+        None, {"metadata": {"name": "hello-abc", "uid": "rs-uid", "ownerReferences": [{"uid": "deploy-uid"}]}}
+    )
+    _mock_objects(mocker, pykube.ReplicaSet, [replica_set])
+    _mock_objects(mocker, pykube.Pod, [_pod("hello-abc-1", "rs-uid", [CRASH_LOOP])])
+    mocker.patch("pytest_helm_charts.utils.time.sleep")
+
+    with pytest.raises(PodFailureError) as e:
+        wait_for_deployments_to_run(mocker.MagicMock(), ["hello"], "test", 60, watch_pods=True)
+
+    assert e.value.failure.pod_name == "hello-abc-1"
+    assert "exit code 1" in e.value.msg
+
+
+def test_pods_of_ready_workloads_not_checked(mocker: MockerFixture) -> None:
+    stateful_set = _workload(pykube.StatefulSet, "sts-uid", ready=True)
+    _mock_get_by_name(mocker, pykube.StatefulSet, stateful_set)
+    pod_objects = _mock_objects(mocker, pykube.Pod, [_pod("hello-0", "sts-uid", [CRASH_LOOP])])
+
+    assert wait_for_stateful_sets_to_run(mocker.MagicMock(), ["hello"], "test", 60, watch_pods=True) == [stateful_set]
+    pod_objects.assert_not_called()
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+from pytest import Pytester
+
+from pytest_helm_charts.timing import TimingRecorder
+
+
+def test_recorder_records_spans() -> None:
+    recorder = TimingRecorder()
+    recorder.current_node_id = "test.py::test_a"
+    with recorder.span("create", "App", "default", "hello"):
+        pass
+    with pytest.raises(TimeoutError):
+        with recorder.span("wait", "App", "default", "hello"):
+            raise TimeoutError()
+
+    assert [s.operation for s in recorder.spans] == ["create", "wait"]
+    assert recorder.spans[0].node_id == "test.py::test_a"
+    assert recorder.spans[0].error is None
+    assert recorder.spans[1].error == "TimeoutError"
+    assert len(recorder.slowest(1)) == 1
+
+
+def test_timing_report_and_summary(pytester: Pytester) -> None:
+    pytester.makepyfile(
+        """
+        import time
+        from pytest_helm_charts.timing import timed
+
+        def test_slow_create():
+            with timed("create", "App", "default", "slow-app"):
+                time.sleep(0.1)
+        """
+    )
+    result = pytester.runpytest_subprocess("--helm-charts-timing-report", "timing.jsonl", "--helm-charts-timing-top=5")
+
+    result.stdout.fnmatch_lines(
+        ["*pytest-helm-charts: 5 slowest operations*", "*create  App default/slow-app (*::test_slow_create)"]
+    )
+    lines = (pytester.path / "timing.jsonl").read_text().splitlines()
+    assert len(lines) == 1
+    span = json.loads(lines[0])
+    assert span["kind"] == "App"
+    assert span["node_id"].endswith("::test_slow_create")
+    assert span["duration_sec"] >= 0.1
+
+
+def test_timing_summary_is_disabled_by_default(pytester: Pytester) -> None:
+    pytester.makepyfile(
+        """
+        from pytest_helm_charts.timing import timed
+
+        def test_create():
+            with timed("create", "App", "default", "app"):
+                pass
+        """
+    )
+    result = pytester.runpytest_subprocess()
+
+    result.assert_outcomes(passed=1)
+    result.stdout.no_fnmatch_line("*slowest operations*")
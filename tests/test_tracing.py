@@ -0,0 +1,90 @@
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+from pytest import Pytester
+
+from pytest_helm_charts import tracing
+from pytest_helm_charts.timing import TimingRecorder
+
+
+def _read_spans(path: Path) -> List[Dict[str, Any]]:
+    spans = []
+    for line in path.read_text().splitlines():
+        for resource_spans in json.loads(line)["resourceSpans"]:
+            for scope_spans in resource_spans["scopeSpans"]:
+                spans.extend(scope_spans["spans"])
+    return spans
+
+
+def _attributes(span: Dict[str, Any]) -> Dict[str, Any]:
+    return {a["key"]: list(a["value"].values())[0] for a in span["attributes"]}
+
+
+def test_spans_are_exported_to_otlp_json_file(tmp_path: Path) -> None:
+    path = tmp_path / "spans.jsonl"
+    tracing.enable_tracing(str(path))
+    try:
+        with TimingRecorder().span("create", "App", "default", "hello"):
+            tracing.record_http_request(
+                "POST", "https://k8s/apis/application.giantswarm.io/v1alpha1/namespaces/default/apps", 409, 0.1, {}
+            )
+    finally:
+        tracing.disable_tracing()
+    assert not tracing.is_tracing_enabled()
+
+    spans = {s["name"]: s for s in _read_spans(path)}
+    assert set(spans) == {"create App", "HTTP POST"}
+    create_span, http_span = spans["create App"], spans["HTTP POST"]
+    assert _attributes(create_span) == {
+        "k8s.operation": "create",
+        "k8s.kind": "App",
+        "k8s.namespace.name": "default",
+        "k8s.name": "hello",
+    }
+    assert http_span["parentSpanId"] == create_span["spanId"]
+    assert http_span["traceId"] == create_span["traceId"]
+    assert http_span["kind"] == 3
+    assert http_span["status"]["code"] == 2
+    assert _attributes(http_span)["http.response.status_code"] == "409"
+    assert int(http_span["endTimeUnixNano"]) - int(http_span["startTimeUnixNano"]) == pytest.approx(1e8, rel=0.01)
+
+
+def test_traced_does_nothing_when_disabled() -> None:
+    with tracing.traced("noop", {"a": 1}):
+        tracing.record_http_request("GET", "https://k8s/version", 200, 0.1, {})
+        tracing.set_current_span_error("ignored")
+
+
+def test_plugin_exports_test_spans(pytester: Pytester) -> None:
+    pytester.makepyfile(
+        """
+        from pytest_helm_charts.timing import timed
+
+        def test_create():
+            with timed("create", "App", "default", "hello-app"):
+                pass
+
+        def test_failing():
+            assert False
+        """
+    )
+    result = pytester.runpytest_subprocess("--helm-charts-otel-file", "spans.jsonl")
+
+    result.assert_outcomes(passed=1, failed=1)
+    spans = {s["name"]: s for s in _read_spans(pytester.path / "spans.jsonl")}
+    test_span = spans["test_plugin_exports_test_spans.py::test_create"]
+    assert spans["create App"]["parentSpanId"] == test_span["spanId"]
+    assert spans["test_plugin_exports_test_spans.py::test_failing"]["status"]["code"] == 2
+
+
+def test_otel_file_option_requires_sdk(pytester: Pytester, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(sys.modules, "opentelemetry.sdk.trace", None)
+    pytester.makepyfile("def test_nothing(): pass")
+
+    result = pytester.runpytest("--helm-charts-otel-file", "spans.jsonl")
+
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
+    result.stderr.fnmatch_lines(["*requires OpenTelemetry SDK*"])
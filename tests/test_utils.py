@@ -7,7 +7,13 @@ from pykube import HTTPClient
 from pykube.objects import NamespacedAPIObject
 from pytest_mock import MockerFixture, MockFixture
 
-from pytest_helm_charts.utils import wait_for_objects_condition
+from pytest_helm_charts.utils import (
+    wait_for_objects_condition,
+    wait_for_objects_condition_with_stats,
+    object_exists,
+    PARTIAL_OBJECT_METADATA_ACCEPT,
+    WaitStats,
+)
 from pytest_helm_charts.k8s.job import make_job_object
 
 MockCR = NamespacedAPIObject
@@ -100,3 +106,49 @@ def test_make_job_object() -> None:
     assert job["spec"]["template"]["spec"]["containers"][0]["image"] == image
     assert job["spec"]["template"]["spec"]["containers"][0]["command"] == command
     assert job["spec"]["template"]["spec"]["restartPolicy"] == restart_policy
+
+
+class ExistingMockCR(NamespacedAPIObject):
+    version = "v1"
+    endpoint = "mockcrs"
+    kind = "MockCR"
+
+
+@pytest.mark.parametrize("status_code,expected", [(200, True), (404, False)], ids=["exists", "gone"])
+def test_object_exists_requests_metadata_only(mocker: MockFixture, status_code: int, expected: bool) -> None:
+    kube_client = mocker.MagicMock(name="HTTPClient")
+    kube_client.get.return_value.status_code = status_code
+    obj = ExistingMockCR(kube_client, {"metadata": {"name": "test", "namespace": "test_ns"}})
+
+    assert object_exists(obj) == expected
+    kube_client.get.assert_called_once()
+    assert kube_client.get.call_args.kwargs["headers"] == {"Accept": PARTIAL_OBJECT_METADATA_ACCEPT}
+    assert kube_client.get.call_args.kwargs["namespace"] == "test_ns"
+
+
+def test_wait_for_objects_condition_with_stats_reports_slowest_object(mocker: MockFixture) -> None:
+    fast = make_job_object(cast(HTTPClient, None), "fast", "test_ns", [])
+    fast.obj["status"] = {"succeeded": 1}
+    slow = make_job_object(cast(HTTPClient, None), "slow", "test_ns", [])
+    slow.obj["status"] = {"active": 1}
+    objects_mock = get_ready_objects_filter_mock(mocker, [fast, slow, fast, slow])
+    mocker.patch("tests.test_utils.MockCR")
+    cast(unittest.mock.Mock, MockCR).objects.return_value = objects_mock
+    mocker.patch("pytest_helm_charts.utils.time.sleep")
+
+    def check_fun(obj: NamespacedAPIObject) -> bool:
+        return obj.obj["status"].get("succeeded") == 1
+
+    with pytest.raises(TimeoutError) as exc_info:
+        wait_for_objects_condition_with_stats(
+            cast(HTTPClient, None), MockCR, ["fast", "slow"], "test_ns", check_fun, 2, False
+        )
+
+    assert type(exc_info.value) is TimeoutError
+    assert "'slow' (not ready" in str(exc_info.value)
+    assert '"active": 1' in str(exc_info.value)
+    stats: WaitStats = getattr(exc_info.value, "wait_stats")
+    assert [o.name for o in stats.slowest(2)] == ["slow", "fast"]
+    assert stats.objects[0].ready_sec is not None
+    assert stats.objects[1].first_seen_sec is not None
+    assert stats.objects[1].last_status == {"active": 1}
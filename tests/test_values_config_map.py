@@ -0,0 +1,143 @@
+from typing import cast
+
+import pytest
+from pykube import ConfigMap, HTTPClient
+from pykube.exceptions import HTTPError
+from pytest_mock import MockerFixture
+
+from pytest_helm_charts.clusters import Cluster
+from pytest_helm_charts.giantswarm_app_platform import values_config_map
+from pytest_helm_charts.giantswarm_app_platform.app import _create_app_objects, make_app_object, reconfigure_app
+from pytest_helm_charts.giantswarm_app_platform.fixtures import _delete_apps
+from pytest_helm_charts.giantswarm_app_platform.values_config_map import (
+    VALUES_HASH_LABEL,
+    ValuesConfigMapStore,
+    is_shared_values_config_map,
+)
+
+VALUES = {"replicas": 2, "image": {"tag": "1.0.0", "repository": "hello"}}
+
+
+def test_config_map_named_by_values_hash(mocker: MockerFixture) -> None:
+    dump_spy = mocker.spy(values_config_map.yaml, "dump")
+    store = ValuesConfigMapStore()
+
+    cm1 = store.make_config_map(cast(HTTPClient, None), "ns1", VALUES)
+    # the same values with keys in another order
+    cm2 = store.make_config_map(
+        cast(HTTPClient, None), "ns2", {"image": {"repository": "hello", "tag": "1.0.0"}, "replicas": 2}
+    )
+    cm3 = store.make_config_map(cast(HTTPClient, None), "ns1", {"replicas": 3})
+
+    assert cm1.name == cm2.name
+    assert cm1.name != cm3.name
+    assert cm1.namespace == "ns1" and cm2.namespace == "ns2"
+    assert cm1.obj["data"] == cm2.obj["data"] == {"values": "image:\n  repository: hello\n  tag: 1.0.0\nreplicas: 2\n"}
+    assert is_shared_values_config_map(cm1)
+    assert cm1.name == "values-" + cm1.obj["metadata"]["labels"][VALUES_HASH_LABEL]
+    assert dump_spy.call_count == 2
+
+
+def test_config_map_reference_counting(mocker: MockerFixture) -> None:
+    store = ValuesConfigMapStore()
+    cm = store.make_config_map(cast(HTTPClient, None), "ns", VALUES)
+    create_mock = mocker.patch.object(cm, "create")
+
+    assert store.acquire(cm)
+    assert not store.acquire(cm)
+    assert store.refs(cm) == 2
+    create_mock.assert_called_once_with()
+
+    assert not store.release(cm)
+    assert store.release(cm)
+    assert store.refs(cm) == 0
+    # releasing an unknown ConfigMap never asks to delete it
+    assert not store.release(cm)
+
+
+def test_existing_config_map_adopted(mocker: MockerFixture) -> None:
+    store = ValuesConfigMapStore()
+    cm = store.make_config_map(cast(HTTPClient, None), "ns", VALUES)
+    mocker.patch.object(cm, "create", side_effect=HTTPError(409, "already exists"))
+
+    assert not store.acquire(cm)
+    assert store.refs(cm) == 1
+
+
+def test_make_app_object_with_shared_values() -> None:
+    store = ValuesConfigMapStore()
+
+    app1 = make_app_object(
+        cast(HTTPClient, None), "app1", "1.0.0", "cat", "default", "ns", "ns", VALUES, values_store=store
+    )
+    app2 = make_app_object(
+        cast(HTTPClient, None), "app2", "1.0.0", "cat", "default", "ns", "ns", VALUES, values_store=store
+    )
+
+    assert app1.app_cm is not None and app2.app_cm is not None
+    assert app1.app_cm.name == app2.app_cm.name
+    assert app1.app.obj["spec"]["config"] == {"configMap": {"name": app1.app_cm.name, "namespace": "ns"}}
+
+
+def test_shared_config_map_released_when_app_creation_fails(mocker: MockerFixture) -> None:
+    store = ValuesConfigMapStore()
+    apps = [
+        make_app_object(cast(HTTPClient, None), name, "1.0.0", "cat", "default", "ns", "ns", VALUES, values_store=store)
+        for name in ["app1", "app2"]
+    ]
+    for a in apps:
+        assert a.app_cm is not None
+        mocker.patch.object(a.app_cm, "create")
+        mocker.patch.object(a.app, "create", side_effect=HTTPError(422, "invalid"))
+    delete_mock = mocker.patch("pytest_helm_charts.giantswarm_app_platform.app.delete_and_wait_for_objects")
+    cm = apps[0].app_cm
+    store.acquire(cm)
+
+    # another app still uses the ConfigMap
+    with pytest.raises(HTTPError):
+        _create_app_objects(apps[1], store)
+    assert store.refs(cm) == 1
+    delete_mock.assert_not_called()
+
+    store.release(cm)
+    with pytest.raises(HTTPError):
+        _create_app_objects(apps[0], store)
+    assert store.refs(cm) == 0
+    delete_mock.assert_called_once_with(None, ConfigMap, [cm])
+
+
+def test_shared_config_map_deleted_with_last_app(mocker: MockerFixture) -> None:
+    store = ValuesConfigMapStore()
+    apps = [
+        make_app_object(cast(HTTPClient, None), name, "1.0.0", "cat", "default", "ns", "ns", VALUES, values_store=store)
+        for name in ["app1", "app2"]
+    ]
+    for a in apps:
+        assert a.app_cm is not None
+        mocker.patch.object(a.app_cm, "create")
+        store.acquire(a.app_cm)
+    delete_mock = mocker.patch("pytest_helm_charts.giantswarm_app_platform.fixtures.delete_and_wait_for_objects")
+    kube_cluster = mocker.MagicMock(spec=Cluster)
+
+    _delete_apps(kube_cluster, apps[:1], store)
+    assert delete_mock.call_args_list[-1].args[2] == []
+
+    _delete_apps(kube_cluster, apps[1:], store)
+    assert delete_mock.call_args_list[-1].args[2] == [apps[1].app_cm]
+
+
+def test_reconfigure_app_with_shared_config_map_fails() -> None:
+    configured_app = make_app_object(
+        cast(HTTPClient, None),
+        "app1",
+        "1.0.0",
+        "cat",
+        "default",
+        "ns",
+        "ns",
+        VALUES,
+        values_store=ValuesConfigMapStore(),
+    )
+
+    with pytest.raises(ValueError, match="shared values ConfigMap"):
+        reconfigure_app(cast(HTTPClient, None), configured_app, {"replicas": 3})